@@ -0,0 +1,432 @@
+"""
+Recording stand-in for maya.cmds, maya.utils and maya.api.OpenMaya, so the plugin's hot paths can
+be benchmarked on a plain CPython. Only what the plugin calls is modelled, and only closely enough
+to drive the same code paths: UI controls keep the values they are created/edited with, deferred
+calls are queued until drain(), and the OpenMaya side keeps a flat dictionary of nodes.
+Every cmds/OpenMaya call is counted in RECORDER.
+install() must run before any plugin module is imported.
+"""
+import os
+import sys
+import glob
+import json
+import types
+import tempfile
+import threading
+from collections import Counter
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates")
+
+# Plugs with children, for ShadingGraph's one-channel-into-a-color fan out
+COMPOUND_ATTRS = {
+    "outColor", "color", "baseColor", "diffuseColor", "emissiveColor", "specularColor", "input1", "input2",
+    "output", "normalCamera", "outNormal", "normal", "colorGain", "colorOffset", "defaultColor",
+}
+UV_ATTRS = {"outUV", "uvCoord", "outUvFilterSize", "uvFilterSize", "repeatUV", "offset", "translateFrame",
+            "vertexUvOne", "vertexUvTwo", "vertexUvThree", "noiseUV", "rotateFrame"}
+DEFAULT_NODES = {"defaultTextureList1": "textureList", "defaultShaderList1": "shaderList",
+                 "defaultRenderUtilityList1": "renderUtilityList", "renderPartition": "partition"}
+# Control queries answered from the value the control was created/edited with, else this default
+QUERY_DEFAULTS = {"text": "", "label": "", "value": False, "childArray": [], "isCancelled": False, "select": 1}
+
+
+class Recorder:
+    def __init__(self):
+        self.calls = Counter()
+        self.lock = threading.Lock()
+
+    def record(self, name):
+        with self.lock:
+            self.calls[name] += 1
+
+    def total(self):
+        return sum(self.calls.values())
+
+    def reset(self):
+        with self.lock:
+            self.calls.clear()
+
+
+RECORDER = Recorder()
+
+
+def template_node_types():
+    types_ = {"file", "place2dTexture", "shadingEngine"}
+    for path in glob.glob(os.path.join(TEMPLATE_DIR, "*.json")):
+        with open(path, "r") as f:
+            types_.update(node["type"] for node in json.load(f).get("nodes", []))
+    return sorted(types_)
+
+
+class FakeCmds(types.ModuleType):
+    """ maya.cmds: any command exists; the ones the plugin queries have handlers below """
+    def __init__(self):
+        types.ModuleType.__init__(self, "maya.cmds")
+        self.controls = {}  # control name -> {flag: value}
+        self.option_vars = {}
+        self.deferred = []
+        self.counter = Counter()
+        self.node_types = template_node_types()
+        self.app_dir = tempfile.mkdtemp(prefix="fakeMaya_")
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        handler = getattr(type(self), "cmd_" + name, None)
+
+        def command(*args, **kwargs):
+            RECORDER.record("cmds." + name)
+            if handler is not None:
+                return handler(self, *args, **kwargs)
+            return self.control(name, *args, **kwargs)
+        return command
+
+    def control(self, kind, *args, **kwargs):
+        """ Generic UI control: create, edit, query and exists """
+        if kwargs.pop("exists", kwargs.pop("ex", False)):
+            return bool(args) and args[0] in self.controls
+        if kwargs.pop("query", kwargs.pop("q", False)):
+            values = self.controls.get(args[0], {}) if args else {}
+            for flag in kwargs:
+                return values.get(flag, QUERY_DEFAULTS.get(flag))
+            return None
+        if kwargs.pop("edit", kwargs.pop("e", False)):
+            self.controls.setdefault(args[0], {}).update(kwargs)
+            return None
+        self.counter[kind] += 1
+        name = args[0] if args and isinstance(args[0], str) else f"{kind}{self.counter[kind]}"
+        parent = kwargs.get("parent")
+        self.controls.setdefault(name, {}).update(kwargs)
+        if parent in self.controls:
+            self.controls[parent].setdefault("childArray", []).append(name)
+        return name
+
+    def set_value(self, control, flag, value):
+        """ What the user typed/ticked, e.g. set_value(field, "text", "wood") """
+        self.controls.setdefault(control, {})[flag] = value
+
+    def drain(self):
+        """ Runs everything queued with evalDeferred / maya.utils.executeDeferred, like an idle event loop """
+        ran = 0
+        while self.deferred:
+            fn, args = self.deferred.pop(0)
+            fn(*args)
+            ran += 1
+        return ran
+
+    def cmd_deleteUI(self, *names, **kwargs):
+        for name in names:
+            values = self.controls.pop(name, None)
+            parent = values.get("parent") if values else None
+            if parent in self.controls:
+                children = self.controls[parent].get("childArray", [])
+                if name in children:
+                    children.remove(name)
+
+    def cmd_evalDeferred(self, fn, **kwargs):
+        self.deferred.append((fn, ()))
+
+    def cmd_optionVar(self, **kwargs):
+        if "exists" in kwargs:
+            return kwargs["exists"] in self.option_vars
+        if "q" in kwargs or "query" in kwargs:
+            return self.option_vars.get(kwargs.get("q", kwargs.get("query")))
+        if "remove" in kwargs:
+            self.option_vars.pop(kwargs["remove"], None)
+        if "stringValueAppend" in kwargs:
+            key, value = kwargs["stringValueAppend"]
+            self.option_vars.setdefault(key, []).append(value)
+        for flag in ("intValue", "stringValue", "floatValue"):
+            if flag in kwargs:
+                key, value = kwargs[flag]
+                self.option_vars[key] = value
+        return None
+
+    def cmd_internalVar(self, **kwargs):
+        return self.app_dir + "/"
+
+    def cmd_allNodeTypes(self, **kwargs):
+        return list(self.node_types)
+
+    def cmd_objExists(self, name):
+        return name in SCENE.by_name
+
+    def cmd_ls(self, *args, **kwargs):
+        node_type = kwargs.get("type")
+        return [n.name for n in SCENE.nodes if node_type is None or n.type == node_type]
+
+    def cmd_file(self, *args, **kwargs):
+        if kwargs.get("new"):
+            SCENE.reset()
+            return None
+        if kwargs.get("query") or kwargs.get("q"):
+            return []
+        if kwargs.get("exportSelected") and args:
+            # Size of a real export does not matter here, the write itself does
+            with open(args[0], "w") as f:
+                f.write("//Maya ASCII scene\n")
+                for node in SCENE.selection:
+                    f.write(f'createNode {node.type} -n "{node.name}";\n')
+            return args[0]
+        return None
+
+    def cmd_setParent(self, *args, **kwargs):
+        return None
+
+    def cmd_inViewMessage(self, **kwargs):
+        return None
+
+
+class FakeUtils(types.ModuleType):
+    def __init__(self, cmds):
+        types.ModuleType.__init__(self, "maya.utils")
+        self.cmds = cmds
+
+    def executeDeferred(self, fn, *args):
+        RECORDER.record("utils.executeDeferred")
+        with RECORDER.lock:
+            self.cmds.deferred.append((fn, args))
+
+
+class FakeNode:
+    def __init__(self, node_type, name):
+        self.type = node_type
+        self.name = name
+        self.array_indices = {}  # array attr -> set of logical indices in use
+
+
+class FakeScene:
+    def __init__(self):
+        self.nodes = []
+        self.by_name = {}
+        self.type_counts = Counter()
+        self.selection = []
+        self.reset()
+
+    def reset(self):
+        self.nodes, self.by_name, self.selection = [], {}, []
+        self.type_counts.clear()
+        for name, node_type in DEFAULT_NODES.items():
+            self.add(FakeNode(node_type, name))
+
+    def add(self, node):
+        self.nodes.append(node)
+        self.by_name[node.name] = node
+
+    def create(self, node_type):
+        self.type_counts[node_type] += 1
+        node = FakeNode(node_type, f"{node_type}{self.type_counts[node_type]}")
+        self.add(node)
+        return node
+
+    def rename(self, node, name):
+        self.by_name.pop(node.name, None)
+        node.name = name
+        self.by_name[name] = node
+
+    def delete(self, node):
+        if self.by_name.get(node.name) is node:
+            del self.by_name[node.name]
+        if node in self.nodes:
+            self.nodes.remove(node)
+
+
+SCENE = FakeScene()
+
+
+class MObject:
+    def __init__(self, node=None):
+        self.node = node
+
+    def isNull(self):
+        return self.node is None
+
+
+class MPlug:
+    def __init__(self, node, attr, index=None):
+        self.node = node
+        self.attr = attr
+        self.index = index
+
+    @property
+    def isCompound(self):
+        return self.attr in COMPOUND_ATTRS or self.attr in UV_ATTRS
+
+    def numChildren(self):
+        return 2 if self.attr in UV_ATTRS else 3
+
+    def child(self, i):
+        RECORDER.record("om.MPlug.child")
+        return MPlug(self.node, f"{self.attr}[{i}]")
+
+    def elementByLogicalIndex(self, index):
+        RECORDER.record("om.MPlug.elementByLogicalIndex")
+        return MPlug(self.node, self.attr, index)
+
+    def getExistingArrayAttributeIndices(self):
+        RECORDER.record("om.MPlug.getExistingArrayAttributeIndices")
+        return sorted(self.node.array_indices.get(self.attr, ()))
+
+    def name(self):
+        return f"{self.node.name}.{self.attr}"
+
+
+class MFnDependencyNode:
+    def __init__(self, obj=None):
+        self.obj = obj
+
+    def findPlug(self, attr, want_networked=False):
+        RECORDER.record("om.MFnDependencyNode.findPlug")
+        return MPlug(self.obj.node, attr)
+
+    def name(self):
+        return self.obj.node.name
+
+
+class MDGModifier:
+    def __init__(self):
+        self.created = []
+        self.operations = 0
+
+    def createNode(self, node_type):
+        RECORDER.record("om.MDGModifier.createNode")
+        node = SCENE.create(node_type)
+        self.created.append(node)
+        return MObject(node)
+
+    def renameNode(self, obj, name):
+        RECORDER.record("om.MDGModifier.renameNode")
+        SCENE.rename(obj.node, name)
+
+    def connect(self, src, dst):
+        RECORDER.record("om.MDGModifier.connect")
+        if dst.index is not None:
+            dst.node.array_indices.setdefault(dst.attr, set()).add(dst.index)
+        self.operations += 1
+
+    def __getattr__(self, name):
+        # newPlugValueString/Bool/Int/Double...
+        if not name.startswith("newPlugValue"):
+            raise AttributeError(name)
+
+        def queue(plug, value):
+            RECORDER.record("om.MDGModifier." + name)
+            self.operations += 1
+        return queue
+
+    def doIt(self):
+        RECORDER.record("om.MDGModifier.doIt")
+
+    def undoIt(self):
+        RECORDER.record("om.MDGModifier.undoIt")
+        for node in self.created:
+            SCENE.delete(node)
+        self.created = []
+
+
+class MSelectionList:
+    def __init__(self):
+        self.items = []
+
+    def add(self, name):
+        RECORDER.record("om.MSelectionList.add")
+        node = SCENE.by_name.get(name)
+        if node is None:
+            raise RuntimeError(f"No object matches name: {name}")
+        self.items.append(node)
+
+    def getDependNode(self, i):
+        return MObject(self.items[i])
+
+    def length(self):
+        return len(self.items)
+
+
+class MGlobal:
+    kInteractive, kBatch, kLibraryApp = 0, 1, 2
+
+    @staticmethod
+    def mayaState():
+        return MGlobal.kBatch
+
+    @staticmethod
+    def setActiveSelectionList(selection):
+        RECORDER.record("om.MGlobal.setActiveSelectionList")
+        SCENE.selection = list(selection.items)
+
+    @staticmethod
+    def displayInfo(message):
+        RECORDER.record("om.MGlobal.displayInfo")
+
+    @staticmethod
+    def displayWarning(message):
+        RECORDER.record("om.MGlobal.displayWarning")
+
+    @staticmethod
+    def displayError(message):
+        RECORDER.record("om.MGlobal.displayError")
+
+
+class MImage:
+    """ Enough of MImage for thumbnailCache.resize_with_mimage: the "resized" image is a copy """
+    def __init__(self):
+        self.data = b""
+
+    def readFromFile(self, path):
+        RECORDER.record("om.MImage.readFromFile")
+        with open(path, "rb") as f:
+            self.data = f.read()
+
+    def getSize(self):
+        return 4, 4
+
+    def resize(self, width, height, preserveAspectRatio=True):
+        RECORDER.record("om.MImage.resize")
+
+    def writeToFile(self, path, output_format="png"):
+        RECORDER.record("om.MImage.writeToFile")
+        with open(path, "wb") as f:
+            f.write(self.data)
+
+
+class MSyntax:
+    kString, kLong, kDouble, kBoolean, kNoArg = range(5)
+
+    def addFlag(self, *args):
+        pass
+
+    def makeFlagMultiUse(self, *args):
+        pass
+
+
+class MPxCommand:
+    def __init__(self):
+        self.result = None
+
+    def setResult(self, result):
+        self.result = result
+
+    def syntax(self):
+        return MSyntax()
+
+
+def make_open_maya():
+    om = types.ModuleType("maya.api.OpenMaya")
+    for cls in (MObject, MPlug, MFnDependencyNode, MDGModifier, MSelectionList, MGlobal, MImage, MSyntax, MPxCommand):
+        setattr(om, cls.__name__, cls)
+    om.maya_useNewAPI = True
+    return om
+
+
+def install():
+    """ Registers the fake modules. Returns the FakeCmds instance. """
+    if isinstance(sys.modules.get("maya.cmds"), FakeCmds):
+        return sys.modules["maya.cmds"]
+    cmds = FakeCmds()
+    maya = types.ModuleType("maya")
+    api = types.ModuleType("maya.api")
+    utils = FakeUtils(cmds)
+    om = make_open_maya()
+    maya.cmds, maya.utils, maya.api, api.OpenMaya = cmds, utils, api, om
+    sys.modules.update({"maya": maya, "maya.cmds": cmds, "maya.utils": utils, "maya.api": api, "maya.api.OpenMaya": om})
+    return cmds
@@ -0,0 +1,328 @@
+"""
+Benchmarks of the plugin's hot paths on a plain CPython, through the recording maya stub in fakeMaya.
+
+    python benchmarks/runBenchmarks.py                        # 100 and 1k materials, checked against baselines.json
+    python benchmarks/runBenchmarks.py --sizes 100 1000 10000 50000 --save-baseline
+    python benchmarks/runBenchmarks.py --ops search_fuzzy display_page --repeat 5
+
+For every operation and library size it reports the wall time (best of --repeat), filesystem calls
+made through os/open, read/write syscalls from /proc/self/io (Linux only), maya.cmds/OpenMaya calls
+and peak traced memory. Memory comes from a separate run under tracemalloc, which would skew the time.
+ZIP, rename and build operations work on at most --max-sets texture sets whatever the library size.
+Exits with 1 if a metric is over its baseline by more than THRESHOLDS.
+"""
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import builtins
+import tempfile
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import redirect_stdout
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import fakeMaya  # noqa: E402
+cmds = fakeMaya.install()
+
+from matSelector import MatSelector  # noqa: E402
+from matBuildSelector import MatBuildSelector  # noqa: E402
+from buildMaterial import BuildMaterial  # noqa: E402
+from matLibraryIndex import INDEX_FILE_NAME  # noqa: E402
+from materialFiles import rename_inside_dir  # noqa: E402
+from synthLibrary import make_library, make_packs, make_loose_sets  # noqa: E402
+
+BASELINE_PATH = os.path.join(BENCH_DIR, "baselines.json")
+DEFAULT_SIZES = [100, 1000]
+DEFAULT_MAX_SETS = 200
+# metric -> (allowed ratio over the baseline, absolute slack); call counts are deterministic, time is not
+THRESHOLDS = {
+    "wall_ms": (1.5, 5.0),
+    "fs_calls": (1.1, 5),
+    "cmds_calls": (1.05, 0),
+    "peak_kb": (1.3, 256),
+}
+FS_FUNCTIONS = [(os, "stat"), (os, "lstat"), (os, "listdir"), (os, "scandir"), (os, "open"), (os, "replace"),
+                (os, "rename"), (os, "remove"), (os, "mkdir"), (builtins, "open")]
+
+
+class FsCounter:
+    """ Counts calls to FS_FUNCTIONS from any thread """
+    def __init__(self):
+        self.calls = Counter()
+        self.lock = threading.Lock()
+
+    def install(self):
+        for module, name in FS_FUNCTIONS:
+            setattr(module, name, self.wrap(name, getattr(module, name)))
+
+    def wrap(self, name, fn):
+        def counted(*args, **kwargs):
+            with self.lock:
+                self.calls[name] += 1
+            return fn(*args, **kwargs)
+        return counted
+
+    def total(self):
+        return sum(self.calls.values())
+
+    def reset(self):
+        with self.lock:
+            self.calls.clear()
+
+
+FS = FsCounter()
+
+
+def proc_io():
+    """ (read syscalls, write syscalls) of this process so far, None where /proc is missing """
+    try:
+        with open("/proc/self/io", "r") as f:
+            values = dict(line.split(":") for line in f.read().splitlines() if ":" in line)
+        return int(values["syscr"]), int(values["syscw"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+class Context:
+    def __init__(self, workdir, size, max_sets):
+        self.workdir = workdir
+        self.size = size
+        self.sets = min(size, max_sets)
+
+    def library(self):
+        return make_library(os.path.join(self.workdir, f"library_{self.size}"), self.size)
+
+    def scratch(self, name):
+        path = os.path.join(self.workdir, "scratch", name)
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+        return path
+
+
+def open_selector(lib_path, text=""):
+    selector = MatSelector()
+    selector.lib_path = lib_path
+    selector.open_mat_selector()
+    cmds.set_value(selector.inp_search_field, "text", text)
+    return selector
+
+
+def wait_for_scan(selector):
+    while selector.library is not None and selector.library.scanning():
+        selector.library.wait()
+        cmds.drain()
+
+
+# Operations: name -> (setup(ctx) -> state, run(state), number of items it works on)
+
+def setup_scan_cold(ctx):
+    lib_path = ctx.library()
+    if os.path.exists(os.path.join(lib_path, INDEX_FILE_NAME)):
+        os.remove(os.path.join(lib_path, INDEX_FILE_NAME))
+    return open_selector(lib_path)
+
+
+def setup_scan_warm(ctx):
+    lib_path = ctx.library()
+    if not os.path.exists(os.path.join(lib_path, INDEX_FILE_NAME)):
+        run_scan(open_selector(lib_path))
+    return open_selector(lib_path)
+
+
+def run_scan(selector):
+    selector.update_mat_list()
+    wait_for_scan(selector)
+    selector.refresh_display()
+    cmds.drain()
+
+
+def search_setup(text):
+    def setup(ctx):
+        selector = setup_scan_warm(ctx)
+        run_scan(selector)
+        cmds.set_value(selector.inp_search_field, "text", text)
+        return selector
+    return setup
+
+
+def run_search(selector):
+    selector.search()
+    cmds.drain()
+
+
+def run_display(selector):
+    selector.sort_mats()
+    selector.display_mats()
+    cmds.drain()
+    selector.next_page()
+    cmds.drain()
+
+
+def setup_unzip(ctx):
+    packs = make_packs(os.path.join(ctx.workdir, f"packs_{ctx.sets}"), ctx.sets)
+    output = ctx.scratch("unzip")
+    builder = MatBuildSelector()
+    return builder, [(pack, os.path.join(output, os.path.splitext(os.path.basename(pack))[0])) for pack in packs]
+
+
+def run_unzip(state):
+    builder, jobs = state
+    for pack, output in jobs:
+        builder.unzip(pack, output)
+
+
+def setup_rename(ctx):
+    return make_loose_sets(ctx.scratch("rename"), ctx.sets)
+
+
+def run_rename(dirs):
+    for path in dirs:
+        rename_inside_dir(path)
+
+
+def setup_build(ctx):
+    dirs = setup_rename(ctx)
+    cmds.file(new=True, force=True)
+    return [(path, rename_inside_dir(path)) for path in dirs]
+
+
+def run_build(sets):
+    for path, texture_set in sets:
+        builder = BuildMaterial(path, texture_set=texture_set)
+        if builder.error:
+            raise RuntimeError(builder.error)
+        builder.discard()
+
+
+OPERATIONS = {
+    "scan_cold": (setup_scan_cold, run_scan, "size"),
+    "scan_warm": (setup_scan_warm, run_scan, "size"),
+    "search_prefix": (search_setup("woodold"), run_search, "size"),
+    "search_fuzzy": (search_setup("bircks"), run_search, "size"),
+    "search_filter": (search_setup("wood AND 4k AND has:displacement"), run_search, "size"),
+    "display_page": (search_setup(""), run_display, "size"),
+    "unzip": (setup_unzip, run_unzip, "sets"),
+    "rename_inside_dir": (setup_rename, run_rename, "sets"),
+    "build_material": (setup_build, run_build, "sets"),
+}
+
+
+def measure(name, ctx, repeat):
+    setup, run, items = OPERATIONS[name]
+    # Untimed first run: fills the per-process thumbnail cache so the call counts do not depend on --repeat
+    with redirect_stdout(io.StringIO()):
+        run(setup(ctx))
+    result = None
+    for _ in range(repeat):
+        state = setup(ctx)
+        fakeMaya.RECORDER.reset()
+        FS.reset()
+        io_before = proc_io()
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            run(state)
+        wall_ms = (time.perf_counter() - start) * 1000
+        io_after = proc_io()
+        if result is None or wall_ms < result["wall_ms"]:
+            result = {
+                "wall_ms": round(wall_ms, 2),
+                "fs_calls": FS.total(),
+                "syscalls": sum(io_after) - sum(io_before) if io_before and io_after else None,
+                "cmds_calls": fakeMaya.RECORDER.total(),
+            }
+
+    state = setup(ctx)
+    tracemalloc.start()
+    with redirect_stdout(io.StringIO()):
+        run(state)
+    result["peak_kb"] = round(tracemalloc.get_traced_memory()[1] / 1024.0, 1)
+    tracemalloc.stop()
+    result["items"] = ctx.size if items == "size" else ctx.sets
+    return result
+
+
+def load_baselines(path):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"results": {}}
+
+
+def save_baselines(path, results):
+    baselines = load_baselines(path)
+    baselines["machine"] = {"python": platform.python_version(), "platform": platform.platform()}
+    baselines.setdefault("results", {}).update(results)
+    with open(path, "w") as f:
+        json.dump(baselines, f, indent=1, sort_keys=True)
+
+
+def regressions(result, baseline):
+    found = []
+    for metric, (ratio, slack) in THRESHOLDS.items():
+        if baseline.get(metric) is None or result.get(metric) is None:
+            continue
+        if result[metric] > baseline[metric] * ratio + slack:
+            found.append(f"{metric} {result[metric]} > {baseline[metric]}")
+    return found
+
+
+def format_row(key, result, status=""):
+    syscalls = "-" if result["syscalls"] is None else result["syscalls"]
+    return (f"{key:<26} {result['items']:>6} {result['wall_ms']:>10.1f} {result['fs_calls']:>9} {syscalls:>9} "
+            f"{result['cmds_calls']:>9} {result['peak_kb']:>10.0f}  {status}").rstrip()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the material plugin without Maya.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Library sizes in materials")
+    parser.add_argument("--ops", nargs="+", choices=list(OPERATIONS), default=list(OPERATIONS))
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per operation, the best counts")
+    parser.add_argument("--max-sets", type=int, default=DEFAULT_MAX_SETS, help="Texture sets for the ZIP/rename/build operations")
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "materialsPlugin_bench"),
+                        help="Where the synthetic libraries are generated and kept between runs")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Record these results as the new baseline")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    os.makedirs(args.workdir, exist_ok=True)
+    baselines = load_baselines(args.baseline).get("results", {})
+    FS.install()
+
+    print(f"{'operation@size':<26} {'items':>6} {'wall ms':>10} {'fs calls':>9} {'syscalls':>9} {'cmds':>9} {'peak KB':>10}")
+    results, failed = {}, []
+    for size in args.sizes:
+        ctx = Context(args.workdir, size, args.max_sets)
+        for name in args.ops:
+            key = f"{name}@{size}"
+            result = results[key] = measure(name, ctx, max(1, args.repeat))
+            found = [] if args.save_baseline or key not in baselines else regressions(result, baselines[key])
+            if found:
+                failed.append(key)
+            print(format_row(key, result, "REGRESSION " + ", ".join(found) if found else ""))
+    shutil.rmtree(os.path.join(args.workdir, "scratch"), ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=1)
+    if args.save_baseline:
+        save_baselines(args.baseline, results)
+        print(f"Baseline saved to {args.baseline}")
+    elif failed:
+        print(f"{len(failed)} regressions: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
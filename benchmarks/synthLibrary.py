@@ -0,0 +1,113 @@
+"""
+Synthetic material libraries and texture packs for the benchmarks, generated once per size and
+reused (a .synth_complete marker records the generator version). Names, facets and file layouts
+are seeded, so every run and every machine sees the same library.
+"""
+import os
+import json
+import random
+import struct
+import zipfile
+import zlib
+
+SYNTH_VERSION = 1
+MARKER = ".synth_complete"
+
+CATEGORIES = ["Wood", "Metal", "Bricks", "Fabric", "Rock", "Tiles", "Concrete", "Plaster", "Leather", "Ground"]
+ADJECTIVES = ["Old", "Painted", "Rough", "Polished", "Mossy", "Dirty", "Clean", "Rusty", "Worn", "Fine"]
+RESOLUTIONS = ["1k", "2k", "4k", "8k"]
+VENDORS = ["ambientcg", "polyhaven", "poliigon", None]
+# Vendor-style map names as they arrive in a pack, classified and renamed by the plugin
+PACK_MAPS = ["Color", "Roughness", "NormalGL", "NormalDX", "Displacement", "AmbientOcclusion", "Metalness"]
+PACK_EXTRAS = ["{name}.usdc", "{name}_PREVIEW.jpg", "readme.txt"]
+
+
+def tiny_png(width=4, height=4, gray=128):
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff)
+    rows = b"".join(b"\0" + bytes([gray]) * width * 3 for _ in range(height))
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b""))
+
+
+PNG = tiny_png()
+
+
+def material_names(count, seed=0):
+    rng = random.Random(seed)
+    return [f"{rng.choice(CATEGORIES)}{rng.choice(ADJECTIVES)}{i:05d}" for i in range(count)]
+
+
+def is_complete(root):
+    try:
+        with open(os.path.join(root, MARKER), "r") as f:
+            return json.load(f).get("version") == SYNTH_VERSION
+    except (OSError, ValueError):
+        return False
+
+
+def mark_complete(root, **info):
+    with open(os.path.join(root, MARKER), "w") as f:
+        json.dump(dict(info, version=SYNTH_VERSION), f)
+
+
+def make_library(root, count):
+    """ count built materials: <mat>/<mat>.ma, <mat>.png and .material_meta.json """
+    if is_complete(root):
+        return root
+    rng = random.Random(count)
+    os.makedirs(root, exist_ok=True)
+    for name in material_names(count):
+        mat_dir = os.path.join(root, name)
+        os.makedirs(mat_dir, exist_ok=True)
+        with open(os.path.join(mat_dir, name + ".ma"), "w") as f:
+            f.write(f'//Maya ASCII scene\ncreateNode shadingEngine -n "{name}_SG";\n')
+        with open(os.path.join(mat_dir, name + ".png"), "wb") as f:
+            f.write(PNG)
+        category = next(c for c in CATEGORIES if name.startswith(c))
+        meta = {
+            "category": category.lower(),
+            "tags": sorted({category.lower(), name[len(category):-5].lower()}),
+            "resolution": rng.choice(RESOLUTIONS),
+            "maps": sorted(rng.sample(["color", "roughness", "normalgl", "normal", "displacement", "metalness"], 4)),
+            "vendor": rng.choice(VENDORS),
+            "templates": ["arnold"],
+            "date_added": f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        }
+        with open(os.path.join(mat_dir, ".material_meta.json"), "w") as f:
+            json.dump(meta, f)
+    mark_complete(root, materials=count)
+    return root
+
+
+def pack_files(name):
+    files = [f"{name}_4K-PNG_{map_name}.png" for map_name in PACK_MAPS]
+    files.extend(extra.format(name=name) for extra in PACK_EXTRAS)
+    return files
+
+
+def make_packs(root, count):
+    """ count vendor-style ZIP packs, each one texture set with a few files the build does not need """
+    if is_complete(root):
+        return sorted(os.path.join(root, f) for f in os.listdir(root) if f.endswith(".zip"))
+    os.makedirs(root, exist_ok=True)
+    for name in material_names(count, seed=1):
+        with zipfile.ZipFile(os.path.join(root, name + ".zip"), "w", zipfile.ZIP_STORED) as zf:
+            for file in pack_files(name):
+                zf.writestr(file, PNG)
+    mark_complete(root, packs=count)
+    return sorted(os.path.join(root, f) for f in os.listdir(root) if f.endswith(".zip"))
+
+
+def make_loose_sets(root, count):
+    """ count unpacked texture sets with vendor file names, fresh every call (renaming consumes them) """
+    os.makedirs(root, exist_ok=True)
+    dirs = []
+    for name in material_names(count, seed=2):
+        mat_dir = os.path.join(root, name)
+        os.makedirs(mat_dir, exist_ok=True)
+        for file in pack_files(name):
+            with open(os.path.join(mat_dir, file), "wb") as f:
+                f.write(PNG)
+        dirs.append(mat_dir)
+    return dirs
@@ -0,0 +1,119 @@
+import os
+import json
+
+from materialFiles import is_image
+from textureClassifier import TextureSet
+
+MANIFEST_FILE_NAME = ".build_manifest.json"
+MANIFEST_VERSION = 1
+
+
+def file_fingerprint(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def source_fingerprint(source, is_zip):
+    """ size + mtime of the ZIP, or of every image in the source folder """
+    if is_zip:
+        return {os.path.basename(source): file_fingerprint(source)}
+    fingerprint = {}
+    for file in sorted(os.listdir(source)):
+        if is_image(file):
+            fingerprint[file] = file_fingerprint(os.path.join(source, file))
+    return fingerprint
+
+
+class BuildManifest:
+    """
+    What a material folder was last built from, stored next to the .ma:
+    the source and its fingerprint, the texture prep settings, the texture set it was classified into, the textures
+    written, and per template the template version and the exported .ma.
+    scope() compares all of that with the current state to decide how much to rebuild.
+    """
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.manifest_path = os.path.join(output_dir, MANIFEST_FILE_NAME)
+        self.data = {}
+
+    def load(self):
+        try:
+            with open(self.manifest_path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+            return False
+        self.data = data
+        return True
+
+    def save(self):
+        self.data["version"] = MANIFEST_VERSION
+        tmp_path = self.manifest_path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(self.data, f, indent=1)
+            os.replace(tmp_path, self.manifest_path)
+        except OSError:
+            return False
+        return True
+
+    def textures_unchanged(self):
+        textures = self.data.get("textures")
+        if not textures:
+            return False
+        return all(file_fingerprint(os.path.join(self.output_dir, file)) == fp for file, fp in textures.items())
+
+    def scope(self, source, is_zip, resolution, plan, prep=None):
+        """
+        "full" if the textures have to be copied/extracted again, "graph" if only the .ma has
+        to be rebuilt (new template, .ma missing or edited), None if everything is up to date.
+        """
+        if not self.data and not self.load():
+            return "full"
+        if self.data.get("source") != os.path.abspath(source) or self.data.get("resolution") != resolution:
+            return "full"
+        if self.data.get("prep") != prep:
+            return "full"
+        if self.data.get("inputs") != source_fingerprint(source, is_zip) or not self.textures_unchanged():
+            return "full"
+
+        build = self.data.get("builds", {}).get(plan.name)
+        if build is None or build.get("template_version") != plan.version:
+            return "graph"
+        ma_file, ma_fingerprint = build.get("ma", [None, None])
+        if ma_file is None or file_fingerprint(os.path.join(self.output_dir, ma_file)) != ma_fingerprint:
+            return "graph"
+        return None
+
+    def texture_set(self):
+        """ TextureSet of the output folder as recorded by the last full build """
+        return TextureSet.from_dict(self.data["texture_set"], self.output_dir)
+
+    def record_inputs(self, source, is_zip, resolution, texture_set, prep=None):
+        """ After a full build: the inputs, the classification and the textures written """
+        files = [texture.file for texture in texture_set.maps.values()]
+        for tiles in texture_set.udim_tiles.values():
+            files.extend(texture.file for texture in tiles)
+        files.extend(texture.file for texture in texture_set.previews[:1])
+
+        self.data = {
+            "source": os.path.abspath(source),
+            "inputs": source_fingerprint(source, is_zip),
+            "resolution": resolution,
+            "prep": prep,
+            "texture_set": texture_set.to_dict(),
+            "textures": {file: file_fingerprint(os.path.join(self.output_dir, file)) for file in sorted(set(files))},
+            # Builds of other templates were made from the old textures
+            "builds": {},
+        }
+
+    def record_build(self, plan, export_path):
+        builds = self.data.setdefault("builds", {})
+        builds[plan.name] = {
+            "template_version": plan.version,
+            "ma": [os.path.basename(export_path), file_fingerprint(export_path)],
+        }
@@ -2,173 +2,134 @@ import os
 import maya.cmds as cmds
 import maya.api.OpenMaya as om
 
-class BuildMaterial(om.MPxCommand):
-    kPluginCmdName = "buildMaterial"
-
+from commandSyntax import BuildMaterialSyntax
+from progressSink import as_progress_sink
+from materialTemplates import DEFAULT_TEMPLATE, get_plan
+from textureClassifier import get_classifier
+from materialMetadata import write_metadata
+from perfTrace import note, span, traced
+
+class BuildMaterial(BuildMaterialSyntax, om.MPxCommand):
     @staticmethod
     def cmdCreator():
-        return BuildMaterial(None, None)
+        return BuildMaterial()
+
+    def doIt(self, args):
+        arg_data = om.MArgParser(self.syntax(), args)
+        if not arg_data.isFlagSet(self.kInputFlag):
+            raise RuntimeError("buildMaterial needs -input <material folder>")
+        self.input_dir = arg_data.flagArgumentString(self.kInputFlag, 0)
+        if arg_data.isFlagSet(self.kTemplateFlag):
+            self.template = arg_data.flagArgumentString(self.kTemplateFlag, 0)
+        self.build()
+        if self.error:
+            raise RuntimeError(self.error)
+        self.setResult(self.export_path)
+
+    def isUndoable(self):
+        return self.graph is not None
+
+    def undoIt(self):
+        self.graph.undo()
+
+    def redoIt(self):
+        self.graph.redo()
+
+    def discard(self):
+        """ Removes the built network from the scene, e.g. once it has been exported """
+        if self.graph is not None:
+            self.graph.undo()
+            self.graph = None
+            self.nodes = []
 
     def run(self):
         pass
 
-    def __init__(self, input_dir, status_update):
+    def __init__(self, input_dir=None, status_update=None, texture_set=None, template=DEFAULT_TEMPLATE):
+        """
+        status_update: a ProgressSink, or the name of a cmds.text label to write status to
+        texture_set: the TextureSet of input_dir if the caller already classified it
+        template: name of the material template in templates/ the network is built from
+        """
         om.MPxCommand.__init__(self)
         self.input_dir = input_dir
         self.status_update = status_update
+        self.texture_set = texture_set
+        self.template = template
+        self.sink = as_progress_sink(status_update, interactive=om.MGlobal.mayaState() == om.MGlobal.kInteractive)
+        self.export_path = None
+        self.error = None
+        self.nodes = []
+        self.graph = None  # ShadingGraph of the built network, kept for undo
+
+        if input_dir is not None:
+            self.build()
+
+    def set_status(self, label):
+        self.sink.status(label)
 
-        DISPLACEMENT = None
-        ROUGHNESS = None
-        NORMAL_GL = None
-        COLOR = None
-        AMBIENT_OCC = None
+    def abort(self, message):
+        self.error = message
+        self.sink.error(message)
+
+    @traced("build")
+    def build(self):
+        input_dir = self.input_dir
+
+        texture_set = self.texture_set or get_classifier().classify_dir(input_dir)
         MAT_NAME = os.path.basename(input_dir)
 
-        for file in os.listdir(input_dir):
-            if "displacement" in file.lower():
-                DISPLACEMENT = file
-            elif "roughness" in file.lower():
-                ROUGHNESS = file
-            elif "normalgl" in file.lower():
-                NORMAL_GL = file
-            elif "color" in file.lower():
-                COLOR = file
-            elif "ambientocclusion" in file.lower() or "_ao" in file.lower():
-                AMBIENT_OCC = file
+        try:
+            plan = get_plan(self.template)
+        except (KeyError, ValueError, OSError) as e:
+            self.abort(f"Material template '{self.template}' unusable: {e}")
+            return None
 
         """ Abort if crucial files are missing """
-        if DISPLACEMENT == None:
-            cmds.inViewMessage(amg=f"Displacement file missing. Aborting", pos='midCenter', fade=True)
-            return
-        if ROUGHNESS == None:
-            cmds.inViewMessage(amg=f"Roughness file missing. Aborting", pos='midCenter', fade=True)
-            return
-        if NORMAL_GL == None:
-            cmds.inViewMessage(amg=f"Normal_gl file missing. Aborting", pos='midCenter', fade=True)
-            return
-        if COLOR == None:
-            cmds.inViewMessage(amg=f"Color file missing. Aborting", pos='midCenter', fade=True)
-            return
+        missing = plan.missing_maps(texture_set)
+        if missing:
+            self.abort(f"{missing[0]} file missing. Aborting")
+            return None
 
         """ TODO: try to remove the input_dir so it uses relative file paths """
-        displacement_path = os.path.join(input_dir, DISPLACEMENT)
-        roughness_path = os.path.join(input_dir, ROUGHNESS)
-        normal_gl_path = os.path.join(input_dir, NORMAL_GL)
-        color_path = os.path.join(input_dir, COLOR)
-        if AMBIENT_OCC != None:
-            ambient_occ_path = os.path.join(input_dir, AMBIENT_OCC)
-        export_path = os.path.join(input_dir, MAT_NAME+".ma")
-
-        ambient_occ_file_n = None
-
-        nodes = []
-
-        cmds.text(status_update, edit=True, label="Building material")
-        place_2d_texture_n = cmds.shadingNode('place2dTexture', asUtility=True, name=f'{MAT_NAME}_place2dTexture')
-        nodes.append(place_2d_texture_n)
-
-        displacement_file_n = cmds.shadingNode('file', asTexture=True, name=DISPLACEMENT)
-        nodes.append(displacement_file_n)
-        cmds.setAttr(displacement_file_n + '.fileTextureName', displacement_path, type="string")
-        cmds.setAttr(displacement_file_n + '.colorSpace', 'Raw', type='string')
-        cmds.setAttr(displacement_file_n + '.alphaIsLuminance', 1)
-        cmds.setAttr(displacement_file_n + '.alphaOffset', -0.5)
-        cmds.connectAttr(place_2d_texture_n + '.outUV', displacement_file_n + '.uvCoord', force=True)
-
-
-        color_file_n = cmds.shadingNode('file', asTexture=True, name=COLOR)
-        nodes.append(color_file_n)
-        cmds.setAttr(color_file_n + '.fileTextureName', color_path, type="string")
-        cmds.connectAttr(place_2d_texture_n + '.outUV', color_file_n + '.uvCoord', force=True)
-
-        ambient_occ_file_n = None
-        if AMBIENT_OCC != None:
-            ambient_occ_file_n = cmds.shadingNode('file', asTexture=True, name=AMBIENT_OCC)
-            nodes.append(ambient_occ_file_n)
-            cmds.setAttr(ambient_occ_file_n + '.fileTextureName', ambient_occ_path, type="string")
-            cmds.connectAttr(place_2d_texture_n + '.outUV', ambient_occ_file_n + '.uvCoord', force=True)
-
-
-        roughness_file_n = cmds.shadingNode('file', asTexture=True, name=ROUGHNESS)
-        nodes.append(roughness_file_n)
-        cmds.setAttr(roughness_file_n + '.fileTextureName', roughness_path, type="string")
-        cmds.setAttr(roughness_file_n + '.colorSpace', 'Raw', type='string')
-        cmds.setAttr(roughness_file_n + '.alphaIsLuminance', 1)
-        cmds.connectAttr(place_2d_texture_n + '.outUV', roughness_file_n + '.uvCoord', force=True)
-
-        normal_gl_file_n = cmds.shadingNode('file', asTexture=True, name=NORMAL_GL)
-        nodes.append(normal_gl_file_n)
-        cmds.setAttr(normal_gl_file_n + '.fileTextureName', normal_gl_path, type="string")
-        cmds.setAttr(normal_gl_file_n + '.colorSpace', 'Raw', type='string')
-        cmds.setAttr(normal_gl_file_n + '.alphaIsLuminance', 1)
-        cmds.connectAttr(place_2d_texture_n + '.outUV', normal_gl_file_n + '.uvCoord', force=True)
-
-        place_2d_texture_attributes = [
-            "coverage",
-            "mirrorU",
-            "mirrorV",
-            "noiseUV",
-            "offset",
-            "outUvFilterSize",
-            "repeatUV",
-            "rotateFrame",
-            "rotateUV",
-            "stagger",
-            "translateFrame",
-            "vertexCameraOne",
-            "vertexUvOne",
-            "vertexUvThree",
-            "vertexUvTwo",
-            "wrapU",
-            "wrapV"
-        ]
-
-        for attr in place_2d_texture_attributes:
+        map_files = {}
+        for map_type, texture in texture_set.maps.items():
+            # Prepared .tx / tier variant if the texture prep stage made one, every tile for UDIM maps
+            map_files[map_type] = (texture.file, os.path.join(input_dir, texture_set.render_file(map_type)))
+        udim = [map_type for map_type in texture_set.maps if texture_set.is_udim(map_type)]
+        export_path = os.path.join(input_dir, plan.export_name(MAT_NAME))
+
+        self.set_status("Building material")
+        with span("graph.build", template=plan.name):
+            graph = plan.instantiate(MAT_NAME, map_files, texture_set.packed, udim)
+            missing_types = graph.missing_node_types()
+            if missing_types:
+                self.abort(f"Unknown node types {', '.join(missing_types)}, is the renderer plugin loaded? Aborting")
+                return None
             try:
-                cmds.connectAttr(f"{place_2d_texture_n}.{attr}", f"{displacement_file_n}.{attr}", force=True)
-                cmds.connectAttr(f"{place_2d_texture_n}.{attr}", f"{roughness_file_n}.{attr}", force=True)
-                cmds.connectAttr(f"{place_2d_texture_n}.{attr}", f"{normal_gl_file_n}.{attr}", force=True)
-                cmds.connectAttr(f"{place_2d_texture_n}.{attr}", f"{color_file_n}.{attr}", force=True)
-                cmds.connectAttr(f"{place_2d_texture_n}.{attr}", f"{ambient_occ_file_n}.{attr}", force=True)
-            except:
-                pass
-
-        displacement_shader_n = cmds.shadingNode('displacementShader', asShader=True, name=f'{MAT_NAME}_displacementShader')
-        nodes.append(displacement_shader_n)
-        cmds.connectAttr(displacement_file_n + '.outAlpha', displacement_shader_n + '.displacement', force=True)
-
-        shading_group_n = cmds.sets(renderable=True, noSurfaceShader=True, empty=True, name=f'{MAT_NAME}_myShaderSG')
-        nodes.append(shading_group_n)
-        cmds.connectAttr(displacement_shader_n + '.displacement', shading_group_n + '.displacementShader', force=True)
-
-        bump_2d_n = cmds.shadingNode('bump2d', asShader=True, name=f'{MAT_NAME}_bump2d')
-        nodes.append(bump_2d_n)
-        cmds.connectAttr(normal_gl_file_n + '.outAlpha', bump_2d_n + '.bumpValue', force=True)
-        cmds.setAttr(bump_2d_n + '.bumpInterp', 1)
-
-        ai_standard_surface_n = cmds.shadingNode('aiStandardSurface', asShader=True, name=f'{MAT_NAME}')
-        nodes.append(ai_standard_surface_n)
-        cmds.setAttr(ai_standard_surface_n + '.emission', 1.0)
-        cmds.setAttr(ai_standard_surface_n + '.emissionColor', 0, 0, 0, type='double3')
-
-        if AMBIENT_OCC != None:
-            ai_multiply_n = cmds.shadingNode('aiMultiply', asShader=True, name=f'{MAT_NAME}_aiMultiply')
-            nodes.append(ai_multiply_n)
-            cmds.connectAttr(color_file_n + '.outColor', ai_multiply_n + '.input1', force=True)
-            cmds.connectAttr(ambient_occ_file_n + '.outColor', ai_multiply_n + '.input2', force=True)
-            cmds.connectAttr(ai_multiply_n + '.outColor', ai_standard_surface_n + '.baseColor', force=True)
-        else:
-            cmds.connectAttr(color_file_n + '.outColor', ai_standard_surface_n + '.baseColor', force=True)
-        cmds.connectAttr(roughness_file_n + '.outAlpha', ai_standard_surface_n + '.specularRoughness', force=True)
-        cmds.connectAttr(bump_2d_n + '.outNormal', ai_standard_surface_n + '.normalCamera', force=True)
+                names = graph.apply()
+            except RuntimeError as e:
+                self.abort(f"Failed to build material: {e}")
+                return None
+        self.graph = graph
+        nodes = self.nodes
+        nodes.extend(names.values())
 
-        cmds.connectAttr(ai_standard_surface_n + '.outColor', shading_group_n + '.surfaceShader', force=True)
         if nodes:
-            cmds.select(nodes, r=True)
-            print(f"Selected nodes: {nodes}")
-            cmds.text(status_update, edit=True, label="Exprting ma")
-            cmds.file(export_path, force=True, options="v=0", type="mayaAscii", exportSelected=True)
+            selection = om.MSelectionList()
+            for node in nodes:
+                selection.add(node)
+            om.MGlobal.setActiveSelectionList(selection)
+            note(material=MAT_NAME, nodes=len(nodes))
+            self.set_status("Exprting ma")
+            with span("export"):
+                cmds.file(export_path, force=True, options="v=0", type="mayaAscii", exportSelected=True)
+            self.export_path = export_path
 
         else:
-            cmds.inViewMessage(amg=f"Something went wrong when exportin material (.ma)", pos='midCenter', fade=True)
-        cmds.text(status_update, edit=True, label="Build complete")
+            self.abort("Something went wrong when exportin material (.ma)")
+            return None
+        # Facets for the selector's filters, picked up by the next library scan
+        write_metadata(input_dir, MAT_NAME, texture_set, plan.name)
+        self.set_status("Build complete")
+        return export_path
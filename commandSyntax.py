@@ -0,0 +1,123 @@
+"""
+Flags and syntax of the plugin's commands, kept apart from the command classes so the plugin can
+register every command without importing them. The command classes inherit these.
+"""
+import maya.api.OpenMaya as om
+
+
+class MatSelectorSyntax:
+    kPluginCmdName = "matSelector"
+
+    kClearThumbnailsFlag = "-ct"
+    kClearThumbnailsLongFlag = "-clearThumbnails"
+    kPruneThumbnailsFlag = "-pt"
+    kPruneThumbnailsLongFlag = "-pruneThumbnails"
+    kInvalidateThumbnailFlag = "-it"
+    kInvalidateThumbnailLongFlag = "-invalidateThumbnail"
+    kOpenMaterialFlag = "-om"
+    kOpenMaterialLongFlag = "-openMaterial"
+    kReferenceFlag = "-r"
+    kReferenceLongFlag = "-reference"
+    kAssignFlag = "-a"
+    kAssignLongFlag = "-assign"
+    kAssignMapFlag = "-am"
+    kAssignMapLongFlag = "-assignMap"
+    kLibraryFlag = "-l"
+    kLibraryLongFlag = "-library"
+    kGeneratePreviewsFlag = "-gp"
+    kGeneratePreviewsLongFlag = "-generatePreviews"
+    kFilterFlag = "-fq"
+    kFilterLongFlag = "-filterQuery"
+
+    @staticmethod
+    def syntaxCreator():
+        syntax = om.MSyntax()
+        syntax.addFlag(MatSelectorSyntax.kClearThumbnailsFlag, MatSelectorSyntax.kClearThumbnailsLongFlag)
+        syntax.addFlag(MatSelectorSyntax.kPruneThumbnailsFlag, MatSelectorSyntax.kPruneThumbnailsLongFlag, om.MSyntax.kDouble)
+        syntax.addFlag(MatSelectorSyntax.kInvalidateThumbnailFlag, MatSelectorSyntax.kInvalidateThumbnailLongFlag, om.MSyntax.kString)
+        syntax.addFlag(MatSelectorSyntax.kOpenMaterialFlag, MatSelectorSyntax.kOpenMaterialLongFlag, om.MSyntax.kString)
+        syntax.addFlag(MatSelectorSyntax.kReferenceFlag, MatSelectorSyntax.kReferenceLongFlag)
+        syntax.addFlag(MatSelectorSyntax.kAssignFlag, MatSelectorSyntax.kAssignLongFlag, om.MSyntax.kString)
+        syntax.addFlag(MatSelectorSyntax.kAssignMapFlag, MatSelectorSyntax.kAssignMapLongFlag, om.MSyntax.kString)
+        syntax.addFlag(MatSelectorSyntax.kLibraryFlag, MatSelectorSyntax.kLibraryLongFlag, om.MSyntax.kString)
+        syntax.makeFlagMultiUse(MatSelectorSyntax.kLibraryFlag)
+        syntax.addFlag(MatSelectorSyntax.kGeneratePreviewsFlag, MatSelectorSyntax.kGeneratePreviewsLongFlag, om.MSyntax.kString)
+        syntax.addFlag(MatSelectorSyntax.kFilterFlag, MatSelectorSyntax.kFilterLongFlag, om.MSyntax.kString)
+        return syntax
+
+
+class MatBuildSelectorSyntax:
+    kPluginCmdName = "matBuildSelector"
+
+    kInputFlag = "-i"
+    kInputLongFlag = "-input"
+    kOutputFlag = "-o"
+    kOutputLongFlag = "-output"
+    kWorkersFlag = "-w"
+    kWorkersLongFlag = "-workers"
+    kForceFlag = "-f"
+    kForceLongFlag = "-force"
+    kResolutionFlag = "-r"
+    kResolutionLongFlag = "-resolution"
+    kDedupFlag = "-d"
+    kDedupLongFlag = "-dedup"
+    kDedupLibraryFlag = "-dl"
+    kDedupLibraryLongFlag = "-dedupLibrary"
+    kVerifyLibraryFlag = "-vl"
+    kVerifyLibraryLongFlag = "-verifyLibrary"
+    kTemplateFlag = "-t"
+    kTemplateLongFlag = "-template"
+    kTexturePrepFlag = "-tp"
+    kTexturePrepLongFlag = "-texturePrep"
+    kQualityFlag = "-q"
+    kQualityLongFlag = "-quality"
+    kPackChannelsFlag = "-pc"
+    kPackChannelsLongFlag = "-packChannels"
+    kValidateLibraryFlag = "-val"
+    kValidateLibraryLongFlag = "-validateLibrary"
+    kRepairFlag = "-rp"
+    kRepairLongFlag = "-repair"
+
+    @staticmethod
+    def syntaxCreator():
+        syntax = om.MSyntax()
+        syntax.addFlag(MatBuildSelectorSyntax.kInputFlag, MatBuildSelectorSyntax.kInputLongFlag, om.MSyntax.kString)
+        syntax.makeFlagMultiUse(MatBuildSelectorSyntax.kInputFlag)
+        syntax.addFlag(MatBuildSelectorSyntax.kOutputFlag, MatBuildSelectorSyntax.kOutputLongFlag, om.MSyntax.kString)
+        syntax.addFlag(MatBuildSelectorSyntax.kWorkersFlag, MatBuildSelectorSyntax.kWorkersLongFlag, om.MSyntax.kLong)
+        syntax.addFlag(MatBuildSelectorSyntax.kForceFlag, MatBuildSelectorSyntax.kForceLongFlag)
+        syntax.addFlag(MatBuildSelectorSyntax.kResolutionFlag, MatBuildSelectorSyntax.kResolutionLongFlag, om.MSyntax.kLong)
+        syntax.addFlag(MatBuildSelectorSyntax.kDedupFlag, MatBuildSelectorSyntax.kDedupLongFlag)
+        syntax.addFlag(MatBuildSelectorSyntax.kDedupLibraryFlag, MatBuildSelectorSyntax.kDedupLibraryLongFlag, om.MSyntax.kString)
+        syntax.addFlag(MatBuildSelectorSyntax.kVerifyLibraryFlag, MatBuildSelectorSyntax.kVerifyLibraryLongFlag, om.MSyntax.kString)
+        syntax.addFlag(MatBuildSelectorSyntax.kTemplateFlag, MatBuildSelectorSyntax.kTemplateLongFlag, om.MSyntax.kString)
+        syntax.addFlag(MatBuildSelectorSyntax.kTexturePrepFlag, MatBuildSelectorSyntax.kTexturePrepLongFlag, om.MSyntax.kString)
+        syntax.addFlag(MatBuildSelectorSyntax.kQualityFlag, MatBuildSelectorSyntax.kQualityLongFlag, om.MSyntax.kString)
+        syntax.addFlag(MatBuildSelectorSyntax.kPackChannelsFlag, MatBuildSelectorSyntax.kPackChannelsLongFlag)
+        syntax.addFlag(MatBuildSelectorSyntax.kValidateLibraryFlag, MatBuildSelectorSyntax.kValidateLibraryLongFlag, om.MSyntax.kString)
+        syntax.addFlag(MatBuildSelectorSyntax.kRepairFlag, MatBuildSelectorSyntax.kRepairLongFlag)
+        return syntax
+
+
+class BuildMaterialSyntax:
+    kPluginCmdName = "buildMaterial"
+
+    kInputFlag = "-i"
+    kInputLongFlag = "-input"
+    kTemplateFlag = "-t"
+    kTemplateLongFlag = "-template"
+
+    @staticmethod
+    def syntaxCreator():
+        syntax = om.MSyntax()
+        syntax.addFlag(BuildMaterialSyntax.kInputFlag, BuildMaterialSyntax.kInputLongFlag, om.MSyntax.kString)
+        syntax.addFlag(BuildMaterialSyntax.kTemplateFlag, BuildMaterialSyntax.kTemplateLongFlag, om.MSyntax.kString)
+        return syntax
+
+
+# (syntax, module, command class): the class is imported the first time the command runs
+COMMANDS = [
+    (MatSelectorSyntax, "matSelector", "MatSelector"),
+    (MatBuildSelectorSyntax, "matBuildSelector", "MatBuildSelector"),
+    (BuildMaterialSyntax, "buildMaterial", "BuildMaterial"),
+]
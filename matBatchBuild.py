@@ -0,0 +1,280 @@
+import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from buildManifest import BuildManifest
+from materialFiles import is_image, copy_material_files, extract_material_zip
+from materialTemplates import DEFAULT_TEMPLATE, get_plan
+from textureValidator import describe, validate_texture_set
+
+DEFAULT_WORKERS = 4
+REPORT_FILE_NAME = "batch_build_report.json"
+
+
+class BatchItem:
+    def __init__(self, name, source, is_zip, output_dir):
+        self.name = name
+        self.source = source
+        self.is_zip = is_zip
+        self.output_dir = output_dir
+        self.status = "pending"  # pending, skipped, built, failed, cancelled
+        self.message = ""
+        self.seconds = 0.0
+        self.texture_set = None  # filled in by prepare_item
+        self.scope = None  # "full", "graph" or "skip" once planned, see build_scope
+        self.issues = []  # validation issues of the texture set, see textureValidator
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "source": self.source,
+            "output_dir": self.output_dir,
+            "status": self.status,
+            "message": self.message,
+            "seconds": round(self.seconds, 3),
+            "scope": self.scope,
+            "issues": self.issues,
+        }
+
+    @staticmethod
+    def from_dict(data):
+        item = BatchItem(data["name"], data["source"], data["source"].lower().endswith(".zip"), data["output_dir"])
+        item.status = data.get("status", "pending")
+        item.message = data.get("message", "")
+        item.seconds = data.get("seconds", 0.0)
+        item.scope = data.get("scope")
+        item.issues = data.get("issues", [])
+        return item
+
+
+def discover_texture_sets(inputs, output_root):
+    """
+    Every ZIP and every folder that directly holds images becomes one texture set,
+    named after the ZIP / folder. A name already taken gets its parent folder's in front,
+    e.g. Bricks_Wood next to Planks_Wood, then a number.
+    """
+    items = {}
+    sources = set()
+
+    def add(name, source, is_zip):
+        if os.path.normcase(os.path.abspath(source)) in sources:
+            return  # The same input given twice
+        sources.add(os.path.normcase(os.path.abspath(source)))
+        if name in items:
+            parent = os.path.basename(os.path.dirname(os.path.normpath(source)))
+            unique = f"{parent}_{name}" if parent else name
+            count = 2
+            while unique in items:
+                unique = f"{parent}_{name}_{count}" if parent else f"{name}_{count}"
+                count += 1
+            name = unique
+        items[name] = BatchItem(name, source, is_zip, os.path.join(output_root, name))
+
+    for inp in inputs:
+        if os.path.isfile(inp):
+            if inp.lower().endswith(".zip"):
+                add(os.path.splitext(os.path.basename(inp))[0], inp, True)
+            continue
+
+        for root, dirs, files in os.walk(inp):
+            dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+            if os.path.normpath(root) == os.path.normpath(output_root):
+                dirs[:] = []
+                continue
+            if any(is_image(file) for file in files):
+                add(os.path.basename(os.path.normpath(root)), root, False)
+            for file in sorted(files):
+                if file.lower().endswith(".zip"):
+                    add(os.path.splitext(file)[0], os.path.join(root, file), True)
+
+    return list(items.values())
+
+
+def newest_source_mtime(item):
+    if item.is_zip:
+        return os.stat(item.source).st_mtime
+    mtimes = [
+        os.stat(os.path.join(item.source, file)).st_mtime
+        for file in os.listdir(item.source)
+        if is_image(file)
+    ]
+    return max(mtimes) if mtimes else 0.0
+
+
+def is_up_to_date(item, export_suffix=""):
+    ma_path = os.path.join(item.output_dir, item.name + export_suffix + ".ma")
+    try:
+        return os.stat(ma_path).st_mtime >= newest_source_mtime(item)
+    except OSError:
+        return False
+
+
+def build_scope(item, plan, resolution=None, force=False, prep=None):
+    """ "full" (copy textures and build), "graph" (only rebuild the .ma) or "skip" """
+    if force:
+        return "full"
+    manifest = BuildManifest(item.output_dir)
+    if not manifest.load():
+        # Built before build manifests existed, fall back to comparing mtimes
+        return "skip" if is_up_to_date(item, plan.export_suffix) else "full"
+    return manifest.scope(item.source, item.is_zip, resolution, plan, prep) or "skip"
+
+
+def record_build(item, plan, resolution=None, prep=None):
+    manifest = BuildManifest(item.output_dir)
+    if item.scope == "graph":
+        manifest.load()
+    else:
+        manifest.record_inputs(item.source, item.is_zip, resolution, item.texture_set, prep)
+    export_path = os.path.join(item.output_dir, plan.export_name(item.name))
+    if os.path.exists(export_path):
+        manifest.record_build(plan, export_path)
+    manifest.save()
+
+
+def validation_error(issues):
+    return "; ".join(describe(found) for found in issues if found["severity"] == "error")
+
+
+def prepare_item(item, policy=None, store=None, prep=None, plan=None):
+    """ File stage of a build, safe to run off the main thread. Validates the set (header reads only) before prep. """
+    start = time.time()
+    manifest = BuildManifest(item.output_dir)
+    if item.scope == "graph" and manifest.load():
+        # Textures are unchanged, the manifest already knows how they were classified
+        item.texture_set = manifest.texture_set()
+    elif item.is_zip:
+        item.texture_set = extract_material_zip(item.source, item.output_dir, policy=policy, store=store)
+    else:
+        item.texture_set = copy_material_files(item.source, item.output_dir, policy=policy, store=store)
+    item.issues = validate_texture_set(item.texture_set, plan)
+    if prep is not None and item.scope != "graph" and not validation_error(item.issues):
+        prep.run(item.texture_set)
+    item.seconds = time.time() - start
+    return item
+
+
+class BatchBuilder:
+    """
+    Builds many texture sets into one library root.
+    Extraction, copying and renaming run on a thread pool. build_fn (graph creation and .ma export,
+    which must stay on Maya's main thread) is called from the thread that calls run(), one item at
+    a time, as soon as that item's files are ready.
+    """
+    def __init__(self, inputs, output_root, build_fn, workers=DEFAULT_WORKERS, force=False, on_progress=None,
+                 report_path=None, policy=None, store=None, template=DEFAULT_TEMPLATE, prep=None):
+        self.inputs = list(inputs)
+        self.output_root = output_root
+        self.report_path = report_path or os.path.join(output_root, REPORT_FILE_NAME)
+        self.build_fn = build_fn
+        self.workers = workers
+        self.force = force
+        self.on_progress = on_progress
+        self.policy = policy  # TexturePolicy used to pick between duplicate maps
+        self.store = store  # optional TextureStore textures are deduplicated through
+        self.plan = get_plan(template)  # compiled material template, also decides what is up to date
+        self.resolution = policy.resolution if policy is not None else None
+        self.prep = prep  # optional TexturePrep run on each set's textures before the build
+        self.prep_signature = prep.signature() if prep is not None else None
+
+        self.items = []
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def progress(self, done, item):
+        if self.on_progress is not None and self.on_progress(done, len(self.items), item) is False:
+            self.cancel()
+
+    def run(self, items=None):
+        """ Builds items, or every texture set discovered under the inputs """
+        start = time.time()
+        if not os.path.exists(self.output_root):
+            os.makedirs(self.output_root)
+
+        self.items = items if items is not None else discover_texture_sets(self.inputs, self.output_root)
+        done = 0
+
+        pending = []
+        for item in self.items:
+            if item.scope is None:
+                item.scope = build_scope(item, self.plan, self.resolution, self.force, self.prep_signature)
+            if item.scope == "skip":
+                item.status = "skipped"
+                item.message = "Up to date"
+                done += 1
+                self.progress(done, item)
+            else:
+                pending.append(item)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(prepare_item, item, self.policy, self.store, self.prep, self.plan): item for item in pending}
+            for future in as_completed(futures):
+                item = futures[future]
+                if self.cancelled:
+                    for f in futures:
+                        f.cancel()
+                    break
+
+                build_start = time.time()
+                try:
+                    future.result()
+                    # Missing/corrupt maps would only fail later inside Maya, and more slowly
+                    error = validation_error(item.issues) or self.build_fn(item)
+                except Exception as e:
+                    error = str(e)
+
+                if not error:
+                    record_build(item, self.plan, self.resolution, self.prep_signature)
+                item.status = "failed" if error else "built"
+                item.message = error or ""
+                item.seconds += time.time() - build_start
+                done += 1
+                self.progress(done, item)
+
+        for item in self.items:
+            if item.status == "pending":
+                item.status = "cancelled"
+        if self.store is not None:
+            self.store.save_hash_cache()
+
+        return self.write_report(time.time() - start)
+
+    def write_report(self, seconds):
+        return write_report(self.report_path, self.output_root, self.items, seconds)
+
+
+def summarize(items):
+    counts = {}
+    for item in items:
+        counts[item.status] = counts.get(item.status, 0) + 1
+    return counts
+
+
+def write_report(report_path, output_root, items, seconds):
+    report = {
+        "output_root": output_root,
+        "seconds": round(seconds, 3),
+        "summary": summarize(items),
+        "items": [item.to_dict() for item in items],
+    }
+    try:
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2)
+    except OSError:
+        pass
+    return report
+
+
+def format_summary(report):
+    summary = report["summary"]
+    lines = [f"{summary.get(status, 0)} {status}" for status in ("built", "skipped", "failed", "cancelled") if summary.get(status)]
+    text = ", ".join(lines) or "Nothing to build"
+    failed = [item for item in report["items"] if item["status"] == "failed"]
+    for item in failed[:10]:
+        text += f"\n{item['name']}: {item['message']}"
+    if len(failed) > 10:
+        text += f"\n... and {len(failed) - 10} more, see {REPORT_FILE_NAME}"
+    return text
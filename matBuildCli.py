@@ -0,0 +1,276 @@
+"""
+Headless material builder.
+
+    mayapy matBuildCli.py --output D:/library --manifest packs.txt --workers 8
+    mayapy matBuildCli.py --output D:/library --input pack_a.zip --input D:/vendor/pack_b
+
+The parent process only discovers texture sets and works out what is out of date, so it can also
+run under a plain python when --mayapy points at the interpreter for the workers. Each worker is
+its own mayapy process running maya.standalone, building and exporting its share of the sets.
+A manifest is either a text file with one folder/ZIP per line or a JSON list of them
+(or {"inputs": [...], "output": "..."}).
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import subprocess
+
+from matBatchBuild import (
+    BatchBuilder, BatchItem, DEFAULT_WORKERS, REPORT_FILE_NAME,
+    build_scope, discover_texture_sets, write_report, format_summary,
+)
+from progressSink import LogProgressSink
+from textureClassifier import IMAGE_EXTENSIONS, TexturePolicy
+from textureStore import TextureStore
+from materialTemplates import DEFAULT_TEMPLATE, get_plan
+from texturePrep import PREP_MODES, QUALITY_TIERS, TexturePrep
+from previewRender import RENDERERS, PreviewGenerator, summarize as summarize_previews
+from textureValidator import REPORT_FILE_NAME as VALIDATION_REPORT_FILE_NAME, describe, validate_library
+from perfTrace import TRACER
+
+logger = logging.getLogger("matBuildCli")
+
+
+def read_manifest(path):
+    with open(path, "r") as f:
+        text = f.read()
+
+    if path.lower().endswith(".json"):
+        data = json.loads(text)
+        if isinstance(data, dict):
+            return data.get("inputs", []), data.get("output")
+        return data, None
+
+    inputs = [line.strip() for line in text.splitlines()]
+    return [line for line in inputs if line and not line.startswith("#")], None
+
+
+def split_items(items, count):
+    chunks = [items[i::count] for i in range(count)]
+    return [chunk for chunk in chunks if chunk]
+
+
+def build_in_maya(items, output_root, report_path, worker_id, io_threads, resolution=None, dedup=False,
+                  template=DEFAULT_TEMPLATE, prep=None):
+    """ Worker side: runs inside mayapy """
+    import maya.standalone
+    maya.standalone.initialize(name="python")
+    try:
+        import maya.cmds as cmds
+        # Now maya.cmds exists its calls can be counted too
+        TRACER.configure_from_env()
+        try:
+            cmds.loadPlugin("mtoa", quiet=True)
+        except RuntimeError:
+            logger.warning("mtoa could not be loaded, Arnold shading nodes will fail to build")
+
+        from buildMaterial import BuildMaterial
+        sink = LogProgressSink(logger, prefix=f"[worker {worker_id}] ")
+
+        def build_fn(item):
+            cmds.file(new=True, force=True)
+            builder = BuildMaterial(item.output_dir, sink, item.texture_set, template)
+            builder.discard()
+            return builder.error
+
+        def on_progress(done, total, item):
+            sink.status(f"{done}/{total} {item.name}: {item.status} {item.message}".rstrip())
+
+        builder = BatchBuilder(
+            [], output_root, build_fn,
+            workers=io_threads, force=True, on_progress=on_progress, report_path=report_path,
+            policy=TexturePolicy(resolution=resolution),
+            store=TextureStore(output_root) if dedup else None,
+            template=template,
+            prep=prep,
+        )
+        return builder.run(items)
+    finally:
+        maya.standalone.uninitialize()
+
+
+def run_worker(args):
+    with open(args.worker, "r") as f:
+        chunk = json.load(f)
+    items = [BatchItem.from_dict(data) for data in chunk["items"]]
+    prep = None
+    if chunk.get("texture_prep", "none") != "none" or chunk.get("pack_channels"):
+        try:
+            prep = TexturePrep(chunk["texture_prep"], chunk.get("quality", "full"), workers=args.io_threads,
+                               pack=chunk.get("pack_channels", False))
+        except (ValueError, RuntimeError) as e:
+            # e.g. Pillow installed for python but not for mayapy
+            logger.error(f"Worker {args.worker_id}: {e}")
+            return 2
+    build_in_maya(items, chunk["output"], args.report, args.worker_id, args.io_threads,
+                  chunk.get("resolution"), chunk.get("dedup", False), chunk.get("template", DEFAULT_TEMPLATE), prep)
+    return 0
+
+
+def run_store_command(args):
+    if args.dedup_library:
+        stats = TextureStore(args.dedup_library).dedup(IMAGE_EXTENSIONS)
+        logger.info(f"Deduplicated {stats['deduplicated']} of {stats['files']} textures, "
+                    f"{stats['bytes_reclaimed'] / (1024 * 1024):.1f} MB reclaimed")
+        return 0
+
+    report = TextureStore(args.verify_library).verify(IMAGE_EXTENSIONS, remove_orphans=args.remove_orphans)
+    for path in report["corrupt"]:
+        logger.error(f"Corrupt texture blob '{path}'")
+    logger.info(f"{report['blobs']} blobs, {len(report['corrupt'])} corrupt, {len(report['orphans'])} unused")
+    return 1 if report["corrupt"] else 0
+
+
+def run_validate_command(args):
+    try:
+        plan = get_plan(args.template)
+    except (KeyError, ValueError, OSError) as e:
+        logger.error(str(e))
+        return 2
+    report = validate_library(args.validate_library, plan, repair=args.repair, workers=args.io_threads * 4)
+    summary = report["summary"]
+    for result in report["sets"]:
+        for found in result["issues"]:
+            if found["severity"] == "error":
+                logger.error(f"{result['name']}: {describe(found)}")
+    logger.info(f"{summary['sets']} texture sets validated in {report['seconds']}s: {summary['errors']} errors, "
+                f"{summary['warnings']} warnings, {summary['repaired']} repaired, see {VALIDATION_REPORT_FILE_NAME}")
+    return 1 if summary["errors"] else 0
+
+
+def run_parent(args):
+    inputs = list(args.input or [])
+    output = args.output
+    if args.manifest:
+        manifest_inputs, manifest_output = read_manifest(args.manifest)
+        inputs.extend(manifest_inputs)
+        output = output or manifest_output
+    if not inputs or not output:
+        logger.error("Nothing to do: give --input/--manifest and --output")
+        return 2
+
+    try:
+        plan = get_plan(args.template)
+        prep = None
+        if args.texture_prep != "none" or args.pack_channels:
+            prep = TexturePrep(args.texture_prep, args.quality, pack=args.pack_channels)
+    except (KeyError, ValueError, OSError, RuntimeError) as e:
+        logger.error(str(e))
+        return 2
+    prep_signature = prep.signature() if prep is not None else None
+
+    start = time.time()
+    os.makedirs(output, exist_ok=True)
+    items = discover_texture_sets(inputs, output)
+    todo = []
+    for item in items:
+        # Workers take the scope from the chunk instead of checking again
+        item.scope = build_scope(item, plan, args.resolution, args.force, prep_signature)
+        if item.scope == "skip":
+            item.status = "skipped"
+            item.message = "Up to date"
+        else:
+            todo.append(item)
+    logger.info(f"{len(items)} texture sets, {len(todo)} to build on {args.workers} workers")
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="matBuildCli_") as tmp_dir:
+        procs = []
+        for worker_id, chunk in enumerate(split_items(todo, max(1, args.workers))):
+            chunk_path = os.path.join(tmp_dir, f"chunk_{worker_id}.json")
+            report_path = os.path.join(tmp_dir, f"report_{worker_id}.json")
+            with open(chunk_path, "w") as f:
+                json.dump({
+                    "output": output,
+                    "resolution": args.resolution,
+                    "dedup": args.dedup,
+                    "template": args.template,
+                    # auto is resolved here so every worker makes the same choice
+                    "texture_prep": prep.mode if prep is not None else "none",
+                    "quality": args.quality,
+                    "pack_channels": prep is not None and prep.pack,
+                    "items": [item.to_dict() for item in chunk],
+                }, f)
+
+            cmd = [
+                args.mayapy, os.path.abspath(__file__),
+                "--worker", chunk_path, "--report", report_path,
+                "--worker-id", str(worker_id), "--io-threads", str(args.io_threads),
+            ]
+            procs.append((subprocess.Popen(cmd), chunk, report_path))
+
+        for proc, chunk, report_path in procs:
+            code = proc.wait()
+            try:
+                with open(report_path, "r") as f:
+                    for data in json.load(f)["items"]:
+                        results[data["name"]] = BatchItem.from_dict(data)
+            except (OSError, ValueError, KeyError):
+                pass
+            for item in chunk:
+                if item.name not in results:
+                    item.status = "failed"
+                    item.message = f"Worker exited with code {code}"
+
+    items = [results.get(item.name, item) for item in items]
+    report = write_report(os.path.join(output, REPORT_FILE_NAME), output, items, time.time() - start)
+    logger.info(format_summary(report))
+    if args.previews:
+        try:
+            jobs = PreviewGenerator(output, args.previews, args.workers, mayapy=args.mayapy).run()
+            logger.info(f"Previews: {summarize_previews(jobs)}")
+        except (ValueError, RuntimeError) as e:
+            logger.error(str(e))
+    return 1 if report["summary"].get("failed") else 0
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Build Maya materials from texture folders and ZIPs without the UI.")
+    parser.add_argument("--input", "-i", action="append", help="Texture folder, tree of folders or ZIP. Repeatable.")
+    parser.add_argument("--manifest", "-m", help="Text or JSON file listing inputs")
+    parser.add_argument("--output", "-o", help="Library root the materials are built into")
+    parser.add_argument("--workers", "-w", type=int, default=os.cpu_count() or 1, help="Number of mayapy processes")
+    parser.add_argument("--io-threads", type=int, default=DEFAULT_WORKERS, help="File copy/extract threads per worker")
+    parser.add_argument("--resolution", "-r", type=int, help="Preferred map resolution in K when a set ships several")
+    parser.add_argument("--template", "-t", default=DEFAULT_TEMPLATE, help="Material template, e.g. arnold, arnoldMetalRough, usdPreviewSurface")
+    parser.add_argument("--texture-prep", choices=PREP_MODES, default="none",
+                        help="Make mipmapped .tx files (maketx) or downscaled variants of the textures")
+    parser.add_argument("--quality", choices=list(QUALITY_TIERS), default="full", help="Texture quality tier for --texture-prep")
+    parser.add_argument("--pack-channels", action="store_true",
+                        help="Merge the AO, roughness and metalness maps into one RGB texture")
+    parser.add_argument("--dedup", action="store_true", help="Link textures from the library's content-addressed store")
+    parser.add_argument("--dedup-library", metavar="ROOT", help="Deduplicate every texture in an existing library and exit")
+    parser.add_argument("--verify-library", metavar="ROOT", help="Re-hash the library's texture store and exit")
+    parser.add_argument("--remove-orphans", action="store_true", help="With --verify-library, delete unused blobs")
+    parser.add_argument("--validate-library", metavar="ROOT",
+                        help="Check every texture set of a library (missing/corrupt maps, sizes, bit depth) and exit")
+    parser.add_argument("--repair", action="store_true", help="With --validate-library, flip the green channel of DirectX-only normal maps")
+    parser.add_argument("--previews", choices=RENDERERS,
+                        help="Afterwards render (arnold) or composite the missing material previews, auto picks")
+    parser.add_argument("--force", "-f", action="store_true", help="Rebuild materials that are up to date")
+    parser.add_argument("--mayapy", default=sys.executable, help="Interpreter used for the workers")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--worker-id", default="0", help=argparse.SUPPRESS)
+    parser.add_argument("--report", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    TRACER.configure_from_env()
+    if args.worker:
+        return run_worker(args)
+    if args.dedup_library or args.verify_library:
+        return run_store_command(args)
+    if args.validate_library:
+        return run_validate_command(args)
+    return run_parent(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,19 @@
 import os
-import shutil
-import zipfile
 import maya.cmds as cmds
 import maya.api.OpenMaya as om
 
+from commandSyntax import MatBuildSelectorSyntax
 from buildMaterial import BuildMaterial
+from materialTemplates import DEFAULT_TEMPLATE, available_templates, get_plan
+from buildManifest import BuildManifest
+from matBatchBuild import BatchBuilder, BatchItem, DEFAULT_WORKERS, build_scope, format_summary, record_build
+from materialFiles import copy_material_files, extract_material_zip
+from textureClassifier import IMAGE_EXTENSIONS, TexturePolicy
+from textureStore import TextureStore
+from texturePrep import PREP_MODES, QUALITY_TIERS, TexturePrep
+from textureValidator import describe, format_issues, repair_texture_set, validate_library, validate_texture_set
 
-class MatBuildSelector(om.MPxCommand):
-    kPluginCmdName = "matBuildSelector"
+class MatBuildSelector(MatBuildSelectorSyntax, om.MPxCommand):
     def __init__(self):
         om.MPxCommand.__init__(self)
         self.window = None
@@ -16,20 +22,97 @@ class MatBuildSelector(om.MPxCommand):
         self.lbl_zip = None
         self.lbl_output_path = None
         self.lbl_status_update = None
+        self.chk_force = None
+        self.chk_dedup = None
+        self.opt_template = None
+        self.opt_prep = None
+        self.opt_quality = None
+        self.chk_pack = None
 
         self.input_path = ""
         self.zip_input_path = ""
         self.output_path = ""
         self.is_zip = False
-
-        self.build_material_window()
+        self.policy = None
+        self.dedup = False
+        self.template = DEFAULT_TEMPLATE
+        self.prep_mode = "none"
+        self.quality = "full"
+        self.pack_channels = False
 
     @staticmethod
     def cmdCreator():
         return MatBuildSelector()
 
+    def doIt(self, args):
+        arg_data = om.MArgParser(self.syntax(), args)
+
+        if arg_data.isFlagSet(self.kDedupLibraryFlag):
+            stats = TextureStore(arg_data.flagArgumentString(self.kDedupLibraryFlag, 0)).dedup(IMAGE_EXTENSIONS)
+            om.MGlobal.displayInfo(f"Deduplicated {stats['deduplicated']} of {stats['files']} textures, "
+                                   f"{stats['bytes_reclaimed'] / (1024 * 1024):.1f} MB reclaimed")
+            self.setResult(stats["bytes_reclaimed"])
+            return
+        if arg_data.isFlagSet(self.kVerifyLibraryFlag):
+            report = TextureStore(arg_data.flagArgumentString(self.kVerifyLibraryFlag, 0)).verify(IMAGE_EXTENSIONS)
+            for path in report["corrupt"]:
+                om.MGlobal.displayWarning(f"Corrupt texture blob '{path}'")
+            om.MGlobal.displayInfo(f"{report['blobs']} blobs, {len(report['corrupt'])} corrupt, {len(report['orphans'])} unused")
+            self.setResult(report["corrupt"])
+            return
+        if arg_data.isFlagSet(self.kValidateLibraryFlag):
+            template = arg_data.flagArgumentString(self.kTemplateFlag, 0) if arg_data.isFlagSet(self.kTemplateFlag) else self.template
+            try:
+                plan = get_plan(template)
+            except (KeyError, ValueError, OSError) as e:
+                om.MGlobal.displayError(f"Material template '{template}' unusable: {e}")
+                return
+            report = validate_library(arg_data.flagArgumentString(self.kValidateLibraryFlag, 0), plan,
+                                      repair=arg_data.isFlagSet(self.kRepairFlag))
+            for result in report["sets"]:
+                for found in result["issues"]:
+                    om.MGlobal.displayWarning(f"{result['name']}: {describe(found)}")
+            summary = report["summary"]
+            om.MGlobal.displayInfo(f"{summary['sets']} texture sets, {summary['errors']} errors, "
+                                   f"{summary['warnings']} warnings, {summary['repaired']} repaired")
+            self.setResult(summary["errors"])
+            return
+
+        if not arg_data.isFlagSet(self.kInputFlag):
+            self.run()
+            return
+
+        # Batch mode: matBuildSelector -input <dir|zip> [-input ...] -output <library root>
+        inputs = [
+            arg_data.getFlagArgumentList(self.kInputFlag, i).asString(0)
+            for i in range(arg_data.numberOfFlagUses(self.kInputFlag))
+        ]
+        if not arg_data.isFlagSet(self.kOutputFlag):
+            raise RuntimeError("matBuildSelector: -output is required with -input")
+        output = arg_data.flagArgumentString(self.kOutputFlag, 0)
+        workers = DEFAULT_WORKERS
+        if arg_data.isFlagSet(self.kWorkersFlag):
+            workers = max(1, arg_data.flagArgumentInt(self.kWorkersFlag, 0))
+        if arg_data.isFlagSet(self.kResolutionFlag):
+            # Preferred resolution in K when a pack ships several
+            self.policy = TexturePolicy(resolution=arg_data.flagArgumentInt(self.kResolutionFlag, 0))
+        self.dedup = arg_data.isFlagSet(self.kDedupFlag)
+        if arg_data.isFlagSet(self.kTemplateFlag):
+            self.template = arg_data.flagArgumentString(self.kTemplateFlag, 0)
+        if arg_data.isFlagSet(self.kTexturePrepFlag):
+            self.prep_mode = arg_data.flagArgumentString(self.kTexturePrepFlag, 0)
+        if arg_data.isFlagSet(self.kQualityFlag):
+            self.quality = arg_data.flagArgumentString(self.kQualityFlag, 0)
+        self.pack_channels = arg_data.isFlagSet(self.kPackChannelsFlag)
+
+        report = self.batch_build(inputs, output, workers, arg_data.isFlagSet(self.kForceFlag))
+        if report is None:
+            return
+        om.MGlobal.displayInfo(format_summary(report))
+        self.setResult([f"{status}:{count}" for status, count in report["summary"].items()])
+
     def run(self):
-        pass
+        self.build_material_window()
 
     def update_path_lbls(self):
         if self.is_zip:
@@ -77,6 +160,26 @@ class MatBuildSelector(om.MPxCommand):
             self.output_path = selected[0]
             cmds.text(self.lbl_output_path, edit=True, label=self.output_path)
 
+    def selected_template(self):
+        if self.opt_template and cmds.optionMenu(self.opt_template, exists=True):
+            self.template = cmds.optionMenu(self.opt_template, query=True, value=True)
+        return self.template
+
+    def texture_prep(self):
+        """ TexturePrep for the chosen mode and quality tier, None if textures are used as they are """
+        if self.opt_prep and cmds.optionMenu(self.opt_prep, exists=True):
+            self.prep_mode = cmds.optionMenu(self.opt_prep, query=True, value=True)
+            self.quality = cmds.optionMenu(self.opt_quality, query=True, value=True)
+            self.pack_channels = cmds.checkBox(self.chk_pack, query=True, value=True)
+        if self.prep_mode == "none" and not self.pack_channels:
+            return None
+        return TexturePrep(self.prep_mode, self.quality, pack=self.pack_channels)
+
+    def texture_store(self, library_root):
+        if self.chk_dedup and cmds.checkBox(self.chk_dedup, exists=True):
+            self.dedup = cmds.checkBox(self.chk_dedup, query=True, value=True)
+        return TextureStore(library_root) if self.dedup else None
+
     def unzip(self, inp, output):
         if output == "":
             cmds.inViewMessage(amg=f"Please select the output path", pos='midCenter', fade=True)
@@ -88,35 +191,11 @@ class MatBuildSelector(om.MPxCommand):
             os.mkdir(output)
 
         cmds.text(self.lbl_status_update, edit=True, label="Unzipping")
-        with zipfile.ZipFile(inp, 'r') as zip_ref:
-            zip_ref.extractall(output)
-            self.rename_inside_dir(output)
-
-    def rename_inside_dir(self, path):
-        name = os.path.basename(path)
-
-        for file in os.listdir(path):
-            ext = os.path.splitext(file)[1]
-            if os.path.splitext(file)[0] == ".mayaSwatches":
-                continue
-            file_path = os.path.join(path, file)
-
-            if "displacement" in file.lower():
-                new_file_path = os.path.join(path, f"{name}_displacement{ext}")
-            elif "roughness" in file.lower():
-                new_file_path = os.path.join(path, f"{name}_roughness{ext}")
-            elif "normalgl" in file.lower():
-                new_file_path = os.path.join(path, f"{name}_normalgl{ext}")
-            elif "normald" in file.lower():
-                new_file_path = os.path.join(path, f"{name}_normald{ext}")
-            elif "color" in file.lower():
-                new_file_path = os.path.join(path, f"{name}_color{ext}")
-            elif "ambientocclusion" in file.lower() or "_ao" in file.lower():
-                new_file_path = os.path.join(path, f"{name}_ambientocclusion{ext}")
-            else:
-                new_file_path = os.path.join(path, f"{name}{ext}")
-            if file_path != new_file_path:
-                shutil.move(file_path, new_file_path)
+        store = self.texture_store(os.path.dirname(os.path.normpath(output)))
+        texture_set = extract_material_zip(inp, output, policy=self.policy, workers=4, store=store)
+        if store is not None:
+            store.save_hash_cache()
+        return texture_set
 
     def build_material(self, *args):
         if self.output_path == "" or not os.path.exists(self.output_path):
@@ -126,30 +205,137 @@ class MatBuildSelector(om.MPxCommand):
             cmds.inViewMessage(amg=f"Input path '{self.input_path}' missing or invalid", pos='midCenter', fade=True)
             return
 
+        source = self.zip_input_path if self.is_zip else self.input_path
+        item = BatchItem(os.path.basename(os.path.normpath(self.output_path)), source, self.is_zip, self.output_path)
+        template = self.selected_template()
+        try:
+            plan = get_plan(template)
+        except (KeyError, ValueError, OSError) as e:
+            om.MGlobal.displayError(f"Material template '{template}' unusable: {e}")
+            cmds.text(self.lbl_status_update, edit=True, label="Build not started")
+            return
+        resolution = self.policy.resolution if self.policy is not None else None
+        try:
+            prep = self.texture_prep()
+        except (ValueError, RuntimeError) as e:
+            cmds.inViewMessage(amg=str(e), pos='midCenter', fade=True)
+            return
+        prep_signature = prep.signature() if prep is not None else None
+        in_place = os.path.normcase(os.path.abspath(source)) == os.path.normcase(os.path.abspath(self.output_path))
+        if in_place:
+            # Files are renamed in place, there is no separate source to compare against
+            item.scope = "full"
+        else:
+            force = cmds.checkBox(self.chk_force, query=True, value=True)
+            item.scope = build_scope(item, plan, resolution, force, prep_signature)
+        if item.scope == "skip":
+            cmds.text(self.lbl_status_update, edit=True, label="Up to date, nothing to build")
+            return
+
         cmds.text(self.lbl_status_update, edit=True, label="Started build")
 
-        if self.is_zip:
-            self.unzip(self.zip_input_path, self.output_path)
+        manifest = BuildManifest(self.output_path)
+        if item.scope == "graph" and manifest.load():
+            texture_set = manifest.texture_set()
+        elif self.is_zip:
+            texture_set = self.unzip(self.zip_input_path, self.output_path)
+            if texture_set is None:
+                return
         else:
-            if not os.path.exists(self.output_path):
-                os.mkdir(self.output_path)
+            store = self.texture_store(os.path.dirname(os.path.normpath(self.output_path)))
+            texture_set = copy_material_files(self.input_path, self.output_path, policy=self.policy, store=store)
+            if store is not None:
+                store.save_hash_cache()
+        if not self.validate(texture_set, plan):
+            cmds.text(self.lbl_status_update, edit=True, label="Build aborted, see the validation report")
+            return
+        if prep is not None and item.scope != "graph":
+            cmds.text(self.lbl_status_update, edit=True, label="Preparing textures")
+            prep.run(texture_set)
+
+        builder = BuildMaterial(self.output_path, self.lbl_status_update, texture_set, plan.name)
+        if builder.error is None and not in_place:
+            item.texture_set = texture_set
+            record_build(item, plan, resolution, prep_signature)
+
+    def validate(self, texture_set, plan):
+        """ Checks the textures before building, errors are listed in a dialog that offers the repairs it can do """
+        issues = validate_texture_set(texture_set, plan)
+        errors = [found for found in issues if found["severity"] == "error"]
+        for found in issues:
+            if found["severity"] == "warning":
+                om.MGlobal.displayWarning(describe(found))
+        if not errors:
+            return True
+
+        buttons = ["Repair", "Cancel"] if any(found["repairable"] for found in issues) else ["OK"]
+        answer = cmds.confirmDialog(title="Texture Validation", message=format_issues(errors), button=buttons,
+                                    defaultButton=buttons[0], cancelButton=buttons[-1])
+        if answer != "Repair":
+            return False
+        repair_texture_set(texture_set, issues)
+        errors = [found for found in validate_texture_set(texture_set, plan) if found["severity"] == "error"]
+        if errors:
+            cmds.confirmDialog(title="Texture Validation", message=format_issues(errors), button=["OK"])
+            return False
+        return True
+
+    def batch_build(self, inputs, output, workers=DEFAULT_WORKERS, force=False, on_progress=None):
+        """ The BatchBuilder report, None if the template or the texture prep options cannot be used """
+        def build_fn(item):
+            builder = BuildMaterial(item.output_dir, texture_set=item.texture_set, template=template)
+            # Keep the scene light over hundreds of builds, the .ma is already exported
+            builder.discard()
+            return builder.error
+
+        template = self.selected_template()
+        try:
+            prep = self.texture_prep()
+        except (ValueError, RuntimeError) as e:
+            om.MGlobal.displayError(str(e))
+            return None
+        try:
+            builder = BatchBuilder(
+                inputs, output, build_fn, workers=workers, force=force, on_progress=on_progress,
+                policy=self.policy, store=self.texture_store(output), template=template, prep=prep,
+            )
+        except (KeyError, ValueError, OSError) as e:
+            om.MGlobal.displayError(f"Material template '{template}' unusable: {e}")
+            return None
+        return builder.run()
+
+    def batch_build_material(self, *args):
+        if self.output_path == "" or not os.path.exists(self.output_path):
+            cmds.inViewMessage(amg=f"Output path '{self.output_path}' missing or invalid", pos='midCenter', fade=True)
+            return
+        if self.input_path == "" or not os.path.exists(self.input_path):
+            cmds.inViewMessage(amg=f"Input path '{self.input_path}' missing or invalid", pos='midCenter', fade=True)
+            return
+
+        def on_progress(done, total, item):
+            if done == 1:
+                cmds.progressWindow(title="Batch Build", progress=0, maxValue=max(total, 1), status="", isInterruptable=True)
+            cmds.progressWindow(edit=True, progress=done, maxValue=max(total, 1), status=f"{done}/{total} {item.name}: {item.status}")
+            return not cmds.progressWindow(query=True, isCancelled=True)
 
-            for file in os.listdir(self.input_path):
-                if os.path.splitext(file)[0] == ".mayaSwatches":
-                    continue
-                file_path = os.path.join(self.input_path, file)
-                new_file_path = os.path.join(self.output_path, file)
-                if file_path != new_file_path:
-                    shutil.copy(file_path, new_file_path)
-            self.rename_inside_dir(self.output_path)
+        force = cmds.checkBox(self.chk_force, query=True, value=True)
+        cmds.text(self.lbl_status_update, edit=True, label="Started batch build")
+        try:
+            report = self.batch_build([self.input_path], self.output_path, force=force, on_progress=on_progress)
+        finally:
+            cmds.progressWindow(endProgress=True)
+        if report is None:
+            cmds.text(self.lbl_status_update, edit=True, label="Batch build not started")
+            return
 
-        BuildMaterial(self.output_path, self.lbl_status_update)
+        cmds.text(self.lbl_status_update, edit=True, label="Batch build complete")
+        cmds.confirmDialog(title="Batch Build", message=format_summary(report), button=["OK"])
 
     def build_material_window(self):
         if cmds.window("buildMaterialWindow", exists=True):
             cmds.deleteUI("buildMaterialWindow", window=True)
 
-        width, height = 600, 300
+        width, height = 600, 450
         self.window = cmds.window("buildMaterialWindow", title="Build Material", widthHeight=(width, height), sizeable=False)
         self.lyt_grid = cmds.gridLayout(numberOfColumns=2, cellWidthHeight=(width/2, 50), parent=self.window)
 
@@ -165,4 +351,25 @@ class MatBuildSelector(om.MPxCommand):
         cmds.button(label="Build", command=self.build_material, parent=self.lyt_grid)
         self.lbl_status_update = cmds.text(label="", parent=self.lyt_grid)
 
+        cmds.button(label="Batch Build (every set in folder / ZIP)", command=self.batch_build_material, parent=self.lyt_grid)
+        self.chk_force = cmds.checkBox(label="Rebuild up-to-date materials", value=False, parent=self.lyt_grid)
+
+        self.chk_dedup = cmds.checkBox(label="Deduplicate textures across the library", value=False, parent=self.lyt_grid)
+        self.opt_template = cmds.optionMenu(label="Template", parent=self.lyt_grid)
+        for template in available_templates():
+            cmds.menuItem(label=template, parent=self.opt_template)
+        if self.template in available_templates():
+            cmds.optionMenu(self.opt_template, edit=True, value=self.template)
+
+        self.opt_prep = cmds.optionMenu(label="Texture prep", parent=self.lyt_grid)
+        for mode in PREP_MODES:
+            cmds.menuItem(label=mode, parent=self.opt_prep)
+        cmds.optionMenu(self.opt_prep, edit=True, value=self.prep_mode)
+        self.opt_quality = cmds.optionMenu(label="Quality", parent=self.lyt_grid)
+        for tier in QUALITY_TIERS:
+            cmds.menuItem(label=tier, parent=self.opt_quality)
+        cmds.optionMenu(self.opt_quality, edit=True, value=self.quality)
+
+        self.chk_pack = cmds.checkBox(label="Pack AO/roughness/metalness into one texture", value=self.pack_channels, parent=self.lyt_grid)
+
         cmds.showWindow(self.window)
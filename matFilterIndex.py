@@ -0,0 +1,161 @@
+import re
+import operator
+
+# Query key -> metadata field, see materialMetadata
+FACETS = {
+    "category": "category",
+    "tag": "tags",
+    "res": "resolution",
+    "has": "maps",
+    "vendor": "vendor",
+    "template": "templates",
+    "added": "date_added",
+}
+FACET_ALIASES = {"cat": "category", "tags": "tag", "resolution": "res", "map": "has", "maps": "has",
+                 "templates": "template", "date": "added"}
+# Facets a bare word is looked up in, on top of the material names
+BARE_FACETS = ("category", "tag", "res", "vendor")
+OPERATORS = {"and", "or", "not"}
+COMPARISONS = {">=": operator.ge, "<=": operator.le, ">": operator.gt, "<": operator.lt}
+TERM = re.compile(r"^(-?)(?:(\w+)(:|>=|<=|>|<))?(.+)$")
+RESOLUTION = re.compile(r"^(\d+)(k|px)$")
+
+
+def facet_values(meta, field):
+    value = meta.get(field)
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return [str(v).lower() for v in value]
+    return [str(value).lower()]
+
+
+def order_key(facet, value):
+    """ Comparison key: resolutions by pixels, anything else (dates) as text """
+    if facet == "res":
+        match = RESOLUTION.match(value)
+        if match is None:
+            return None
+        return int(match.group(1)) * (1024 if match.group(2) == "k" else 1)
+    return value
+
+
+def parse_query(text):
+    """ [[(negated, key, op, value), ...], ...]: OR of AND groups """
+    groups, group, negate = [], [], False
+    for token in text.lower().split():
+        if token == "or":
+            groups.append(group)
+            group = []
+        elif token == "not":
+            negate = True
+        elif token != "and":
+            minus, key, op, value = TERM.match(token).groups()
+            group.append((negate or minus == "-", key, op, value))
+            negate = False
+    groups.append(group)
+    return [group for group in groups if group]
+
+
+def is_filter_query(text):
+    """ Whether text uses filter syntax rather than being a plain name search """
+    for token in text.lower().split():
+        if token in OPERATORS or token.startswith("-"):
+            return True
+        if TERM.match(token).group(2) is not None:
+            return True
+    return False
+
+
+class MatFilterIndex:
+    """
+    Inverted indexes over the library's material metadata: facet -> value -> set of names.
+    A query is terms joined by AND (or just spaces), OR and NOT / a leading "-", AND binding tighter:
+        wood AND 4k AND has:displacement
+        category:metal OR category:wood -vendor:polyhaven
+        res>=4k added>=2026-01
+    A bare word matches the BARE_FACETS values and, through name_lookup, the material names.
+    Every term is a dict lookup (a comparison scans the facet's distinct values), and each AND group
+    intersects its sets smallest first, so queries stay instant over tens of thousands of materials.
+    """
+    def __init__(self):
+        self.facets = {facet: {} for facet in FACETS}
+        self.meta = {}  # name -> metadata indexed, to skip unchanged materials and for removal
+
+    def __len__(self):
+        return len(self.meta)
+
+    def add(self, name, meta):
+        if self.meta.get(name) == meta:
+            return
+        self.remove(name)
+        self.meta[name] = meta
+        for facet, field in FACETS.items():
+            for value in facet_values(meta, field):
+                self.facets[facet].setdefault(value, set()).add(name)
+
+    def remove(self, name):
+        meta = self.meta.pop(name, None)
+        if meta is None:
+            return
+        for facet, field in FACETS.items():
+            postings = self.facets[facet]
+            for value in facet_values(meta, field):
+                names = postings.get(value)
+                if names is None:
+                    continue
+                names.discard(name)
+                if not names:
+                    del postings[value]
+
+    def update(self, mat_list):
+        """ Brings the index in line with a MatSelector.mat_list, touching only what changed """
+        for name in [n for n in self.meta if n not in mat_list]:
+            self.remove(name)
+        for name, data in mat_list.items():
+            self.add(name, data.get("meta") or {})
+
+    def counts(self, facet):
+        """ (value, number of materials) of a facet, most common first """
+        return sorted(((value, len(names)) for value, names in self.facets[facet].items()), key=lambda vc: (-vc[1], vc[0]))
+
+    def term(self, key, op, value, name_lookup=None):
+        if key is None:
+            names = set(name_lookup(value)) if name_lookup is not None else set()
+            for facet in BARE_FACETS:
+                names.update(self.facets[facet].get(value, ()))
+            return names
+
+        facet = FACET_ALIASES.get(key, key)
+        if facet not in self.facets:
+            raise ValueError(f"Unknown filter '{key}', use one of {', '.join(FACETS)}")
+        postings = self.facets[facet]
+        if op == ":":
+            return set(postings.get(value, ()))
+
+        target = order_key(facet, value)
+        if target is None:
+            raise ValueError(f"Cannot compare {key} with '{value}'")
+        compare = COMPARISONS[op]
+        names = set()
+        for candidate, candidate_names in postings.items():
+            candidate_key = order_key(facet, candidate)
+            if candidate_key is not None and compare(candidate_key, target):
+                names.update(candidate_names)
+        return names
+
+    def query(self, text, name_lookup=None):
+        """ Set of names matching text. Raises ValueError for unknown filters. """
+        result = set()
+        for group in parse_query(text):
+            positives = sorted((self.term(key, op, value, name_lookup) for negated, key, op, value in group if not negated), key=len)
+            matched = set(positives[0]) if positives else set(self.meta)
+            for names in positives[1:]:
+                matched.intersection_update(names)
+                if not matched:
+                    break
+            for negated, key, op, value in group:
+                if negated and matched:
+                    matched.difference_update(self.term(key, op, value, name_lookup))
+            result.update(matched)
+        return result
@@ -0,0 +1,168 @@
+import threading
+import maya.cmds as cmds
+import maya.utils
+
+from perfTrace import note, traced
+
+
+class MatGrid:
+    """
+    Paged thumbnail grid for MatSelector.
+    Only one viewport's worth of cells (visible rows + overscan) is ever created. The cells are
+    recycled between pages and searches by editing them in place, and thumbnails are assigned
+    deferred so the grid shows its labels before any preview image is decoded. Thumbnails not
+    made yet are resized off the main thread, or one per idle callback when only MImage can.
+    """
+    def __init__(self, parent, width, height, columns=4, overscan_rows=1):
+        self.parent = parent
+        self.columns = columns
+        self.cell_width = (width-5*2)/columns  # include 5px padding on both sides
+        self.cell_height = self.cell_width + 30
+
+        visible_rows = max(1, int(height // self.cell_height))
+        self.page_size = columns * (visible_rows + overscan_rows)
+
+        self.lyt_grid = None
+        self.cells = []  # [(column_layout, icon_button, text)]
+
+        self.items = []
+        self.mat_list = {}
+        self.on_open = None
+        self.on_assign = None  # right-click "Assign to Selection", called with the .ma path
+        self.thumbnails = None  # optional ThumbnailCache
+        self.page = 0
+
+        # Bumped on every render so deferred thumbnail loads for an old page are dropped
+        self.generation = 0
+
+    @traced("grid.build")
+    def build(self):
+        if self.lyt_grid and cmds.layout(self.lyt_grid, exists=True):
+            cmds.deleteUI(self.lyt_grid)
+
+        self.lyt_grid = cmds.gridLayout(
+            numberOfColumns=self.columns,
+            cellWidth=self.cell_width,
+            cellHeight=self.cell_height,
+            parent=self.parent,
+        )
+        self.cells = []
+        for i in range(self.page_size):
+            cell = cmds.columnLayout(parent=self.lyt_grid, visible=False)
+            button = cmds.iconTextButton(
+                style="iconOnly",
+                width=self.cell_width,
+                height=self.cell_width,
+                command=lambda i=i: self.cell_clicked(i),
+            )
+            cmds.popupMenu(parent=button)
+            cmds.menuItem(label="Open", command=lambda *args, i=i: self.cell_clicked(i))
+            cmds.menuItem(label="Assign to Selection", command=lambda *args, i=i: self.cell_assign(i))
+            label = cmds.text(label="", align="center", width=self.cell_width)
+            cmds.setParent('..')
+            self.cells.append((cell, button, label))
+
+    def set_items(self, items, mat_list, keep_page=False):
+        self.items = items
+        self.mat_list = mat_list
+        if not keep_page:
+            self.page = 0
+        self.page = min(self.page, self.page_count() - 1)
+        self.render()
+
+    def page_count(self):
+        return max(1, -(-len(self.items) // self.page_size))
+
+    def set_page(self, page):
+        page = max(0, min(page, self.page_count() - 1))
+        if page != self.page:
+            self.page = page
+            self.render()
+
+    def next_page(self, *args):
+        self.set_page(self.page + 1)
+
+    def prev_page(self, *args):
+        self.set_page(self.page - 1)
+
+    def item_at(self, i):
+        index = self.page * self.page_size + i
+        if index < len(self.items):
+            return self.items[index]
+        return None
+
+    def cell_clicked(self, i):
+        base_name = self.item_at(i)
+        if base_name is not None and self.on_open is not None:
+            self.on_open(self.mat_list[base_name]["ma_path"])
+
+    def cell_assign(self, i):
+        base_name = self.item_at(i)
+        if base_name is not None and self.on_assign is not None:
+            self.on_assign(self.mat_list[base_name]["ma_path"])
+
+    @traced("grid.render")
+    def render(self):
+        if not self.cells or not cmds.layout(self.lyt_grid, exists=True):
+            self.build()
+
+        self.generation += 1
+        for i, (cell, button, label) in enumerate(self.cells):
+            base_name = self.item_at(i)
+            if base_name is None:
+                cmds.columnLayout(cell, edit=True, visible=False)
+                continue
+            cmds.iconTextButton(button, edit=True, image3="")
+            cmds.text(label, edit=True, label=base_name)
+            cmds.columnLayout(cell, edit=True, visible=True)
+
+        generation = self.generation
+        cmds.evalDeferred(lambda: self.load_thumbnails(generation), lowestPriority=True)
+
+    @traced("grid.thumbnails")
+    def load_thumbnails(self, generation):
+        if generation != self.generation or not cmds.layout(self.lyt_grid, exists=True):
+            return
+        missing = []  # (cell index, preview path) of the thumbnails still to be made
+        for i, (cell, button, label) in enumerate(self.cells):
+            base_name = self.item_at(i)
+            if base_name is None:
+                break
+            prev_path = self.mat_list[base_name]["prev_path"]
+            if self.thumbnails is not None:
+                thumb_path = self.thumbnails.get(prev_path, generate=False)
+                if thumb_path is None:
+                    missing.append((i, prev_path))
+                    continue
+                prev_path = thumb_path
+            cmds.iconTextButton(button, edit=True, image3=prev_path)
+        note(missing=len(missing))
+        if missing:
+            self.generate_thumbnails(generation, missing)
+
+    def generate_thumbnails(self, generation, missing):
+        if not self.thumbnails.resizes_in_background():
+            for i, prev_path in missing:
+                cmds.evalDeferred(lambda i=i, p=prev_path: self.generate_thumbnail(generation, i, p), lowestPriority=True)
+            return
+
+        def run():
+            for i, prev_path in missing:
+                if generation != self.generation:
+                    return  # The page changed, the rest is not shown any more
+                maya.utils.executeDeferred(self.set_thumbnail, generation, i, self.thumbnails.get(prev_path))
+
+        thread = threading.Thread(target=run, name="matGrid thumbnails", daemon=True)
+        thread.start()
+
+    def generate_thumbnail(self, generation, i, prev_path):
+        if generation == self.generation:
+            self.set_thumbnail(generation, i, self.thumbnails.get(prev_path))
+
+    def set_thumbnail(self, generation, i, path):
+        if generation != self.generation or not cmds.layout(self.lyt_grid, exists=True):
+            return
+        cmds.iconTextButton(self.cells[i][1], edit=True, image3=path)
+
+    def page_label(self):
+        return f"Page {self.page + 1}/{self.page_count()} ({len(self.items)} materials)"
@@ -0,0 +1,336 @@
+import os
+import sys
+import hashlib
+import threading
+
+from matLibraryIndex import MatLibraryIndex
+from matLibraryScanner import LibraryScanner
+from perfTrace import note, traced
+
+MAX_SHARD_DEPTH = 4
+NETWORK_FS_TYPES = {"nfs", "nfs4", "cifs", "smb3", "smbfs", "afpfs", "davfs", "fuse.sshfs", "9p"}
+DRIVE_REMOTE = 4
+
+
+def is_slow_path(path):
+    """ Whether path is on network storage: UNC paths, mapped network drives or network mounts """
+    path = os.path.abspath(path)
+    if path.startswith("\\\\") or path.startswith("//"):
+        return True
+    if sys.platform == "win32":
+        import ctypes
+        drive = os.path.splitdrive(path)[0]
+        return bool(drive) and ctypes.windll.kernel32.GetDriveTypeW(drive + "\\") == DRIVE_REMOTE
+    try:
+        with open("/proc/mounts", "r") as f:
+            mounts = [line.split() for line in f]
+    except OSError:
+        return False
+    mount_point, fs_type = "", None
+    for fields in mounts:
+        if len(fields) < 3:
+            continue
+        if (path == fields[1] or path.startswith(fields[1].rstrip("/") + "/")) and len(fields[1]) > len(mount_point):
+            mount_point, fs_type = fields[1], fields[2]
+    return fs_type in NETWORK_FS_TYPES
+
+
+class LibraryRoot:
+    def __init__(self, path, priority, slow=None):
+        self.path = path
+        self.priority = priority  # 0 is the highest
+        self.slow = is_slow_path(path) if slow is None else slow
+
+
+class LibraryShard:
+    """ One indexed folder: a library root or a category folder somewhere inside it """
+    def __init__(self, root, path, depth, cache_dir=None):
+        self.root = root
+        self.path = path
+        self.depth = depth
+        self.key = (root.priority, path)
+        cache_path = None
+        if root.slow and cache_dir:
+            digest = hashlib.sha1(os.path.normcase(os.path.abspath(path)).encode("utf-8")).hexdigest()[:16]
+            cache_path = os.path.join(cache_dir, f"{digest}.json")
+        self.index = MatLibraryIndex(path, cache_path)
+
+    def materials(self, mats=None):
+        """ {name: material data, None if it is not a valid material} for mats, default all """
+        return {mat: self.index.material(mat) for mat in (self.index.entries if mats is None else mats)}
+
+    def problems(self, mats):
+        """ (kind, path) of the material folders without a .ma ("ma") or a preview ("preview") """
+        problems = []
+        for mat in mats:
+            entry = self.index.entries.get(mat)
+            if entry is None or entry.get("shard"):
+                continue
+            if entry["ma_path"] is None:
+                problems.append(("ma", os.path.join(self.path, mat, mat + ".ma")))
+            elif entry["prev_path"] is None:
+                problems.append(("preview", os.path.join(self.path, mat, mat + ".png")))
+        return problems
+
+
+class ShardBatch:
+    """
+    A shard's materials as a scan hands them over: name -> material data, None when gone.
+    A complete batch holds every material of the shard, the ones it lacks are gone too.
+    """
+    def __init__(self, shard, materials, problems=None, complete=False):
+        self.shard = shard
+        self.materials = materials
+        self.problems = problems or []
+        self.complete = complete
+        self.generation = None  # of the scan that sent it, None when loaded from the indexes
+
+
+class RootScan:
+    """ What on_done receives when the scan of one root is over """
+    def __init__(self, root, generation, error=None):
+        self.root = root
+        self.generation = generation
+        self.error = error
+
+
+class MatLibraryFederation:
+    """
+    Several library roots searched as one, e.g. a local scratch library, the show's and the studio's on the NAS.
+    Roots come in priority order: a name found in more than one root is the material of the first.
+    Category folders (no .ma of their own, more folders inside) are shards with an index of their own, so a large
+    library is never one flat listing and a change rewrites one small index.
+    Each root is scanned on its own thread, which owns that root's indexes while it runs. Roots on network storage
+    open from a local copy of their indexes in cache_dir, so neither opening nor a slow NAS holds up the local roots.
+    load(), apply() and finish() are for the main thread. mat_list is the merged view in MatSelector.mat_list's format.
+    Every start() is a new generation: apply() and finish() drop what earlier scans still hand over.
+    """
+    def __init__(self, root_paths, cache_dir=None):
+        self.root_paths = list(root_paths)
+        self.roots = []
+        for path in self.root_paths:
+            if all(os.path.normcase(path) != os.path.normcase(root.path) for root in self.roots):
+                self.roots.append(LibraryRoot(path, len(self.roots)))
+        self.cache_dir = cache_dir
+
+        self.shards = {}  # (root priority, path) -> LibraryShard
+        self.shards_lock = threading.Lock()
+        self.sources = {}  # name -> {shard key: material data}
+        self.mat_list = {}  # name -> material data of the highest priority shard holding it
+
+        self.generation = 0  # of the latest start()
+        self.unfinished = set()  # paths of the roots whose on_done of that generation has not reached finish()
+        self.threads = {}  # root path -> thread of its latest scan
+        self.scanners = {}  # thread id -> LibraryScanner of the shard it is scanning
+        self.cancel_event = threading.Event()  # of the latest generation
+
+    def shard(self, root, path, depth):
+        with self.shards_lock:
+            shard = self.shards.get((root.priority, path))
+            if shard is None:
+                shard = self.shards[(root.priority, path)] = LibraryShard(root, path, depth, self.cache_dir)
+            return shard
+
+    def child_shards(self, shard, create=True):
+        if shard.depth >= MAX_SHARD_DEPTH:
+            return []
+        paths = [os.path.join(shard.path, name) for name in shard.index.shards()]
+        if create:
+            return [self.shard(shard.root, path, shard.depth + 1) for path in paths]
+        with self.shards_lock:
+            return [self.shards[(shard.root.priority, path)] for path in paths if (shard.root.priority, path) in self.shards]
+
+    def shard_paths(self):
+        """ Every folder holding material folders, e.g. for PreviewGenerator """
+        with self.shards_lock:
+            return sorted({path for _, path in self.shards})
+
+    @traced("library.load")
+    def load(self):
+        """ Fills mat_list from the indexes alone, slow roots from their local copies """
+        for root in self.roots:
+            pending = [self.shard(root, root.path, 0)]
+            while pending:
+                shard = pending.pop()
+                shard.index.load(from_cache=root.slow)
+                self.apply(ShardBatch(shard, shard.materials()))
+                pending.extend(self.child_shards(shard))
+        note(roots=len(self.roots), shards=len(self.shards), materials=len(self.mat_list))
+        return self.mat_list
+
+    def is_current(self, generation):
+        return generation is None or generation == self.generation
+
+    def gone_in(self, batch):
+        """ (name, shard key) a complete batch no longer holds, with a root's shards the scan dropped """
+        with self.shards_lock:
+            live = set(self.shards)
+        key = batch.shard.key
+        gone = []
+        for mat, sources in self.sources.items():
+            for source_key in sources:
+                if source_key == key and mat not in batch.materials:
+                    gone.append((mat, source_key))
+                elif batch.shard.depth == 0 and source_key[0] == key[0] and source_key not in live:
+                    gone.append((mat, source_key))
+        return gone
+
+    def apply(self, batch):
+        """ Merges a ShardBatch into mat_list. Returns the names whose material changed. """
+        if not self.is_current(batch.generation):
+            return []  # From a scan a later start() has taken over from
+        updates = [(mat, batch.shard.key, data) for mat, data in batch.materials.items()]
+        if batch.complete:
+            updates.extend((mat, key, None) for mat, key in self.gone_in(batch))
+
+        changed = []
+        for mat, key, data in updates:
+            sources = self.sources.get(mat, {})
+            if data is None:
+                if sources.pop(key, None) is None:
+                    continue
+            else:
+                sources[key] = dict(data, root=batch.shard.root.path)
+
+            if sources:
+                self.sources[mat] = sources
+            else:
+                self.sources.pop(mat, None)
+            winner = sources[min(sources)] if sources else None
+            if self.mat_list.get(mat) != winner:
+                if winner is None:
+                    del self.mat_list[mat]
+                else:
+                    self.mat_list[mat] = winner
+                if mat not in changed:
+                    changed.append(mat)
+        return changed
+
+    def start(self, on_batch=None, on_done=None):
+        """
+        Scans every root on a thread of its own. on_batch(ShardBatch) and on_done(RootScan) are called from
+        those threads, the caller marshals them (e.g. maya.utils.executeDeferred) to apply() and finish().
+        A scan still running is cancelled, never waited for: its root's new thread waits for it instead.
+        """
+        self.cancel()
+        self.cancel_event = threading.Event()
+        self.generation += 1
+        # Roots whose last scan did not get to finish() may have batches that will now be dropped as stale
+        resend = set(self.unfinished)
+        self.unfinished = {root.path for root in self.roots}
+        for root in self.roots:
+            previous = self.threads.get(root.path)
+            if previous is not None and not previous.is_alive():
+                previous = None
+            args = (root, self.generation, self.cancel_event, previous, root.path in resend, on_batch, on_done)
+            thread = threading.Thread(target=self.scan_root, args=args,
+                                      name=f"matLibraryFederation {root.path}", daemon=True)
+            self.threads[root.path] = thread
+            thread.start()
+
+    def finish(self, scan):
+        """ on_done of a root arrived on the main thread. Returns the number of roots still scanning, None if stale. """
+        if not self.is_current(scan.generation):
+            return None
+        self.unfinished.discard(scan.root.path)
+        return len(self.unfinished)
+
+    def scanning(self):
+        return bool(self.unfinished)
+
+    def cancel(self):
+        self.cancel_event.set()
+        for scanner in list(self.scanners.values()):
+            scanner.cancel()
+
+    def wait(self, timeout=None):
+        """ For scripts and tests, the selector never waits on a scan """
+        for thread in list(self.threads.values()):
+            thread.join(timeout)
+
+    def resend_root(self, root, send):
+        """ Every shard of root as a complete batch """
+        pending = [self.shard(root, root.path, 0)]
+        while pending:
+            shard = pending.pop()
+            send(ShardBatch(shard, shard.materials(), complete=True))
+            pending.extend(self.child_shards(shard))
+
+    def scan_root(self, root, generation, cancel_event, previous, resend, on_batch, on_done):
+        def send(batch):
+            batch.generation = generation
+            if on_batch is not None:
+                on_batch(batch)
+
+        error = None
+        try:
+            if previous is not None:
+                # The cancelled scan owns the root's indexes until it returns
+                previous.join()
+            if resend:
+                # What the earlier scan indexed may never be applied, its batches are stale now
+                self.resend_root(root, send)
+            queue = [self.shard(root, root.path, 0)]
+            while queue and not cancel_event.is_set():
+                shard = queue.pop(0)
+                try:
+                    self.scan_shard(shard, send, cancel_event)
+                except OSError:
+                    if shard.depth == 0:
+                        raise
+                    continue  # Category folder vanished mid-scan, its parent's scan drops it
+                queue.extend(self.child_shards(shard))
+        except Exception as e:
+            error = e
+        if on_done is not None:
+            on_done(RootScan(root, generation, error))
+
+    @traced("library.shard")
+    def scan_shard(self, shard, on_batch, cancel_event):
+        index = shard.index
+        refreshed = False
+        if shard.root.slow:
+            # The local copy can be behind what other workstations wrote to the library
+            known = set(index.entries)
+            refreshed = index.load()
+            if refreshed:
+                materials = shard.materials()
+                materials.update(dict.fromkeys(known - set(index.entries)))
+                on_batch(ShardBatch(shard, materials))
+
+        old_shards = set(index.shards())
+        scanner = LibraryScanner(shard.path, index.mtimes())
+        self.scanners[threading.get_ident()] = scanner
+        if cancel_event.is_set():
+            scanner.cancel()
+
+        def scanned(batch):
+            index.apply(batch)
+            on_batch(ShardBatch(shard, shard.materials(batch), shard.problems(batch)))
+
+        try:
+            result = scanner.scan(scanned)
+        finally:
+            self.scanners.pop(threading.get_ident(), None)
+
+        if not result.cancelled:
+            removed = index.remove_missing(result.seen)
+            if removed:
+                on_batch(ShardBatch(shard, dict.fromkeys(removed)))
+            for name in old_shards - set(index.shards()):
+                gone = self.shards.get((shard.root.priority, os.path.join(shard.path, name)))
+                if gone is not None:
+                    self.drop_shard(gone, on_batch)
+        if index.dirty:
+            index.save()
+        elif refreshed:
+            index.save_cache()
+        note(shard=shard.path, changed=len(result.changed), cancelled=result.cancelled)
+
+    def drop_shard(self, shard, on_batch):
+        """ A category folder is gone, or has become a material: its materials go with it """
+        for child in self.child_shards(shard, create=False):
+            self.drop_shard(child, on_batch)
+        with self.shards_lock:
+            self.shards.pop(shard.key, None)
+        on_batch(ShardBatch(shard, dict.fromkeys(shard.index.entries)))
@@ -0,0 +1,127 @@
+import os
+import json
+import threading
+
+from matLibraryScanner import LibraryScanner
+from perfTrace import note, traced
+
+INDEX_FILE_NAME = ".matSelector_index.json"
+INDEX_VERSION = 3
+
+
+def write_index(path, data):
+    # Unique temporary name, an index can be saved by an old and a new scan at once
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except OSError:
+        return False
+    return True
+
+
+class MatLibraryIndex:
+    """
+    Persistent manifest of a material library, stored in the library root.
+    Paths are kept relative to the root (with '/' separators) so the same index
+    works from any mount point or OS.
+    cache_path is an optional local copy of the index, for libraries on slow storage.
+    """
+    def __init__(self, lib_path, cache_path=None):
+        self.lib_path = lib_path
+        self.index_path = os.path.join(lib_path, INDEX_FILE_NAME)
+        self.cache_path = cache_path
+
+        # name -> {"mtime": float, "ma_path": str|None, "prev_path": str|None, "meta": dict, "shard": bool (optional)}
+        self.entries = {}
+        self.dirty = False
+
+    @traced("index.load")
+    def load(self, from_cache=False):
+        if from_cache and self.cache_path is None:
+            return False
+        try:
+            with open(self.cache_path if from_cache else self.index_path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+            return False
+
+        self.entries = data.get("materials", {})
+        self.dirty = False
+        note(materials=len(self.entries))
+        return True
+
+    @traced("index.save")
+    def save(self):
+        if not self.dirty:
+            return True
+
+        data = {"version": INDEX_VERSION, "materials": self.entries}
+        # Read-only library: keep working from memory (and the cache), the next open is just cold
+        saved = write_index(self.index_path, data)
+        cached = self.save_cache()
+        self.dirty = not (saved or cached)
+        return saved
+
+    def save_cache(self):
+        if self.cache_path is None:
+            return False
+        return write_index(self.cache_path, {"version": INDEX_VERSION, "materials": self.entries})
+
+    def refresh(self):
+        """
+        Synchronously re-validates only the material folders whose mtime differs from the index.
+        Returns the names (re)validated during this call.
+        """
+        result = LibraryScanner(self.lib_path, self.mtimes()).scan()
+        self.apply(result.changed)
+        self.remove_missing(result.seen)
+        return list(result.changed)
+
+    def shards(self):
+        """ Names of the category folders indexed on their own """
+        return sorted(mat for mat, entry in self.entries.items() if entry.get("shard"))
+
+    def mtimes(self):
+        return {mat: entry.get("mtime") for mat, entry in self.entries.items()}
+
+    def apply(self, changed):
+        if changed:
+            self.entries.update(changed)
+            self.dirty = True
+
+    def remove_missing(self, seen):
+        removed = [mat for mat in self.entries if mat not in seen]
+        for mat in removed:
+            del self.entries[mat]
+        if removed:
+            self.dirty = True
+        return removed
+
+    def abs_path(self, rel_path):
+        return os.path.normpath(os.path.join(self.lib_path, rel_path))
+
+    def material(self, mat):
+        """ A single valid material in the format MatSelector.mat_list uses, or None """
+        entry = self.entries.get(mat)
+        if entry is None or entry.get("ma_path") is None:
+            return None
+        prev_path = entry.get("prev_path") or f"{mat}/{mat}.png"
+        return {
+            "ma_path": self.abs_path(entry["ma_path"]),
+            "prev_path": self.abs_path(prev_path),
+            "meta": entry.get("meta") or {},
+        }
+
+    def materials(self, mats=None):
+        mat_list = {}
+        for mat in (self.entries if mats is None else mats):
+            data = self.material(mat)
+            if data is not None:
+                mat_list[mat] = data
+        return mat_list
@@ -0,0 +1,153 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from materialMetadata import META_FILE_NAME, read_metadata
+from perfTrace import note, traced
+
+DEFAULT_WORKERS = 8
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_FLUSH_INTERVAL = 0.25
+
+
+def validate_mat(mat, full_mat_path, mtime):
+    files, has_dirs = set(), False
+    try:
+        with os.scandir(full_mat_path) as it:
+            for entry in it:
+                files.add(entry.name)
+                if not has_dirs and not entry.name.startswith(".") and entry.is_dir():
+                    has_dirs = True
+    except OSError:
+        pass
+
+    ma_name = mat + ".ma"
+    prev_name = mat + ".png"
+    entry = {
+        "mtime": mtime,
+        "ma_path": f"{mat}/{ma_name}" if ma_name in files else None,
+        "prev_path": f"{mat}/{prev_name}" if prev_name in files else None,
+        # Facets written by the build, see materialMetadata
+        "meta": (read_metadata(full_mat_path) or {}) if META_FILE_NAME in files else {},
+    }
+    if entry["ma_path"] is None and has_dirs:
+        # Category folder of more material folders, indexed as a shard of its own (see matLibraryFederation)
+        entry["shard"] = True
+    return entry
+
+
+def scan_mat(mat, full_mat_path, known_mtime):
+    """ Returns the fresh index entry for a material folder, or None if its mtime is unchanged """
+    mtime = os.stat(full_mat_path).st_mtime
+    if mtime == known_mtime:
+        return None
+    return validate_mat(mat, full_mat_path, mtime)
+
+
+class ScanResult:
+    def __init__(self):
+        self.changed = {}  # name -> entry
+        self.seen = set()
+        self.cancelled = False
+        self.error = None
+
+
+class LibraryScanner:
+    """
+    Pure-Python library scan: one listing of the root, then the per-material stat and listing
+    run on a thread pool. Changed entries are handed to on_batch in batches, from the scanning
+    thread, so the caller decides how to marshal them (e.g. maya.utils.executeDeferred).
+    """
+    def __init__(self, lib_path, known_mtimes=None, workers=DEFAULT_WORKERS,
+                 batch_size=DEFAULT_BATCH_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.lib_path = lib_path
+        self.known_mtimes = dict(known_mtimes or {})
+        self.workers = workers
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self.cancel_event = threading.Event()
+        self.thread = None
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def list_mats(self):
+        mats = []
+        with os.scandir(self.lib_path) as it:
+            for entry in it:
+                if entry.name.startswith("."):
+                    continue
+                try:
+                    if entry.is_dir():
+                        mats.append((entry.name, entry.path))
+                except OSError:
+                    continue
+        return mats
+
+    @traced("scan")
+    def scan(self, on_batch=None):
+        result = ScanResult()
+        batch = {}
+        last_flush = time.monotonic()
+
+        def flush():
+            if batch and on_batch is not None:
+                on_batch(dict(batch))
+            batch.clear()
+
+        mats = self.list_mats()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {
+                executor.submit(scan_mat, mat, path, self.known_mtimes.get(mat)): mat
+                for mat, path in mats
+            }
+            for future in as_completed(futures):
+                if self.cancelled():
+                    for pending in futures:
+                        pending.cancel()
+                    result.cancelled = True
+                    break
+
+                mat = futures[future]
+                try:
+                    entry = future.result()
+                except OSError:
+                    # Folder vanished mid-scan, treat as removed
+                    continue
+                result.seen.add(mat)
+                if entry is None:
+                    continue
+
+                result.changed[mat] = entry
+                batch[mat] = entry
+                now = time.monotonic()
+                if len(batch) >= self.batch_size or now - last_flush >= self.flush_interval:
+                    flush()
+                    last_flush = now
+
+        flush()
+        note(materials=len(mats), changed=len(result.changed), cancelled=result.cancelled)
+        return result
+
+    def start(self, on_batch=None, on_done=None):
+        """ Runs scan() on a daemon thread, on_done receives the ScanResult """
+        def worker():
+            try:
+                result = self.scan(on_batch)
+            except Exception as e:
+                result = ScanResult()
+                result.error = e
+            if on_done is not None:
+                on_done(result)
+
+        self.thread = threading.Thread(target=worker, name="matLibraryScanner", daemon=True)
+        self.thread.start()
+        return self.thread
@@ -0,0 +1,160 @@
+import bisect
+import difflib
+import re
+
+FUZZY_MIN_RATIO = 0.6
+FUZZY_MAX_RESULTS = 50
+FUZZY_MAX_CANDIDATES = 500
+TOKEN_SEPARATORS = re.compile(r"[_\-\s.]+")
+
+
+def trigrams(text):
+    # Padded so names and queries shorter than three characters still produce grams
+    padded = f"  {text} "
+    return {padded[i:i+3] for i in range(len(padded) - 2)}
+
+
+def query_trigrams(text):
+    # Unpadded: a substring query can sit anywhere inside a name
+    return {text[i:i+3] for i in range(len(text) - 2)}
+
+
+class MatSearchIndex:
+    """
+    Search structure over material names, built once per library and updated incrementally.
+    Prefix lookups bisect a sorted key list, substring and fuzzy lookups use a trigram index.
+    """
+    def __init__(self, names=()):
+        self.keys = []  # sorted list of (lower_name, name)
+        self.lower_names = {}  # name -> lower_name
+        self.grams = {}  # trigram -> set of names
+
+        self.add_many(names)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, name):
+        return name in self.lower_names
+
+    def add(self, name):
+        if name in self.lower_names:
+            return
+        lower_name = name.lower()
+        self.lower_names[name] = lower_name
+        bisect.insort(self.keys, (lower_name, name))
+        for gram in trigrams(lower_name):
+            self.grams.setdefault(gram, set()).add(name)
+
+    def add_many(self, names):
+        new_names = [n for n in set(names) if n not in self.lower_names]
+        if len(new_names) < 64:
+            for name in new_names:
+                self.add(name)
+            return
+
+        # Bulk load: one sort instead of an insort per name
+        for name in new_names:
+            lower_name = name.lower()
+            self.lower_names[name] = lower_name
+            self.keys.append((lower_name, name))
+            for gram in trigrams(lower_name):
+                self.grams.setdefault(gram, set()).add(name)
+        self.keys.sort()
+
+    def remove(self, name):
+        lower_name = self.lower_names.pop(name, None)
+        if lower_name is None:
+            return
+        i = bisect.bisect_left(self.keys, (lower_name, name))
+        if i < len(self.keys) and self.keys[i] == (lower_name, name):
+            del self.keys[i]
+        for gram in trigrams(lower_name):
+            names = self.grams.get(gram)
+            if names is None:
+                continue
+            names.discard(name)
+            if not names:
+                del self.grams[gram]
+
+    def update(self, names):
+        """ Brings the index in line with names, touching only what changed """
+        names = set(names)
+        for name in [n for n in self.lower_names if n not in names]:
+            self.remove(name)
+        self.add_many(names)
+
+    def all(self):
+        return [name for _, name in self.keys]
+
+    def prefix(self, text):
+        text = text.lower()
+        lo = bisect.bisect_left(self.keys, (text,))
+        hi = bisect.bisect_left(self.keys, (text + "\uffff",), lo)
+        return [name for _, name in self.keys[lo:hi]]
+
+    def substring(self, text):
+        text = text.lower()
+        if not text:
+            return self.all()
+
+        if len(text) < 3:
+            candidates = set()
+            for gram, names in self.grams.items():
+                if text in gram:
+                    candidates.update(names)
+        else:
+            postings = sorted((self.grams.get(gram, set()) for gram in query_trigrams(text)), key=len)
+            if not postings[0]:
+                return []
+            candidates = set(postings[0])
+            for names in postings[1:]:
+                candidates.intersection_update(names)
+                if not candidates:
+                    return []
+
+        return sorted((n for n in candidates if text in self.lower_names[n]), key=self.lower_names.get)
+
+    def fuzzy(self, text, limit=FUZZY_MAX_RESULTS):
+        text = text.lower()
+        grams = trigrams(text)
+        counts = {}
+        for gram in grams:
+            for name in self.grams.get(gram, ()):
+                counts[name] = counts.get(name, 0) + 1
+
+        min_shared = max(1, len(grams) // 3)
+        candidates = sorted((n for n, shared in counts.items() if shared >= min_shared), key=counts.get, reverse=True)
+
+        scored = []
+        for name in candidates[:FUZZY_MAX_CANDIDATES]:
+            lower_name = self.lower_names[name]
+            # Score against the whole name and each of its tokens so "brik" still finds "bricks_red"
+            ratio = max(
+                difflib.SequenceMatcher(None, text, part).ratio()
+                for part in [lower_name] + TOKEN_SEPARATORS.split(lower_name)
+            )
+            if ratio >= FUZZY_MIN_RATIO:
+                scored.append((-ratio, self.lower_names[name], name))
+        scored.sort()
+        return [name for _, _, name in scored[:limit]]
+
+    def search(self, text):
+        """ Ranked matches: prefix matches, then substring matches, then fuzzy matches """
+        text = text.lower()
+        if not text:
+            return self.all()
+
+        results = self.prefix(text)
+        seen = set(results)
+        for name in self.substring(text):
+            if name not in seen:
+                results.append(name)
+                seen.add(name)
+
+        if len(text) >= 3:
+            for name in self.fuzzy(text):
+                if name not in seen:
+                    results.append(name)
+                    seen.add(name)
+        return results
@@ -1,42 +1,134 @@
 import os
+import threading
 import maya.cmds as cmds
+import maya.utils
 import maya.api.OpenMaya as om
 
-class MatSelector(om.MPxCommand):
-    kPluginCmdName = "matSelector"
+from commandSyntax import MatSelectorSyntax
+from matGrid import MatGrid
+from matLibraryFederation import MatLibraryFederation
+from matSearchIndex import MatSearchIndex
+from matFilterIndex import FACETS, MatFilterIndex, is_filter_query
+from sceneMaterials import (
+    SceneMaterialRegistry, assign, assignable_objects, assignable_selection, match_assignments, read_assignment_map,
+    surface_shader,
+)
+from thumbnailCache import ThumbnailCache, DEFAULT_MAX_ENTRIES
+from previewRender import PreviewGenerator, summarize as summarize_previews
+from texturePrep import has_pillow
+from perfTrace import note, traced
 
+class MatSelector(MatSelectorSyntax, om.MPxCommand):
     def __init__(self):
         om.MPxCommand.__init__(self)
         self.matSelector_last_folder = "matSelector_last_folder"
-        self.lib_path = ""
+        self.matSelector_library_roots = "matSelector_library_roots"
+        self.matSelector_live_search = "matSelector_live_search"
+        self.matSelector_thumbnail_entries = "matSelector_thumbnail_entries"
+        self.matSelector_reference = "matSelector_reference"
+        self.lib_path = ""  # primary (highest priority) library root
+        self.lib_roots = []
 
-        self.width, self.height = 400, 500
+        self.width, self.height = 400, 530
 
         self.window = None
         self.lyt_scroll = None
         self.inp_search_field = None
-        self.lyt_grid = None
+        self.chk_live_search = None
+        self.chk_reference = None
+        self.lyt_chips = None
+        self.lbl_page = None
+        self.btn_refresh = None
+        self.mat_grid = None
 
+        self.search_delay = 0.2
+        self.search_timer = None
+
+        self.library = None  # MatLibraryFederation of lib_roots
+        self.scan_problems = []
         self.mat_list = {}
+        self.search_index = MatSearchIndex()
+        self.filter_index = MatFilterIndex()
+        self.filters = []  # filter chips, each a single query term
         self.sorted_mats = []
 
+        self.thumbnails = None
+        self.scene_materials = SceneMaterialRegistry()
+
     @staticmethod
     def cmdCreator():
         return MatSelector()
 
+    def doIt(self, args):
+        arg_data = om.MArgParser(self.syntax(), args)
+        reference = arg_data.isFlagSet(self.kReferenceFlag)
+        if arg_data.isFlagSet(self.kLibraryFlag):
+            # -library <root> [-library <root> ...], highest priority first
+            self.lib_roots = [
+                arg_data.getFlagArgumentList(self.kLibraryFlag, i).asString(0)
+                for i in range(arg_data.numberOfFlagUses(self.kLibraryFlag))
+            ]
+            self.lib_path = self.lib_roots[0]
+
+        if arg_data.isFlagSet(self.kClearThumbnailsFlag):
+            self.thumbnail_cache().clear()
+        elif arg_data.isFlagSet(self.kPruneThumbnailsFlag):
+            max_mb = arg_data.flagArgumentDouble(self.kPruneThumbnailsFlag, 0)
+            self.setResult(self.thumbnail_cache().prune(int(max_mb * 1024 * 1024)))
+        elif arg_data.isFlagSet(self.kInvalidateThumbnailFlag):
+            prev_path = arg_data.flagArgumentString(self.kInvalidateThumbnailFlag, 0)
+            self.setResult(self.thumbnail_cache().invalidate(prev_path))
+        elif arg_data.isFlagSet(self.kOpenMaterialFlag):
+            # matSelector -openMaterial <.ma> [-reference]: returns the material's shading group
+            ma_path = arg_data.flagArgumentString(self.kOpenMaterialFlag, 0)
+            sg, _ = self.scene_materials.bring_in(ma_path, reference=reference)
+            self.setResult(sg or "")
+        elif arg_data.isFlagSet(self.kAssignFlag):
+            # matSelector -assign <material name|.ma>: assigns to the current selection
+            mat_path = self.material_path(arg_data.flagArgumentString(self.kAssignFlag, 0))
+            self.setResult(self.assign_mat(mat_path, reference=reference) if mat_path else 0)
+        elif arg_data.isFlagSet(self.kAssignMapFlag):
+            self.setResult(self.assign_from_map(arg_data.flagArgumentString(self.kAssignMapFlag, 0), reference=reference))
+        elif arg_data.isFlagSet(self.kGeneratePreviewsFlag):
+            # matSelector -generatePreviews auto|arnold|composite [-library <root>]: returns the previews written
+            jobs = self.generate_previews(arg_data.flagArgumentString(self.kGeneratePreviewsFlag, 0))
+            self.setResult(sum(1 for job in jobs if job.method is not None))
+        elif arg_data.isFlagSet(self.kFilterFlag):
+            # matSelector -filterQuery "wood AND 4k AND has:displacement" [-library <root>]: returns the names
+            self.setResult(self.filter_library(arg_data.flagArgumentString(self.kFilterFlag, 0)))
+        else:
+            self.run()
+
+    def thumbnail_cache(self):
+        if self.thumbnails is None:
+            cache_dir = os.path.join(cmds.internalVar(userAppDir=True), "matSelector", "thumbnails")
+            max_entries = DEFAULT_MAX_ENTRIES
+            if cmds.optionVar(exists=self.matSelector_thumbnail_entries):
+                max_entries = int(cmds.optionVar(q=self.matSelector_thumbnail_entries))
+            self.thumbnails = ThumbnailCache(cache_dir, max_entries=max_entries)
+        return self.thumbnails
+
     def run(self):
-        self.lib_path = self.load_last_path()
+        self.lib_roots = self.load_roots()
+        self.lib_path = self.lib_roots[0] if self.lib_roots else ""
         self.open_mat_selector()
         self.refresh_directory()
 
     def refresh_directory(self, *args):
+        if self.library is not None and self.library.scanning():
+            # The refresh button doubles as "Cancel Scan" while a scan is running
+            self.cancel_scan()
+            return
         self.update_mat_list()
+        self.refresh_display()
+
+    def refresh_display(self):
         search_text = cmds.textField(self.inp_search_field, query=True, text=True).lower()
         if search_text != "":
-            self.search()
+            self.search(keep_page=True)
         else:
             self.sort_mats()
-        self.display_mats()
+            self.display_mats(keep_page=True)
 
     def save_last_path(self, path):
         cmds.optionVar(stringValue=(self.matSelector_last_folder, path))
@@ -48,6 +140,68 @@ class MatSelector(om.MPxCommand):
         else:
             return ""
 
+    def save_roots(self, roots):
+        cmds.optionVar(remove=self.matSelector_library_roots)
+        for root in roots:
+            cmds.optionVar(stringValueAppend=(self.matSelector_library_roots, root))
+        # The primary root doubles as the last folder, for single library setups
+        self.save_last_path(roots[0] if roots else "")
+
+    def load_roots(self):
+        """ Library roots, highest priority first """
+        if cmds.optionVar(exists=self.matSelector_library_roots):
+            roots = cmds.optionVar(q=self.matSelector_library_roots)
+            return [roots] if isinstance(roots, str) else list(roots)
+        last_folder = self.load_last_path()
+        return [last_folder] if last_folder else []
+
+    def library_roots(self):
+        if self.lib_roots:
+            return self.lib_roots
+        if self.lib_path:
+            return [self.lib_path]
+        return self.load_roots()
+
+    def set_roots(self, roots):
+        self.lib_roots = roots
+        self.lib_path = roots[0] if roots else ""
+        self.save_roots(roots)
+        self.update_mat_list()
+        self.refresh_display()
+
+    def add_root(self, *args):
+        selected = cmds.fileDialog2(caption="Add Material Library Root", fileMode=2, okCaption="Add")
+        if selected and selected[0] not in self.library_roots():
+            self.set_roots(self.library_roots() + [selected[0]])
+
+    def remove_root(self, root):
+        self.set_roots([r for r in self.library_roots() if r != root])
+
+    def move_root(self, root, offset):
+        roots = list(self.library_roots())
+        i = roots.index(root)
+        j = max(0, min(len(roots) - 1, i + offset))
+        roots[i], roots[j] = roots[j], roots[i]
+        self.set_roots(roots)
+
+    def build_roots_menu(self, menu, *args):
+        """ Library roots in priority order, the first one wins when a material name is in several """
+        cmds.popupMenu(menu, edit=True, deleteAllItems=True)
+        roots = self.library_roots()
+        slow = {root.path for root in self.library.roots if root.slow} if self.library is not None else set()
+        for i, root in enumerate(roots):
+            label = f"{i + 1}. {root}" + ("  (network)" if root in slow else "")
+            cmds.menuItem(label=label, subMenu=True, parent=menu)
+            if i > 0:
+                cmds.menuItem(label="Move Up", command=lambda *_, r=root: self.move_root(r, -1))
+            if i < len(roots) - 1:
+                cmds.menuItem(label="Move Down", command=lambda *_, r=root: self.move_root(r, 1))
+            cmds.menuItem(label="Remove", command=lambda *_, r=root: self.remove_root(r))
+            cmds.setParent("..", menu=True)
+        if roots:
+            cmds.menuItem(divider=True, parent=menu)
+        cmds.menuItem(label="Add Library Root...", command=self.add_root, parent=menu)
+
     def open_folder_selector_dialog(self, *args):
         selected = cmds.fileDialog2(
             caption="Select Material Folder",
@@ -55,81 +209,347 @@ class MatSelector(om.MPxCommand):
             okCaption="Select"
         )
         if selected:
+            # Replaces the primary root, any other roots stay
             self.lib_path = selected[0]
-            self.save_last_path(self.lib_path)
+            self.lib_roots = [self.lib_path] + [root for root in self.library_roots()[1:] if root != self.lib_path]
+            self.save_roots(self.lib_roots)
             self.update_mat_list()
             self.sort_mats()
             self.display_mats()
 
-    def search(self, *args):
+    @traced("search")
+    def search(self, *args, keep_page=False):
         search_text = cmds.textField(self.inp_search_field, query=True, text=True).lower()
+        note(query=search_text, materials=len(self.mat_list))
+        if search_text == "":
+            self.sort_mats()
+            self.display_mats(keep_page=keep_page)
+            return
+        if is_filter_query(search_text):
+            # wood AND 4k AND has:displacement: narrows the grid instead of ranking it
+            self.sorted_mats = self.apply_filters(self.search_index.all(), search_text)
+            self.display_mats(keep_page=keep_page)
+            return
 
-        matching_materials = []
-        non_matching_materials = []
-        for base_name in sorted(self.mat_list):
-            if base_name.lower().startswith(search_text):
-                matching_materials.append(base_name)
-            else:
-                non_matching_materials.append(base_name)
+        # Keep non-matching materials below the matches, in library order
+        matching_materials = self.search_index.search(search_text)
+        matching = set(matching_materials)
+        non_matching_materials = [base_name for base_name in self.search_index.all() if base_name not in matching]
+
+        self.sorted_mats = self.apply_filters(matching_materials + non_matching_materials)
+        self.display_mats(keep_page=keep_page)
+
+    def apply_filters(self, mats, query=""):
+        """ mats, in order, narrowed to the filter chips and query """
+        allowed = None
+        for term in self.filters + ([query] if query else []):
+            try:
+                names = self.filter_index.query(term, self.search_index.substring)
+            except ValueError as e:
+                cmds.inViewMessage(amg=str(e), pos='midCenter', fade=True)
+                continue
+            allowed = names if allowed is None else allowed & names
+        if allowed is None:
+            return mats
+        return [mat for mat in mats if mat in allowed]
+
+    def add_filter(self, term):
+        if term not in self.filters:
+            self.filters.append(term)
+            self.update_chips()
+            self.refresh_display()
+
+    def remove_filter(self, term=None):
+        """ Removes one chip, or all of them """
+        self.filters = [t for t in self.filters if term is not None and t != term]
+        self.update_chips()
+        self.refresh_display()
+
+    def update_chips(self):
+        if not self.lyt_chips or not cmds.flowLayout(self.lyt_chips, exists=True):
+            return
+        # The first child is the "+ Filter" button
+        for chip in (cmds.flowLayout(self.lyt_chips, query=True, childArray=True) or [])[1:]:
+            cmds.deleteUI(chip)
+        for term in self.filters:
+            cmds.button(label=f"{term}  x", command=lambda *_, t=term: self.remove_filter(t), parent=self.lyt_chips)
+
+    def build_filter_menu(self, menu, *args):
+        """ Facet values with their counts, filled in when the menu opens """
+        cmds.popupMenu(menu, edit=True, deleteAllItems=True)
+        for facet in FACETS:
+            counts = self.filter_index.counts(facet)
+            if not counts:
+                continue
+            cmds.menuItem(label=facet.capitalize(), subMenu=True, parent=menu)
+            for value, count in counts[:40]:
+                term = f"{facet}:{value}"
+                cmds.menuItem(label=f"{value} ({count})", command=lambda *_, t=term: self.add_filter(t))
+            cmds.setParent("..", menu=True)
+        search_text = cmds.textField(self.inp_search_field, query=True, text=True).strip()
+        if search_text:
+            cmds.menuItem(divider=True, parent=menu)
+            cmds.menuItem(label=f"Add '{search_text}'", command=lambda *_: self.add_filter(search_text.lower()), parent=menu)
+        if self.filters:
+            cmds.menuItem(label="Clear Filters", command=lambda *_: self.remove_filter(), parent=menu)
+
+    def filter_library(self, query):
+        if not self.mat_list:
+            self.mat_list = self.open_library().mat_list
+        self.search_index.update(self.mat_list)
+        self.filter_index.update(self.mat_list)
+        return sorted(self.filter_index.query(query, self.search_index.substring))
+
+    def search_changed(self, *args):
+        if not cmds.checkBox(self.chk_live_search, query=True, value=True):
+            return
+
+        # Debounce: only search once typing pauses for search_delay seconds
+        if self.search_timer is not None:
+            self.search_timer.cancel()
+        self.search_timer = threading.Timer(self.search_delay, maya.utils.executeDeferred, args=(self.live_search,))
+        self.search_timer.daemon = True
+        self.search_timer.start()
+
+    def live_search(self):
+        self.search_timer = None
+        if self.inp_search_field and cmds.textField(self.inp_search_field, exists=True):
+            self.search()
+
+    def toggle_live_search(self, value):
+        cmds.optionVar(intValue=(self.matSelector_live_search, int(value)))
+        if value:
+            self.search()
+
+    def load_live_search(self):
+        if cmds.optionVar(exists=self.matSelector_live_search):
+            return bool(cmds.optionVar(q=self.matSelector_live_search))
+        return True
+
+    def toggle_reference(self, value):
+        cmds.optionVar(intValue=(self.matSelector_reference, int(value)))
 
-        self.sorted_mats = matching_materials + non_matching_materials
-        self.display_mats()
+    def load_reference(self):
+        if cmds.optionVar(exists=self.matSelector_reference):
+            return bool(cmds.optionVar(q=self.matSelector_reference))
+        return False
 
     def sort_mats(self):
-        self.sorted_mats = []
-        for base_name in sorted(self.mat_list):
-            self.sorted_mats.append(base_name)
+        self.sorted_mats = self.apply_filters(self.search_index.all())
+
+    def index_cache_dir(self):
+        """ Local copies of the indexes of roots on network storage """
+        return os.path.join(cmds.internalVar(userAppDir=True), "matSelector", "indexCache")
+
+    def open_library(self):
+        """ The MatLibraryFederation of the current roots, loaded from their indexes """
+        roots = self.library_roots()
+        if self.library is None or self.library.root_paths != roots:
+            if self.library is not None:
+                self.library.cancel()
+            self.library = MatLibraryFederation(roots, self.index_cache_dir())
+            self.library.load()
+        return self.library
 
     def update_mat_list(self):
-        if not os.path.exists(self.lib_path):
-            cmds.inViewMessage(amg=f"Folder '{self.lib_path}' missing", pos='midCenter', fade=True)
+        self.cancel_scan()
+        if not self.library_roots():
+            cmds.inViewMessage(amg="Select a material library folder", pos='midCenter', fade=True)
             return
 
-        self.mat_list = {}
-        for mat in os.listdir(self.lib_path):
-            full_path = os.path.join(self.lib_path, mat)
-            if os.path.isdir(full_path):
-                self.load_mat(mat)
-
-    def load_mat(self, mat):
-        full_mat_path = os.path.join(self.lib_path, mat)
-        if not os.path.exists(full_mat_path):
-            cmds.inViewMessage(amg=f"Missing '{full_mat_path}'. Ignoring", pos='midCenter', fade=True)
-            return
-        ma_path = os.path.join(self.lib_path, mat, mat+".ma")
-        if not os.path.exists(ma_path):
-            cmds.inViewMessage(amg=f"Missing '{ma_path}'. Ignoring", pos='midCenter', fade=True)
+        # Show what the indexes already know straight away, the scans fill in the changes
+        library = self.open_library()
+        self.mat_list = library.mat_list
+        self.search_index.update(self.mat_list)
+        self.filter_index.update(self.mat_list)
+        self.start_scan()
+
+    def start_scan(self):
+        library = self.library
+        self.scan_problems = []
+        library.start(
+            on_batch=lambda batch: maya.utils.executeDeferred(self.apply_scan_batch, library, batch),
+            on_done=lambda scan: maya.utils.executeDeferred(self.finish_scan, library, scan),
+        )
+        self.update_refresh_btn()
+
+    def cancel_scan(self):
+        if self.library is not None:
+            self.library.cancel()
+
+    def window_exists(self):
+        return bool(self.window) and cmds.window(self.window, exists=True)
+
+    def apply_scan_batch(self, library, batch):
+        if library is not self.library or not library.is_current(batch.generation):
+            return  # Batch from a library that has been replaced, or from a scan a refresh took over from
+        if not self.window_exists():
+            library.cancel()
+
+        # mat_list is the library's merged view, only the search and filter indexes need updating
+        for mat in library.apply(batch):
+            data = self.mat_list.get(mat)
+            if data is None:
+                self.search_index.remove(mat)
+                self.filter_index.remove(mat)
+            else:
+                self.search_index.add(mat)
+                self.filter_index.add(mat, data["meta"])
+        self.scan_problems.extend(batch.problems)
+
+        if self.window_exists():
+            self.refresh_display()
+
+    def finish_scan(self, library, scan):
+        if library is not self.library:
             return
-        prev_path = os.path.join(self.lib_path, mat, mat+".png")
-        if not os.path.exists(ma_path):
-            cmds.inViewMessage(amg=f"Missing '{prev_path}'", pos='midCenter', fade=True)
+        remaining = library.finish(scan)
+        if remaining is None:
+            return  # A scan a refresh took over from
+        if isinstance(scan.error, FileNotFoundError):
+            cmds.inViewMessage(amg=f"Folder '{scan.root.path}' missing", pos='midCenter', fade=True)
+        elif scan.error is not None:
+            cmds.inViewMessage(amg=f"Scanning '{scan.root.path}' failed: {scan.error}", pos='midCenter', fade=True)
+        if remaining:
+            return  # Other roots still scanning
+
+        if self.window_exists():
+            self.report_invalid_mats(self.scan_problems)
+            self.refresh_display()
+            self.update_refresh_btn()
+
+    def update_refresh_btn(self):
+        if self.btn_refresh and cmds.button(self.btn_refresh, exists=True):
+            label = "Cancel Scan" if self.library is not None and self.library.scanning() else "Refresh"
+            cmds.button(self.btn_refresh, edit=True, label=label)
+
+    def report_invalid_mats(self, problems):
+        """ problems: (kind, path) from the scan, see LibraryShard.problems """
+        messages = []
+        for kind, path in problems:
+            if kind == "ma":
+                messages.append(f"Missing '{path}'. Ignoring")
+            else:
+                messages.append(f"Missing '{path}', right-click Refresh to generate previews")
+
+        if len(messages) > 5:
+            messages = [f"{len(messages)} materials have missing .ma or preview files, right-click Refresh to generate previews"]
+        for message in messages:
+            cmds.inViewMessage(amg=message, pos='midCenter', fade=True)
+
+    def generate_previews(self, renderer="auto", force=False, background=False):
+        """ Renders (or composites) the missing and stale previews of the library, see PreviewGenerator """
+        # Every root and category folder is a flat folder of materials to PreviewGenerator
+        try:
+            generators = [PreviewGenerator(path, renderer, force=force) for path in self.open_library().shard_paths()]
+        except (ValueError, RuntimeError) as e:
+            cmds.inViewMessage(amg=str(e), pos='midCenter', fade=True)
+            return []
 
-        self.mat_list[mat] = {"ma_path": ma_path, "prev_path": prev_path}
+        def run_all():
+            return [job for generator in generators for job in generator.run()]
+
+        if not background:
+            jobs = run_all()
+            self.previews_done(jobs)
+            return jobs
+
+        def run_in_background():
+            # mayapy workers run outside Maya, the thread only waits on them
+            rendered = [(generator, generator.render_stale()) for generator in generators]
+
+            def finish_all():
+                return [job for generator, jobs in rendered for job in generator.finish(jobs)]
+
+            if has_pillow():
+                maya.utils.executeDeferred(self.previews_done, finish_all())
+            else:
+                # Compositing falls back to MImage, which has to run on the main thread
+                maya.utils.executeDeferred(lambda: self.previews_done(finish_all()))
+
+        thread = threading.Thread(target=run_in_background)
+        thread.daemon = True
+        thread.start()
+        cmds.inViewMessage(amg="Generating previews...", pos='midCenter', fade=True)
+        return []
+
+    def previews_done(self, jobs):
+        for job in jobs:
+            if job.method is None:
+                om.MGlobal.displayWarning(f"No preview for '{job.mat}': {job.message}")
+        om.MGlobal.displayInfo(summarize_previews(jobs))
+        if jobs and self.window_exists():
+            self.refresh_directory()
 
     def open_mat(self, mat_path):
-        cmds.file(mat_path, i=True, ignoreVersion=True)
-
-    def display_mats(self):
-        columns = 4
-        cell_width = (self.width-5*2)/columns # include 5px padding on both sides
-        cell_height = cell_width + 30
-
-        if cmds.layout("grid", exists=True):
-            cmds.deleteUI("grid")
-
-        self.lyt_grid = cmds.gridLayout("grid", numberOfColumns=columns, cellWidth=cell_width, cellHeight=cell_height, parent=self.lyt_scroll)
-
-        for base_name in self.sorted_mats:
-            cmds.columnLayout(parent=self.lyt_grid)
-            cmds.iconTextButton(
-                image3=self.mat_list[base_name]["prev_path"],
-                style="iconOnly",
-                width=cell_width,
-                height=cell_width,
-                command=lambda ma_path=self.mat_list[base_name]["ma_path"]: self.open_mat(ma_path),
-            )
-            cmds.text(label=base_name, align="center")
-            cmds.setParent('..')
+        sg, loaded = self.scene_materials.bring_in(mat_path, reference=self.load_reference())
+        if sg is None:
+            om.MGlobal.displayWarning(f"No shading group in '{mat_path}'" if loaded else f"Material file '{mat_path}' missing")
+            return
+        name = os.path.splitext(os.path.basename(mat_path))[0]
+        if not loaded:
+            cmds.inViewMessage(amg=f"'{name}' is already in the scene, reusing {sg}", pos='midCenter', fade=True)
+        cmds.select(surface_shader(sg) or sg, replace=True)
+
+    def material_path(self, mat):
+        """ .ma path of a library material name, or mat itself if it already is a .ma path """
+        if mat.lower().endswith(".ma") and os.path.isfile(mat):
+            return mat
+        if not self.mat_list:
+            self.mat_list = self.open_library().mat_list
+        data = self.mat_list.get(mat)
+        if data is None or not data["ma_path"]:
+            om.MGlobal.displayWarning(f"Material '{mat}' not found in the library")
+            return None
+        return data["ma_path"]
+
+    def assign_mat(self, mat_path, members=None, reference=None):
+        """ Brings the material in once and assigns it to members (default: the selected geometry) in one call """
+        if members is None:
+            members = assignable_selection()
+        if not members:
+            cmds.inViewMessage(amg="Select the objects or faces to assign the material to", pos='midCenter', fade=True)
+            return 0
+        if reference is None:
+            reference = self.load_reference()
+        sg, loaded = self.scene_materials.bring_in(mat_path, reference=reference)
+        if sg is None:
+            om.MGlobal.displayWarning(f"No shading group in '{mat_path}'" if loaded else f"Material file '{mat_path}' missing")
+            return 0
+        return assign(sg, members)
+
+    def assign_from_map(self, map_path, reference=None):
+        """ Applies a mapping file of object patterns -> material names. Returns the number of objects assigned. """
+        skipped = []
+        matches = match_assignments(read_assignment_map(map_path, skipped), assignable_objects())
+        for number, line in skipped:
+            om.MGlobal.displayWarning(f"{os.path.basename(map_path)} line {number}: expected 'pattern material', skipping '{line}'")
+        assigned = 0
+        cmds.undoInfo(openChunk=True, chunkName="matSelectorAssignMap")
+        try:
+            for mat, objects in matches.items():
+                mat_path = self.material_path(mat)
+                if mat_path:
+                    assigned += self.assign_mat(mat_path, objects, reference)
+        finally:
+            cmds.undoInfo(closeChunk=True)
+        om.MGlobal.displayInfo(f"Assigned {len(matches)} materials to {assigned} objects")
+        return assigned
+
+    def display_mats(self, keep_page=False):
+        self.mat_grid.set_items(self.sorted_mats, self.mat_list, keep_page=keep_page)
+        self.update_page_lbl()
+
+    def next_page(self, *args):
+        self.mat_grid.next_page()
+        self.update_page_lbl()
+
+    def prev_page(self, *args):
+        self.mat_grid.prev_page()
+        self.update_page_lbl()
+
+    def update_page_lbl(self):
+        cmds.text(self.lbl_page, edit=True, label=self.mat_grid.page_label())
 
     def open_mat_selector(self):
         if cmds.window("materialSelectorWindow", exists=True):
@@ -138,14 +558,45 @@ class MatSelector(om.MPxCommand):
         self.window = cmds.window("materialSelectorWindow", title="Material Selector", widthHeight=(self.width, self.height), sizeable=False)
         main_layout = cmds.formLayout(parent=self.window)
         folder_button = cmds.button(label="Select Material Lib Folder", command=self.open_folder_selector_dialog, parent=main_layout)
+        # Right-click: the other library roots and their priorities
+        roots_menu = cmds.popupMenu(parent=folder_button)
+        cmds.popupMenu(roots_menu, edit=True, postMenuCommand=lambda *_: self.build_roots_menu(roots_menu))
 
-        row_layout = cmds.rowLayout(numberOfColumns=2, adjustableColumn=1, columnAlign=(1, 'left'), columnAttach=(2, 'both', 0), parent=main_layout)
-        self.inp_search_field = cmds.textField(placeholderText="Search for material...", parent=row_layout)
+        row_layout = cmds.rowLayout(numberOfColumns=4, adjustableColumn=1, columnAlign=(1, 'left'), columnAttach=[(2, 'both', 0), (3, 'both', 0), (4, 'both', 0)], parent=main_layout)
+        self.inp_search_field = cmds.textField(
+            placeholderText="Search for material...",
+            textChangedCommand=self.search_changed,
+            enterCommand=self.search,
+            parent=row_layout,
+        )
+        self.chk_live_search = cmds.checkBox(label="Live", value=self.load_live_search(), changeCommand=self.toggle_live_search, parent=row_layout)
+        self.chk_reference = cmds.checkBox(label="Reference", value=self.load_reference(), changeCommand=self.toggle_reference, parent=row_layout)
         cmds.button(label="Search", command=self.search, parent=row_layout)
+
+        self.lyt_chips = cmds.flowLayout(height=26, columnSpacing=4, parent=main_layout)
+        btn_filter = cmds.button(label="+ Filter", parent=self.lyt_chips)
+        filter_menu = cmds.popupMenu(parent=btn_filter, button=1)
+        cmds.popupMenu(filter_menu, edit=True, postMenuCommand=lambda *_: self.build_filter_menu(filter_menu))
+        self.update_chips()
         btn_refresh = cmds.button(label="Refresh", command=self.refresh_directory, parent=main_layout)
+        self.btn_refresh = btn_refresh
+        cmds.popupMenu(parent=btn_refresh)
+        cmds.menuItem(label="Generate Missing Previews", command=lambda *_: self.generate_previews(background=True))
+        cmds.menuItem(label="Regenerate All Previews", command=lambda *_: self.generate_previews(force=True, background=True))
+
+        page_layout = cmds.rowLayout(numberOfColumns=3, adjustableColumn=2, columnAttach=[(1, 'both', 0), (3, 'both', 0)], parent=main_layout)
+        cmds.button(label="<", width=40, command=self.prev_page, parent=page_layout)
+        self.lbl_page = cmds.text(label="", align="center", parent=page_layout)
+        cmds.button(label=">", width=40, command=self.next_page, parent=page_layout)
 
         self.lyt_scroll = cmds.scrollLayout(parent=main_layout)
 
+        # Viewport height: window minus the folder, search, filter, page and refresh rows
+        self.mat_grid = MatGrid(self.lyt_scroll, self.width, self.height - 5*30 - 10)
+        self.mat_grid.on_open = self.open_mat
+        self.mat_grid.on_assign = self.assign_mat
+        self.mat_grid.thumbnails = self.thumbnail_cache()
+
         cmds.formLayout(
             main_layout, edit=True,
             attachForm=[
@@ -154,16 +605,22 @@ class MatSelector(om.MPxCommand):
                 (folder_button, 'right', 5),
                 (row_layout, 'left', 5),
                 (row_layout, 'right', 5),
+                (self.lyt_chips, 'left', 5),
+                (self.lyt_chips, 'right', 5),
                 (self.lyt_scroll, 'left', 5),
                 (self.lyt_scroll, 'right', 5),
+                (page_layout, 'left', 5),
+                (page_layout, 'right', 5),
                 (btn_refresh, 'left', 5),
                 (btn_refresh, 'right', 5),
                 (btn_refresh, 'bottom', 5)
             ],
             attachControl=[
                 (row_layout, 'top', 5, folder_button),
-                (self.lyt_scroll, 'top', 5, row_layout),
-                (self.lyt_scroll, 'bottom', 5, btn_refresh)
+                (self.lyt_chips, 'top', 5, row_layout),
+                (self.lyt_scroll, 'top', 5, self.lyt_chips),
+                (self.lyt_scroll, 'bottom', 5, page_layout),
+                (page_layout, 'bottom', 5, btn_refresh)
             ]
         )
 
@@ -0,0 +1,198 @@
+import os
+import shutil
+import hashlib
+import zipfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from textureClassifier import IMAGE_EXTENSIONS, get_classifier
+from perfTrace import note, traced
+
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def is_image(file):
+    return os.path.splitext(file)[1].lower() in IMAGE_EXTENSIONS
+
+
+def canonical_name(name, texture):
+    if texture.map_type == "preview":
+        return f"{name}{texture.ext}"
+    if texture.udim is not None:
+        return f"{name}_{texture.map_type}.{texture.udim}{texture.ext}"
+    return f"{name}_{texture.map_type}{texture.ext}"
+
+
+def selected_textures(texture_set):
+    """ The files a build needs: every tile of every chosen map, plus one preview """
+    selected = []
+    for map_type, texture in texture_set.maps.items():
+        selected.extend(texture_set.udim_tiles.get(map_type) or [texture])
+    if not texture_set.previews:
+        # Vendor previews rarely say "preview", an unrecognised image is the best guess
+        for file in texture_set.unmatched:
+            if is_image(file):
+                texture_set.unmatched.remove(file)
+                texture_set.previews.append(TextureFileName(file, os.path.splitext(file)[1]))
+                break
+    if texture_set.previews:
+        selected.append(texture_set.previews[0])
+    return selected
+
+
+@traced("rename")
+def rename_inside_dir(path, preset="default", policy=None):
+    """
+    Renames the selected map files to <name>_<map type><ext> in one classification pass.
+    Previews and other unrecognised files take <name><ext>, first come first served.
+    Returns the TextureSet with the new file names.
+    """
+    name = os.path.basename(os.path.normpath(path))
+    texture_set = get_classifier(preset).classify_files(sorted(os.listdir(path)), name, path, policy)
+
+    renames = []
+    for map_type, texture in texture_set.maps.items():
+        for tile in texture_set.udim_tiles.get(map_type) or [texture]:
+            renames.append(tile)
+
+    taken = {t.file.lower() for t in renames} | {canonical_name(name, t).lower() for t in renames}
+    for texture in texture_set.previews:
+        if canonical_name(name, texture).lower() not in taken:
+            renames.append(texture)
+            taken.add(canonical_name(name, texture).lower())
+    for file in texture_set.unmatched:
+        ext = os.path.splitext(file)[1]
+        if f"{name}{ext}".lower() not in taken and os.path.isfile(os.path.join(path, file)):
+            texture = TextureFileName(file, ext)
+            renames.append(texture)
+            taken.add(f"{name}{ext}".lower())
+
+    renamed = {}
+    for texture in renames:
+        new_file = canonical_name(name, texture)
+        if texture.file != new_file:
+            shutil.move(os.path.join(path, texture.file), os.path.join(path, new_file))
+            renamed[texture.file] = new_file
+            texture.file = new_file
+
+    texture_set.unmatched = [renamed.get(f, f) for f in texture_set.unmatched]
+    note(files=len(renamed))
+    return texture_set
+
+
+class TextureFileName:
+    """ Stand-in for an unclassified file that is renamed like a preview """
+    map_type = "preview"
+    udim = None
+
+    def __init__(self, file, ext):
+        self.file = file
+        self.ext = ext
+
+
+def replace_file(src, dst):
+    """ Copies src to dst through a temporary file: a dst hardlinked into the texture store is replaced, not rewritten """
+    tmp_path = f"{dst}.{os.getpid()}.{threading.get_ident()}.part"
+    try:
+        shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, dst)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+@traced("copy")
+def copy_material_files(input_path, output_path, preset="default", policy=None, store=None):
+    """
+    Copies only the files a build needs, straight to their canonical names.
+    With a TextureStore the files are linked from the library's content-addressed store instead.
+    Returns the TextureSet describing output_path.
+    """
+    if not os.path.exists(output_path):
+        os.makedirs(output_path)
+
+    name = os.path.basename(os.path.normpath(output_path))
+    files = sorted(f for f in os.listdir(input_path) if os.path.isfile(os.path.join(input_path, f)))
+    texture_set = get_classifier(preset).classify_files(files, name, output_path, policy)
+
+    for texture in selected_textures(texture_set):
+        file_path = os.path.join(input_path, texture.file)
+        new_file = canonical_name(name, texture)
+        new_file_path = os.path.join(output_path, new_file)
+        if os.path.normcase(os.path.abspath(file_path)) == os.path.normcase(os.path.abspath(new_file_path)):
+            continue
+        if os.path.normcase(os.path.abspath(input_path)) == os.path.normcase(os.path.abspath(output_path)):
+            shutil.move(file_path, new_file_path)
+        elif store is not None and texture.map_type != "preview":
+            store.ingest(file_path, new_file_path)
+        else:
+            replace_file(file_path, new_file_path)
+        texture.file = new_file
+    note(files=len(selected_textures(texture_set)))
+    return texture_set
+
+
+def copy_member(zip_ref, member, dst_path, store=None):
+    tmp_path = dst_path + ".part"
+    sha = hashlib.sha256() if store is not None else None
+    with zip_ref.open(member, 'r') as src, open(tmp_path, 'wb') as dst:
+        if sha is None:
+            shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+        else:
+            # Hash while streaming so the store never has to read the file back
+            for chunk in iter(lambda: src.read(COPY_CHUNK_SIZE), b""):
+                sha.update(chunk)
+                dst.write(chunk)
+    os.replace(tmp_path, dst_path)
+    if store is not None:
+        store.adopt(dst_path, sha.hexdigest())
+
+
+def extract_member(zip_path, member, dst_path, store=None):
+    # Each call opens its own handle so members can be inflated in parallel
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        copy_member(zip_ref, member, dst_path, store)
+
+
+@traced("unzip")
+def extract_material_zip(zip_path, output_path, preset="default", policy=None, workers=1, store=None):
+    """
+    Classifies the members from the ZIP's central directory, then streams only the selected
+    maps (and one preview) straight to their canonical names. Nothing else is extracted.
+    With a TextureStore each map is swapped for a link to its blob once written.
+    Returns the TextureSet describing output_path.
+    """
+    if not os.path.exists(output_path):
+        os.makedirs(output_path)
+
+    name = os.path.basename(os.path.normpath(output_path))
+    members = {}
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        for info in zip_ref.infolist():
+            if info.is_dir() or "__MACOSX" in info.filename:
+                continue
+            # Packs often nest their files in a folder, the folder is dropped
+            members.setdefault(info.filename.replace("\\", "/").rsplit("/", 1)[-1], info.filename)
+
+        texture_set = get_classifier(preset).classify_files(sorted(members), name, output_path, policy)
+
+        jobs = []
+        for texture in selected_textures(texture_set):
+            new_file = canonical_name(name, texture)
+            member_store = store if texture.map_type != "preview" else None
+            jobs.append((members[texture.file], os.path.join(output_path, new_file), member_store))
+            texture.file = new_file
+
+        if workers > 1 and len(jobs) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(extract_member, zip_path, member, dst, member_store)
+                           for member, dst, member_store in jobs]
+                for future in futures:
+                    future.result()
+        else:
+            for member, dst, member_store in jobs:
+                copy_member(zip_ref, member, dst, member_store)
+    note(members=len(members), extracted=len(jobs))
+    return texture_set
@@ -0,0 +1,116 @@
+import os
+import re
+import json
+import time
+
+from textureValidator import probe_image
+
+META_FILE_NAME = ".material_meta.json"
+
+# Kept from the existing file on rebuild: filled in by hand (or once, on the first build)
+USER_FIELDS = ("date_added", "physical_size", "user_tags", "vendor")
+
+# Lower-case markers in file or folder names
+VENDOR_MARKERS = [
+    ("ambientcg", ["ambientcg", "-jpg", "-png"]),
+    ("polyhaven", ["polyhaven", "poly haven"]),
+    ("poliigon", ["poliigon"]),
+    ("megascans", ["megascans", "quixel"]),
+    ("texturescom", ["textures.com", "texturescom"]),
+]
+
+WORD = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])")
+# Name words that say nothing about the material
+STOP_WORDS = {"the", "and", "with", "jpg", "png", "exr", "tif", "tiff", "mat", "material", "texture", "tex"}
+TEXTURE_MAP_TYPES = ("color", "metalness", "roughness", "normalgl", "displacement", "ambientocclusion")
+
+
+def name_words(name):
+    """ "WoodFloor051_4K" -> ["wood", "floor"] """
+    words = []
+    for word in WORD.findall(name):
+        word = word.lower()
+        if len(word) >= 3 and word not in STOP_WORDS and word not in words:
+            words.append(word)
+    return words
+
+
+def resolution_label(width, height):
+    size = max(width, height)
+    k = int(round(size / 1024.0))
+    return f"{k}k" if k >= 1 else f"{size}px"
+
+
+def guess_vendor(names):
+    text = " ".join(names).lower()
+    for vendor, markers in VENDOR_MARKERS:
+        if any(marker in text for marker in markers):
+            return vendor
+    return None
+
+
+def map_resolution(texture_set):
+    """ Resolution label of the main map, from its header only """
+    for map_type in TEXTURE_MAP_TYPES + tuple(texture_set.maps):
+        path = texture_set.path(map_type)
+        if path is None:
+            continue
+        try:
+            info = probe_image(path)
+        except (OSError, ValueError):
+            continue
+        return resolution_label(info.width, info.height)
+    return None
+
+
+def read_metadata(mat_dir):
+    try:
+        with open(os.path.join(mat_dir, META_FILE_NAME), "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def extract_metadata(mat_dir, mat_name, texture_set, template=None, previous=None):
+    """
+    Facets of a built material: category and tags from its name, resolution, maps, vendor,
+    templates built and the date added. previous is the existing metadata, whose hand-edited fields are kept.
+    """
+    previous = previous or {}
+    words = name_words(mat_name)
+    user_tags = previous.get("user_tags", [])
+    maps = sorted(texture_set.maps)
+    if "normalgl" in maps or "normald" in maps:
+        maps.append("normal")
+    templates = set(previous.get("templates", []))
+    if template is not None:
+        templates.add(template)
+
+    meta = {
+        "category": words[0] if words else None,
+        "tags": sorted(set(words) | set(user_tags)),
+        "resolution": map_resolution(texture_set),
+        "maps": sorted(set(maps)),
+        "vendor": guess_vendor([mat_dir] + texture_set.unmatched + [t.file for t in texture_set.maps.values()]),
+        "templates": sorted(templates),
+        "date_added": time.strftime("%Y-%m-%d"),
+        "physical_size": None,
+        "user_tags": user_tags,
+    }
+    for field in USER_FIELDS:
+        if previous.get(field) is not None:
+            meta[field] = previous[field]
+    return meta
+
+
+def write_metadata(mat_dir, mat_name, texture_set, template=None):
+    meta = extract_metadata(mat_dir, mat_name, texture_set, template, read_metadata(mat_dir))
+    tmp_path = os.path.join(mat_dir, META_FILE_NAME + ".tmp")
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f, indent=1)
+        os.replace(tmp_path, os.path.join(mat_dir, META_FILE_NAME))
+    except OSError:
+        return None
+    return meta
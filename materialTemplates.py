@@ -0,0 +1,222 @@
+import os
+import json
+import hashlib
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+DEFAULT_TEMPLATE = "arnold"
+
+# place2dTexture -> file connections Maya makes when a file node is created with a placement node
+PLACE_2D_CONNECTIONS = [
+    ("outUV", "uvCoord"),
+    ("outUvFilterSize", "uvFilterSize"),
+    ("coverage", "coverage"),
+    ("mirrorU", "mirrorU"),
+    ("mirrorV", "mirrorV"),
+    ("noiseUV", "noiseUV"),
+    ("offset", "offset"),
+    ("repeatUV", "repeatUV"),
+    ("rotateFrame", "rotateFrame"),
+    ("rotateUV", "rotateUV"),
+    ("stagger", "stagger"),
+    ("translateFrame", "translateFrame"),
+    ("vertexCameraOne", "vertexCameraOne"),
+    ("vertexUvOne", "vertexUvOne"),
+    ("vertexUvThree", "vertexUvThree"),
+    ("vertexUvTwo", "vertexUvTwo"),
+    ("wrapU", "wrapU"),
+    ("wrapV", "wrapV"),
+]
+PLACEMENT_KEY = "place2d"
+PACKED_KEY = "packed"
+# Single-channel reads of a packed map: any of these on a packed slot become outColor<channel>
+CHANNEL_ATTRS = {"outAlpha", "outColor", "outColorR", "outColorG", "outColorB"}
+# Per-slot alpha adjustments and the per-channel file attribute that replaces them when packed
+PACKED_CHANNEL_ATTRS = {"alphaOffset": "colorOffset", "alphaGain": "colorGain"}
+CATEGORIES = {"texture", "shader", "utility", "shadingEngine"}
+UV_TILING_UDIM = 3  # file.uvTilingMode "UDIM (Mari)"
+
+
+def attr_value(value):
+    # JSON has no tuples and writes 0 for 0.0, compound values are always doubles here
+    if isinstance(value, list):
+        return tuple(float(v) for v in value)
+    return value
+
+
+def split_plug(plug, template):
+    key, sep, attr = plug.partition(".")
+    if not sep or not attr:
+        raise ValueError(f"Template '{template}': '{plug}' is not <node>.<attr>")
+    return key, attr
+
+
+class BuildPlan:
+    """
+    A material template compiled into the steps a build needs.
+    Slots are texture maps (one file node each), nodes and connections are the rest of the network.
+    Nodes and connections may carry "when"/"unless" with a slot name; anything that touches a
+    missing optional map is dropped. The node/connection list for each combination of present maps
+    is worked out once and reused for every texture set with the same maps.
+    """
+    def __init__(self, name, data):
+        self.name = name
+        # Recorded in build manifests, any edit to the template rebuilds its materials
+        self.version = hashlib.sha1(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+        self.description = data.get("description", "")
+        self.export_suffix = data.get("export_suffix", "")
+        self.placement = data.get("placement", True)
+
+        self.slots = []  # (map type, label, required, [(attr, value)])
+        for map_type, slot in data.get("slots", {}).items():
+            attrs = [(attr, attr_value(value)) for attr, value in slot.get("attrs", {}).items()]
+            self.slots.append((map_type, slot.get("label", map_type), slot.get("required", False), attrs))
+        self.slot_types = slot_types = {slot[0] for slot in self.slots}
+        if not slot_types:
+            raise ValueError(f"Template '{name}' has no slots")
+
+        self.nodes = []  # (key, type, name pattern, category, [(attr, value)], when, unless)
+        for node in data.get("nodes", []):
+            category = node.get("category", "utility")
+            if category not in CATEGORIES:
+                raise ValueError(f"Template '{name}': unknown category '{category}' on node '{node['key']}'")
+            attrs = [(attr, attr_value(value)) for attr, value in node.get("attrs", {}).items()]
+            self.nodes.append((node["key"], node["type"], node.get("name", "{name}_" + node["key"]), category,
+                               attrs, node.get("when"), node.get("unless")))
+
+        keys = slot_types | {node[0] for node in self.nodes} | ({PLACEMENT_KEY} if self.placement else set())
+        self.connections = []  # (src key, src attr, dst key, dst attr, when, unless)
+        for connection in data.get("connections", []):
+            if isinstance(connection, list):
+                connection = {"from": connection[0], "to": connection[1]}
+            src, src_attr = split_plug(connection["from"], name)
+            dst, dst_attr = split_plug(connection["to"], name)
+            for key in (src, dst):
+                if key not in keys:
+                    raise ValueError(f"Template '{name}': connection uses unknown node '{key}'")
+            self.connections.append((src, src_attr, dst, dst_attr, connection.get("when"), connection.get("unless")))
+
+        for condition in [n[5] for n in self.nodes] + [n[6] for n in self.nodes] + \
+                         [c[4] for c in self.connections] + [c[5] for c in self.connections]:
+            if condition is not None and condition not in slot_types:
+                raise ValueError(f"Template '{name}': condition on unknown slot '{condition}'")
+
+        self.variants = {}  # frozenset of present slots -> (slots, nodes, connections)
+
+    def missing_maps(self, texture_set):
+        """ Labels of required maps the texture set does not have """
+        return [label for map_type, label, required, _ in self.slots if required and texture_set.file(map_type) is None]
+
+    def export_name(self, mat_name):
+        return f"{mat_name}{self.export_suffix}.ma"
+
+    def variant(self, present, packed=None):
+        """ packed: map type -> channel ("R", "G", "B") of maps merged into one packed texture """
+        present = frozenset(map_type for map_type in present if map_type in self.slot_types)
+        packed = tuple(sorted((m, ch) for m, ch in (packed or {}).items() if m in present))
+        variant = self.variants.get((present, packed))
+        if variant is not None:
+            return variant
+        channels = dict(packed)
+
+        def active(when, unless):
+            return (when is None or when in present) and (unless is None or unless not in present)
+
+        slots = [slot for slot in self.slots if slot[0] in present and slot[0] not in channels]
+        if channels:
+            attrs = [("colorSpace", "Raw")]
+            for map_type, _, _, slot_attrs in self.slots:
+                if map_type in channels:
+                    attrs.extend((PACKED_CHANNEL_ATTRS[attr] + channels[map_type], value)
+                                 for attr, value in slot_attrs if attr in PACKED_CHANNEL_ATTRS)
+            slots.append((PACKED_KEY, "Packed", False, attrs))
+        nodes = [node for node in self.nodes if active(node[5], node[6])]
+        keys = {slot[0] for slot in slots} | {node[0] for node in nodes} | {PLACEMENT_KEY} | set(channels)
+        connections = []
+        for src, src_attr, dst, dst_attr, when, unless in self.connections:
+            if not active(when, unless) or src not in keys or dst not in keys:
+                continue
+            if src in channels:
+                if src_attr not in CHANNEL_ATTRS:
+                    raise ValueError(f"Template '{self.name}': {src}.{src_attr} cannot be read from a packed map")
+                src, src_attr = PACKED_KEY, "outColor" + channels[src]
+            connections.append((src, src_attr, dst, dst_attr))
+        if self.placement:
+            for map_type, _, _, _ in slots:
+                connections.extend((PLACEMENT_KEY, src, map_type, dst) for src, dst in PLACE_2D_CONNECTIONS)
+
+        variant = (slots, nodes, connections)
+        self.variants[(present, packed)] = variant
+        return variant
+
+    def instantiate(self, mat_name, map_files, packed=None, udim=()):
+        """
+        map_files: map type -> (file name, path), with the packed texture under "packed" if packed
+        maps the merged map types to their channel. The file nodes of the map types in udim read
+        their tiles through a <UDIM> path. Returns a ShadingGraph ready to apply.
+        """
+        from shadingGraph import ShadingGraph
+
+        slots, nodes, connections = self.variant(map_files, packed)
+        graph = ShadingGraph()
+        if self.placement:
+            graph.add_node(PLACEMENT_KEY, "place2dTexture", f"{mat_name}_place2dTexture", "utility")
+        for map_type, _, _, attrs in slots:
+            file_name, path = map_files[map_type]
+            graph.add_node(map_type, "file", file_name, "texture")
+            if map_type in udim:
+                graph.set_attr(map_type, "uvTilingMode", UV_TILING_UDIM)
+            graph.set_attr(map_type, "fileTextureName", path)
+            for attr, value in attrs:
+                graph.set_attr(map_type, attr, value)
+        for key, node_type, name, category, attrs, _, _ in nodes:
+            graph.add_node(key, node_type, name.format(name=mat_name), category)
+            for attr, value in attrs:
+                graph.set_attr(key, attr, value)
+        for connection in connections:
+            graph.connect(*connection)
+        return graph
+
+
+def template_dirs():
+    dirs = [TEMPLATE_DIR]
+    user_dirs = os.environ.get("MATERIALSPLUGIN_TEMPLATES")
+    if user_dirs:
+        # Later folders override templates of the same name
+        dirs.extend(d for d in user_dirs.split(os.pathsep) if d)
+    return dirs
+
+
+def template_path(name):
+    path = None
+    for directory in template_dirs():
+        candidate = os.path.join(directory, name + ".json")
+        if os.path.isfile(candidate):
+            path = candidate
+    return path
+
+
+def available_templates():
+    names = set()
+    for directory in template_dirs():
+        if os.path.isdir(directory):
+            names.update(os.path.splitext(f)[0] for f in os.listdir(directory) if f.endswith(".json"))
+    return sorted(names)
+
+
+_plans = {}  # name -> (path, mtime, BuildPlan)
+
+
+def get_plan(name=DEFAULT_TEMPLATE):
+    """ Compiled template, recompiled only when its file changes """
+    path = template_path(name)
+    if path is None:
+        raise KeyError(f"Unknown material template '{name}'")
+    mtime = os.stat(path).st_mtime
+    cached = _plans.get(name)
+    if cached is not None and cached[0] == path and cached[1] == mtime:
+        return cached[2]
+
+    with open(path, "r") as f:
+        plan = BuildPlan(name, json.load(f))
+    _plans[name] = (path, mtime, plan)
+    return plan
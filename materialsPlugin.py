@@ -1,8 +1,14 @@
+import os
 import sys
+import importlib
 import maya.api.OpenMaya as om
 import maya.cmds as cmds
-from matSelector import MatSelector
-from matBuildSelector import BuildMaterial, MatBuildSelector
+
+# Only the command syntax is imported at load time, the selector, builder and
+# everything they pull in load the first time a menu item or command is used
+PLUGIN_NAME = "materialsPlugin"
+PLUGIN_DIR = os.path.dirname(os.path.abspath(__file__))
+PLUGIN_WINDOWS = ["materialSelectorWindow", "buildMaterialWindow", "materialsPluginPerfWindow"]
 
 def maya_useNewAPI():
     """
@@ -11,36 +17,83 @@ def maya_useNewAPI():
     """
     pass
 
-def reload_materials_plugin(*args):
-    print("Reloading materialsPlugin")
-    plugin_name = "materialsPlugin.py"
+def load_class(module_name, class_name):
+    """ Looked up on every call, so a hot reload is picked up """
+    return getattr(importlib.import_module(module_name), class_name)
+
+def command_creator(module_name, class_name):
+    def creator():
+        return load_class(module_name, class_name).cmdCreator()
+    return creator
+
+def register_commands(plugin_fn):
+    for syntax, module_name, class_name in importlib.import_module("commandSyntax").COMMANDS:
+        plugin_fn.registerCommand(syntax.kPluginCmdName, command_creator(module_name, class_name), syntax.syntaxCreator)
 
-    if cmds.pluginInfo(plugin_name, query=True, loaded=True):
-        cmds.unloadPlugin(plugin_name)
+def deregister_commands(plugin_fn):
+    for syntax, module_name, class_name in importlib.import_module("commandSyntax").COMMANDS:
+        plugin_fn.deregisterCommand(syntax.kPluginCmdName)
 
-    cmds.refresh()
-    import time
-    time.sleep(1.5)
+def configure_perf():
+    importlib.import_module("perfTrace").TRACER.configure_from_env()
+    load_class("perfWindow", "PerfWindow")().load_settings()
 
-    for module_name in ["matSelector", "matBuildSelector", "buildMaterial", "materialsPlugin"]:
-        if module_name in sys.modules:
-            del sys.modules[module_name]
+def stop_perf():
+    """ Puts maya.cmds and os back before perfTrace is dropped """
+    perf_trace = sys.modules.get("perfTrace")
+    if perf_trace is not None:
+        perf_trace.TRACER.configure(enabled=False)
 
-    cmds.loadPlugin(plugin_name)
+def plugin_modules():
+    """ Loaded modules that live next to this file, except this one """
+    names = []
+    for module_name, module in list(sys.modules.items()):
+        path = getattr(module, "__file__", None)
+        if module_name != __name__ and path and os.path.dirname(os.path.abspath(path)) == PLUGIN_DIR:
+            names.append(module_name)
+    return names
+
+def reload_materials_plugin(*args):
+    """
+    In-place hot reload: closes the plugin's windows, drops its modules so they are imported afresh
+    on next use and re-registers the commands in case their flags changed. The plugin itself stays
+    loaded, so changes to this file still need an unload and load from the Plug-in Manager.
+    """
+    for window in PLUGIN_WINDOWS:
+        if cmds.window(window, exists=True):
+            cmds.deleteUI(window, window=True)
+
+    plugin_fn = om.MFnPlugin(om.MFnPlugin.findPlugin(PLUGIN_NAME))
+    stop_perf()
+    deregister_commands(plugin_fn)
+    module_names = plugin_modules()
+    for module_name in module_names:
+        del sys.modules[module_name]
+    importlib.invalidate_caches()
+
+    register_commands(plugin_fn)
+    configure_perf()
+    print(f"Reloaded {len(module_names)} materialsPlugin modules")
 
 def open_material_selector(*args):
-    mat_selector = MatSelector()
+    mat_selector = load_class("matSelector", "MatSelector")()
     mat_selector.run()
 
 def open_material_builder(*args):
-    mat_builder = MatBuildSelector()
+    mat_builder = load_class("matBuildSelector", "MatBuildSelector")()
     mat_builder.run()
 
+def open_performance_window(*args):
+    perf_window = load_class("perfWindow", "PerfWindow")()
+    perf_window.run()
+
 def initializePlugin(plugin):
     vendor = "GIJI676"
     version = "0.0.1"
     plugin_fn = om.MFnPlugin(plugin, vendor, version)
     try:
+        configure_perf()
+
         if not cmds.menu("MaterialsPlugin", exists=True):
             cmds.menu("MaterialsPlugin", label="Materials Plugin", parent="MayaWindow", tearOff=True)
 
@@ -56,6 +109,12 @@ def initializePlugin(plugin):
             parent="MaterialsPlugin",
             command=open_material_builder,
         )
+        cmds.menuItem(
+            "perfWindowItem",
+            label="Performance",
+            parent="MaterialsPlugin",
+            command=open_performance_window,
+        )
         cmds.menuItem(
             "reloadPluginItem",
             label="Reload Plugin",
@@ -63,9 +122,7 @@ def initializePlugin(plugin):
             command=reload_materials_plugin,
         )
 
-        plugin_fn.registerCommand(MatSelector.kPluginCmdName, MatSelector.cmdCreator)
-        plugin_fn.registerCommand(MatBuildSelector.kPluginCmdName, MatBuildSelector.cmdCreator)
-        plugin_fn.registerCommand(BuildMaterial.kPluginCmdName, BuildMaterial.cmdCreator)
+        register_commands(plugin_fn)
 
     except Exception as e:
         sys.stderr.write(
@@ -80,14 +137,15 @@ def uninitializePlugin(plugin):
             cmds.deleteUI("matSelectorItem")
         if cmds.menuItem("matBuilderItem", exists=True):
             cmds.deleteUI("matBuilderItem")
+        if cmds.menuItem("perfWindowItem", exists=True):
+            cmds.deleteUI("perfWindowItem")
         if cmds.menuItem("reloadPluginItem", exists=True):
             cmds.deleteUI("reloadPluginItem")
         if cmds.menu("MaterialsPlugin", exists=True):
             cmds.deleteUI("MaterialsPlugin", menu=True)
 
-        plugin_fn.deregisterCommand(MatSelector.kPluginCmdName)
-        plugin_fn.deregisterCommand(MatBuildSelector.kPluginCmdName)
-        plugin_fn.deregisterCommand(BuildMaterial.kPluginCmdName)
+        deregister_commands(plugin_fn)
+        stop_perf()
 
     except Exception as e:
         sys.stderr.write(
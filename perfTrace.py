@@ -0,0 +1,294 @@
+"""
+Timed spans around the plugin's hot paths, written to a rolling JSON-lines log.
+
+    with span("search", query=text):
+        ...
+
+    @traced("unzip")
+    def extract_material_zip(...):
+
+Each span records its wall time and the filesystem and maya.cmds calls made while it ran (from any
+thread, so a span that overlaps a background scan also counts the scan's calls). Disabled, span()
+hands back a shared no-op object and traced() calls straight through, so the instrumentation can
+stay in the code. Turned on from the Materials Plugin > Performance window, or with
+MATERIALSPLUGIN_PERF=1 (MATERIALSPLUGIN_PERF=profile also captures cProfile stats) for mayapy and the CLI.
+"""
+import os
+import sys
+import json
+import time
+import builtins
+import functools
+import threading
+from collections import deque
+
+LOG_FILE_NAME = "perf.jsonl"
+DEFAULT_MAX_LOG_BYTES = 2 * 1024 * 1024
+RECENT_SPANS = 500
+PROFILE_TOP = 8
+ENV_VAR = "MATERIALSPLUGIN_PERF"
+LOG_ENV_VAR = "MATERIALSPLUGIN_PERF_LOG"
+FS_FUNCTIONS = [(os, "stat"), (os, "lstat"), (os, "listdir"), (os, "scandir"), (os, "replace"), (os, "rename"),
+                (os, "remove"), (os, "mkdir"), (os, "link"), (builtins, "open")]
+
+# The log is written through the originals so it never counts towards a span
+_open = builtins.open
+_replace = os.replace
+_makedirs = os.makedirs
+
+
+def default_log_path():
+    if os.environ.get(LOG_ENV_VAR):
+        return os.environ[LOG_ENV_VAR]
+    return os.path.join(os.path.expanduser("~"), ".materialsPlugin", LOG_FILE_NAME)
+
+
+class NullSpan:
+    """ What span() returns while tracing is off """
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.parent = None
+        self.profile = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        stack = self.tracer.stack()
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+        if self.tracer.profiling and not stack[:-1]:
+            self.profile = self.tracer.start_profile()
+        self.fs, self.cmds = self.tracer.counts[0], self.tracer.counts[1]
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        ms = (time.perf_counter() - self.start) * 1000
+        record = {
+            "ts": round(time.time(), 3),
+            "span": self.name,
+            "ms": round(ms, 3),
+            "fs": self.tracer.counts[0] - self.fs,
+            "cmds": self.tracer.counts[1] - self.cmds,
+            "thread": threading.current_thread().name,
+            "parent": self.parent,
+        }
+        record.update(self.attrs)
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        if self.profile is not None:
+            record.update(self.tracer.stop_profile(self.profile, self.name))
+        self.tracer.stack().pop()
+        self.tracer.record(record)
+        return False
+
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.profiling = False
+        self.log_path = default_log_path()
+        self.max_log_bytes = DEFAULT_MAX_LOG_BYTES
+        self.recent = deque(maxlen=RECENT_SPANS)
+
+        self.counts = [0, 0]  # filesystem, maya.cmds calls so far
+        self.lock = threading.Lock()
+        self.log_lock = threading.Lock()
+        self.local = threading.local()
+        self.originals = {}  # (module, name) -> function replaced by a counting wrapper
+        self.profile_lock = threading.Lock()
+
+    def stack(self):
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def configure(self, enabled=None, profile=None, log_path=None, max_log_bytes=None):
+        if log_path is not None:
+            self.log_path = log_path
+        if max_log_bytes is not None:
+            self.max_log_bytes = max_log_bytes
+        if profile is not None:
+            self.profiling = bool(profile)
+        if enabled is not None:
+            self.enabled = bool(enabled)
+        if self.enabled:
+            self.install_counters()
+        else:
+            self.remove_counters()
+
+    def configure_from_env(self):
+        """ MATERIALSPLUGIN_PERF=1|profile, for mayapy and the command line tools """
+        value = os.environ.get(ENV_VAR, "").lower()
+        if value in ("", "0", "off"):
+            return
+        self.configure(enabled=True, profile=value == "profile")
+
+    def wrap(self, index, fn):
+        counts, lock = self.counts, self.lock
+
+        @functools.wraps(fn)
+        def counted(*args, **kwargs):
+            with lock:
+                counts[index] += 1
+            return fn(*args, **kwargs)
+        return counted
+
+    def install_counters(self):
+        """ Counting wrappers on FS_FUNCTIONS and every maya.cmds command, if Maya is there """
+        targets = [(module, name, 0) for module, name in FS_FUNCTIONS]
+        cmds = sys.modules.get("maya.cmds")
+        if cmds is not None:
+            targets.extend((cmds, name, 1) for name in dir(cmds) if not name.startswith("_") and callable(getattr(cmds, name)))
+        for module, name, index in targets:
+            if (module, name) not in self.originals and hasattr(module, name):
+                self.originals[(module, name)] = getattr(module, name)
+                setattr(module, name, self.wrap(index, self.originals[(module, name)]))
+
+    def remove_counters(self):
+        for (module, name), fn in self.originals.items():
+            setattr(module, name, fn)
+        self.originals = {}
+
+    def start_profile(self):
+        # Only one cProfile can run at a time, a span on another thread goes without
+        if not self.profile_lock.acquire(blocking=False):
+            return None
+        # Imported here, pstats alone would double the plugin's load time
+        import cProfile
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            self.profile_lock.release()
+            return None
+        return profile
+
+    def stop_profile(self, profile, name):
+        profile.disable()
+        self.profile_lock.release()
+        import pstats
+        stats = pstats.Stats(profile)
+        hot = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:PROFILE_TOP]
+        result = {"hot": [f"{os.path.basename(file)}:{line}({func}) {ct * 1000:.1f}ms"
+                          for (file, line, func), (cc, nc, tt, ct, callers) in hot]}
+        profile_dir = os.path.join(os.path.dirname(self.log_path), "profiles")
+        stamp = f"{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1000) % 1000:03d}"
+        profile_path = os.path.join(profile_dir, f"{name}_{stamp}.prof")
+        try:
+            _makedirs(profile_dir, exist_ok=True)
+            stats.dump_stats(profile_path)
+            result["profile"] = profile_path
+        except OSError:
+            pass
+        return result
+
+    def record(self, record):
+        with self.lock:
+            self.recent.append(record)
+        with self.log_lock:
+            self.write(json.dumps(record, default=str) + "\n")
+
+    def write(self, line):
+        try:
+            try:
+                f = _open(self.log_path, "a")
+            except FileNotFoundError:
+                _makedirs(os.path.dirname(self.log_path), exist_ok=True)
+                f = _open(self.log_path, "a")
+            with f:
+                f.write(line)
+                size = f.tell()
+            if size > self.max_log_bytes:
+                _replace(self.log_path, self.log_path + ".1")
+        except OSError:
+            # Timings are still kept in memory for the Performance window
+            pass
+
+    def clear(self):
+        with self.lock:
+            self.recent.clear()
+
+    def summary(self):
+        """ {span: {"count", "total_ms", "avg_ms", "max_ms", "last_ms", "fs", "cmds"}} over the recent spans """
+        summary = {}
+        for record in list(self.recent):
+            stats = summary.setdefault(record["span"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "fs": 0, "cmds": 0})
+            stats["count"] += 1
+            stats["total_ms"] += record["ms"]
+            stats["max_ms"] = max(stats["max_ms"], record["ms"])
+            stats["last_ms"] = record["ms"]
+            stats["fs"] += record["fs"]
+            stats["cmds"] += record["cmds"]
+        for stats in summary.values():
+            stats["avg_ms"] = stats["total_ms"] / stats["count"]
+        return summary
+
+
+TRACER = Tracer()
+
+
+def span(name, **attrs):
+    if not TRACER.enabled:
+        return NULL_SPAN
+    return Span(TRACER, name, attrs)
+
+
+def note(**attrs):
+    """ Adds attributes to the innermost span running on this thread """
+    if TRACER.enabled:
+        stack = TRACER.stack()
+        if stack:
+            stack[-1].set(**attrs)
+
+
+def traced(name):
+    """ Decorator: the whole call is one span """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return fn(*args, **kwargs)
+            with Span(TRACER, name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def format_summary(summary):
+    lines = [f"{'span':<20} {'count':>6} {'avg ms':>9} {'max ms':>9} {'last ms':>9} {'fs/call':>8} {'cmds/call':>9}"]
+    for name, stats in sorted(summary.items(), key=lambda item: -item[1]["total_ms"]):
+        count = stats["count"]
+        lines.append(f"{name:<20} {count:>6} {stats['avg_ms']:>9.1f} {stats['max_ms']:>9.1f} {stats['last_ms']:>9.1f} "
+                     f"{stats['fs'] / count:>8.0f} {stats['cmds'] / count:>9.0f}")
+    return "\n".join(lines)
+
+
+def format_record(record):
+    extra = {key: value for key, value in record.items()
+             if key not in ("ts", "span", "ms", "fs", "cmds", "thread", "parent", "hot")}
+    text = f"{time.strftime('%H:%M:%S', time.localtime(record['ts']))} {record['span']:<20} {record['ms']:>9.1f} ms " \
+           f"fs {record['fs']} cmds {record['cmds']}"
+    if extra:
+        text += " " + " ".join(f"{key}={value}" for key, value in extra.items())
+    for hot in record.get("hot", []):
+        text += f"\n    {hot}"
+    return text
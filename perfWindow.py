@@ -0,0 +1,83 @@
+import os
+import maya.cmds as cmds
+
+from perfTrace import TRACER, LOG_FILE_NAME, format_record, format_summary
+
+RECENT_SHOWN = 40
+
+
+class PerfWindow:
+    """ Materials Plugin > Performance: recent span timings and the switches for recording and profiling """
+    def __init__(self):
+        self.perf_enabled = "materialsPlugin_perf"
+        self.perf_profile = "materialsPlugin_perf_profile"
+
+        self.window = None
+        self.chk_enabled = None
+        self.chk_profile = None
+        self.fld_report = None
+
+    def load_settings(self):
+        """ Applies the saved switches to the tracer, called when the plugin loads """
+        enabled = cmds.optionVar(exists=self.perf_enabled) and bool(cmds.optionVar(q=self.perf_enabled))
+        profile = cmds.optionVar(exists=self.perf_profile) and bool(cmds.optionVar(q=self.perf_profile))
+        log_path = os.path.join(cmds.internalVar(userAppDir=True), "materialsPlugin", LOG_FILE_NAME)
+        TRACER.configure(enabled=enabled or TRACER.enabled, profile=profile or TRACER.profiling, log_path=log_path)
+
+    def toggle_enabled(self, value):
+        cmds.optionVar(intValue=(self.perf_enabled, int(value)))
+        TRACER.configure(enabled=value)
+        self.refresh()
+
+    def toggle_profile(self, value):
+        cmds.optionVar(intValue=(self.perf_profile, int(value)))
+        TRACER.configure(profile=value)
+
+    def clear(self, *args):
+        TRACER.clear()
+        self.refresh()
+
+    def refresh(self, *args):
+        if not self.fld_report or not cmds.scrollField(self.fld_report, exists=True):
+            return
+        if not TRACER.recent:
+            text = "No timings yet." if TRACER.enabled else "Turn on 'Record timings', then use the selector or builder."
+        else:
+            recent = list(TRACER.recent)[-RECENT_SHOWN:]
+            text = format_summary(TRACER.summary()) + "\n\nMost recent first:\n" + "\n".join(
+                format_record(record) for record in reversed(recent))
+        cmds.scrollField(self.fld_report, edit=True, text=text)
+
+    def run(self):
+        if cmds.window("materialsPluginPerfWindow", exists=True):
+            cmds.deleteUI("materialsPluginPerfWindow", window=True)
+
+        self.window = cmds.window("materialsPluginPerfWindow", title="Materials Plugin Performance", widthHeight=(640, 420))
+        main_layout = cmds.formLayout(parent=self.window)
+        row_layout = cmds.rowLayout(numberOfColumns=4, adjustableColumn=2, parent=main_layout)
+        self.chk_enabled = cmds.checkBox(label="Record timings", value=TRACER.enabled, changeCommand=self.toggle_enabled, parent=row_layout)
+        self.chk_profile = cmds.checkBox(label="Profile (cProfile)", value=TRACER.profiling, changeCommand=self.toggle_profile, parent=row_layout)
+        cmds.button(label="Refresh", command=self.refresh, parent=row_layout)
+        cmds.button(label="Clear", command=self.clear, parent=row_layout)
+        self.fld_report = cmds.scrollField(editable=False, wordWrap=False, font="fixedWidthFont", parent=main_layout)
+        lbl_log = cmds.text(label=f"Log: {TRACER.log_path}", align="left", parent=main_layout)
+
+        cmds.formLayout(
+            main_layout, edit=True,
+            attachForm=[
+                (row_layout, 'top', 5),
+                (row_layout, 'left', 5),
+                (row_layout, 'right', 5),
+                (self.fld_report, 'left', 5),
+                (self.fld_report, 'right', 5),
+                (lbl_log, 'left', 5),
+                (lbl_log, 'right', 5),
+                (lbl_log, 'bottom', 5),
+            ],
+            attachControl=[
+                (self.fld_report, 'top', 5, row_layout),
+                (self.fld_report, 'bottom', 5, lbl_log),
+            ]
+        )
+        self.refresh()
+        cmds.showWindow(self.window)
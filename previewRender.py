@@ -0,0 +1,379 @@
+"""
+Preview generation for library materials: <mat>/<mat>.png, the image MatSelector shows.
+
+    mayapy previewRender.py --library D:/library --workers 4
+    python previewRender.py --library D:/library --renderer composite
+
+Materials without a preview, or whose generated preview is older than their .ma, are rendered
+on a shader ball with Arnold by mayapy workers (one process each, like matBuildCli). Without a
+renderer, or when a render fails, a composite of the color map shaded like a sphere is written
+instead, which needs no Maya at all. What was generated from which .ma mtime is kept in
+.preview_cache.json in the library root; previews shipped with the textures are left alone.
+"""
+import os
+import sys
+import json
+import math
+import shutil
+import logging
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from matLibraryScanner import LibraryScanner
+from textureClassifier import get_classifier
+from texturePrep import has_pillow
+from thumbnailCache import find_resizer
+
+PREVIEW_SIZE = 256
+PREVIEW_CACHE_FILE = ".preview_cache.json"
+RENDERERS = ["auto", "arnold", "composite"]
+BACKGROUND = (48, 48, 48)
+
+logger = logging.getLogger("previewRender")
+
+
+class PreviewJob:
+    def __init__(self, mat, mat_dir):
+        self.mat = mat
+        self.mat_dir = mat_dir
+        self.ma_path = os.path.join(mat_dir, mat + ".ma")
+        self.prev_path = os.path.join(mat_dir, mat + ".png")
+        self.ma_mtime = os.stat(self.ma_path).st_mtime
+        self.method = None  # "arnold" or "composite" once generated
+        self.message = ""
+
+    def to_dict(self):
+        return {"mat": self.mat, "mat_dir": self.mat_dir, "method": self.method, "message": self.message}
+
+    @staticmethod
+    def from_dict(data):
+        job = PreviewJob(data["mat"], data["mat_dir"])
+        job.method = data.get("method")
+        job.message = data.get("message", "")
+        return job
+
+
+class PreviewCache:
+    """ mat -> .ma mtime and method of every preview generated here """
+    def __init__(self, lib_path):
+        self.cache_path = os.path.join(lib_path, PREVIEW_CACHE_FILE)
+        self.entries = {}
+
+    def load(self):
+        try:
+            with open(self.cache_path, "r") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+        return self
+
+    def save(self):
+        tmp_path = self.cache_path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(self.entries, f, indent=1)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            return False
+        return True
+
+    def is_fresh(self, job):
+        if not os.path.isfile(job.prev_path):
+            return False
+        entry = self.entries.get(job.mat)
+        # Not generated here: a vendor preview, kept as it is
+        return entry is None or entry["ma_mtime"] == job.ma_mtime
+
+    def record(self, job):
+        self.entries[job.mat] = {"ma_mtime": job.ma_mtime, "method": job.method}
+
+
+def find_stale_previews(lib_path, cache, force=False):
+    jobs = []
+    for mat, mat_dir in sorted(LibraryScanner(lib_path).list_mats()):
+        try:
+            job = PreviewJob(mat, mat_dir)
+        except OSError:
+            # No .ma, nothing to preview
+            continue
+        # force regenerates only what was generated here, vendor previews are still kept
+        if not cache.is_fresh(job) or (force and job.mat in cache.entries):
+            jobs.append(job)
+    return jobs
+
+
+_sphere_shading = {}
+
+
+def sphere_shading(size):
+    """ Lambert-lit sphere as an "L" image plus its mask, computed once per size """
+    from PIL import Image
+
+    cached = _sphere_shading.get(size)
+    if cached is not None:
+        return cached
+    light = (-0.45, 0.55, 0.7)
+    norm = math.sqrt(sum(c * c for c in light))
+    light = [c / norm for c in light]
+    shade, mask = [], []
+    radius = size / 2.0 - 2
+    for y in range(size):
+        ny = (size / 2.0 - y - 0.5) / radius
+        for x in range(size):
+            nx = (x + 0.5 - size / 2.0) / radius
+            d = nx * nx + ny * ny
+            if d > 1.0:
+                shade.append(0)
+                mask.append(0)
+                continue
+            nz = math.sqrt(1.0 - d)
+            lambert = max(0.0, nx * light[0] + ny * light[1] + nz * light[2])
+            shade.append(int(255 * min(1.0, 0.15 + 0.85 * lambert)))
+            # Soft edge, one pixel wide
+            mask.append(int(255 * min(1.0, (1.0 - d) * radius / 2.0)))
+    shading = Image.new("L", (size, size))
+    shading.putdata(shade)
+    alpha = Image.new("L", (size, size))
+    alpha.putdata(mask)
+    _sphere_shading[size] = (shading, alpha)
+    return shading, alpha
+
+
+def composite_preview(job, size=PREVIEW_SIZE):
+    """
+    The color map (times AO) on a shaded sphere. Without Pillow, a plain thumbnail of the color map
+    through Maya's MImage, which is only safe on the main thread.
+    """
+    texture_set = get_classifier().classify_dir(job.mat_dir)
+    color = texture_set.path("color")
+    if color is None:
+        raise RuntimeError("No color map to composite a preview from")
+    tmp_path = job.prev_path + ".tmp.png"
+    try:
+        from PIL import Image, ImageChops
+    except ImportError:
+        resizer = find_resizer()
+        if resizer is None:
+            raise RuntimeError("Neither Pillow nor Maya is available to write a preview")
+        resizer(color, tmp_path, size)
+    else:
+        with Image.open(color) as img:
+            side = min(img.size)
+            left, top = (img.width - side) // 2, (img.height - side) // 2
+            img = img.convert("RGB").crop((left, top, left + side, top + side)).resize((size, size), Image.BILINEAR)
+        ao = texture_set.path("ambientocclusion")
+        if ao is not None:
+            with Image.open(ao) as ao_img:
+                img = ImageChops.multiply(img, ao_img.convert("L").resize((size, size), Image.BILINEAR).convert("RGB"))
+        shading, alpha = sphere_shading(size)
+        img = ImageChops.multiply(img, shading.convert("RGB"))
+        Image.composite(img, Image.new("RGB", (size, size), BACKGROUND), alpha).save(tmp_path, "PNG")
+    os.replace(tmp_path, job.prev_path)
+    job.method = "composite"
+
+
+def find_mayapy():
+    """ mayapy next to the running Maya, or the interpreter itself when it already is mayapy """
+    if os.path.basename(sys.executable).lower().startswith("mayapy"):
+        return sys.executable
+    maya_location = os.environ.get("MAYA_LOCATION")
+    if maya_location:
+        for name in ("mayapy.exe", "mayapy"):
+            candidate = os.path.join(maya_location, "bin", name)
+            if os.path.isfile(candidate):
+                return candidate
+    return shutil.which("mayapy")
+
+
+def render_preview(job, size=PREVIEW_SIZE):
+    """ Worker side, inside mayapy with mtoa loaded: the material on a lit sphere rendered by Arnold """
+    import maya.cmds as cmds
+    from sceneMaterials import SceneMaterialRegistry, assign
+
+    cmds.file(new=True, force=True)
+    ball = cmds.polySphere(name="previewBall", subdivisionsX=64, subdivisionsY=48)[0]
+    cmds.polySoftEdge(ball, angle=180, constructionHistory=False)
+    sg, _ = SceneMaterialRegistry().bring_in(job.ma_path)
+    if sg is None:
+        raise RuntimeError(f"No shading group in '{job.ma_path}'")
+    assign(sg, [ball])
+
+    camera, camera_shape = cmds.camera(focalLength=70)
+    cmds.xform(camera, translation=(0, 0, 4.2))
+    dome = cmds.shadingNode("aiSkyDomeLight", asLight=True)
+    cmds.setAttr(f"{dome}.intensity", 0.4)
+    cmds.directionalLight(rotation=(-35, -40, 0), intensity=2.2)
+
+    out_dir = tempfile.mkdtemp(prefix="matPreview_")
+    try:
+        cmds.setAttr("defaultRenderGlobals.imageFormat", 32)  # png
+        cmds.setAttr("defaultRenderGlobals.imageFilePrefix", os.path.join(out_dir, job.mat).replace("\\", "/"), type="string")
+        cmds.setAttr("defaultArnoldDriver.ai_translator", "png", type="string")
+        cmds.setAttr("defaultArnoldRenderOptions.AASamples", 4)
+        cmds.arnoldRender(width=size, height=size, camera=camera_shape, batched=True)
+
+        # The driver may add frame numbers or layer folders, take whatever png it wrote
+        rendered = [os.path.join(root, f) for root, _, files in os.walk(out_dir) for f in files if f.endswith(".png")]
+        if not rendered:
+            raise RuntimeError("Arnold wrote no image")
+        shutil.move(rendered[0], job.prev_path + ".tmp.png")
+        os.replace(job.prev_path + ".tmp.png", job.prev_path)
+        job.method = "arnold"
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+
+def render_in_maya(jobs, size=PREVIEW_SIZE):
+    """ Worker side: renders jobs one by one, recording failures in job.message """
+    import maya.standalone
+    maya.standalone.initialize(name="python")
+    try:
+        import maya.cmds as cmds
+        try:
+            cmds.loadPlugin("mtoa", quiet=True)
+        except RuntimeError as e:
+            for job in jobs:
+                job.message = f"mtoa could not be loaded: {e}"
+            return jobs
+        for job in jobs:
+            try:
+                render_preview(job, size)
+            except Exception as e:
+                job.message = str(e)
+        return jobs
+    finally:
+        maya.standalone.uninitialize()
+
+
+class PreviewGenerator:
+    """
+    Generates the missing and stale previews of a library.
+    renderer "arnold" renders through mayapy workers, "composite" only composites, "auto" renders
+    when mayapy is found. Every preview the renderer could not make is composited.
+    """
+    def __init__(self, lib_path, renderer="auto", workers=None, size=PREVIEW_SIZE, force=False, mayapy=None):
+        if renderer not in RENDERERS:
+            raise ValueError(f"Unknown preview renderer '{renderer}'")
+        self.lib_path = lib_path
+        self.workers = workers or os.cpu_count() or 1
+        self.size = size
+        self.force = force
+        self.mayapy = mayapy or (find_mayapy() if renderer != "composite" else None)
+        if renderer == "arnold" and self.mayapy is None:
+            raise RuntimeError("mayapy not found, set MAYA_LOCATION or use the composite renderer")
+        self.renderer = "arnold" if self.mayapy else "composite"
+        self.cache = PreviewCache(lib_path).load()
+
+    def render(self, jobs):
+        """ Splits jobs over mayapy worker processes and collects what they rendered """
+        rendered = {}
+        with tempfile.TemporaryDirectory(prefix="matPreview_") as tmp_dir:
+            procs = []
+            for worker_id in range(min(self.workers, len(jobs))):
+                chunk = jobs[worker_id::self.workers]
+                chunk_path = os.path.join(tmp_dir, f"chunk_{worker_id}.json")
+                report_path = os.path.join(tmp_dir, f"report_{worker_id}.json")
+                with open(chunk_path, "w") as f:
+                    json.dump({"size": self.size, "jobs": [job.to_dict() for job in chunk]}, f)
+                cmd = [self.mayapy, os.path.abspath(__file__), "--worker", chunk_path, "--report", report_path]
+                procs.append((subprocess.Popen(cmd), report_path))
+            for proc, report_path in procs:
+                proc.wait()
+                try:
+                    with open(report_path, "r") as f:
+                        for data in json.load(f):
+                            rendered[data["mat"]] = data
+                except (OSError, ValueError):
+                    pass
+        for job in jobs:
+            data = rendered.get(job.mat, {})
+            job.method = data.get("method")
+            job.message = data.get("message", "Worker failed")
+
+    def composite(self, job):
+        try:
+            composite_preview(job, self.size)
+        except Exception as e:
+            job.message = str(e)
+
+    def render_stale(self):
+        """ The missing and stale previews, rendered by the mayapy workers if there are any. Fine on any thread. """
+        jobs = find_stale_previews(self.lib_path, self.cache, self.force)
+        if jobs and self.renderer == "arnold":
+            self.render(jobs)
+        return jobs
+
+    def finish(self, jobs):
+        """ Composites what was not rendered and records the rest. Without Pillow, main thread only. """
+        fallback = [job for job in jobs if job.method is None]
+        if has_pillow():
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                list(executor.map(self.composite, fallback))
+        else:
+            for job in fallback:
+                self.composite(job)
+
+        for job in jobs:
+            if job.method is not None:
+                self.cache.record(job)
+        if jobs:
+            self.cache.save()
+        return jobs
+
+    def run(self):
+        """ Returns the jobs, each with the method that produced its preview (None if it failed) """
+        return self.finish(self.render_stale())
+
+
+def summarize(jobs):
+    counts = {}
+    for job in jobs:
+        counts[job.method or "failed"] = counts.get(job.method or "failed", 0) + 1
+    if not counts:
+        return "All previews are up to date"
+    return ", ".join(f"{count} {method}" for method, count in sorted(counts.items()))
+
+
+def run_worker(args):
+    with open(args.worker, "r") as f:
+        chunk = json.load(f)
+    jobs = render_in_maya([PreviewJob.from_dict(data) for data in chunk["jobs"]], chunk["size"])
+    with open(args.report, "w") as f:
+        json.dump([job.to_dict() for job in jobs], f)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate missing or stale material previews of a library.")
+    parser.add_argument("--library", "-l", help="Library root")
+    parser.add_argument("--renderer", choices=RENDERERS, default="auto")
+    parser.add_argument("--workers", "-w", type=int, default=os.cpu_count() or 1, help="mayapy processes / composite threads")
+    parser.add_argument("--size", type=int, default=PREVIEW_SIZE, help="Preview size in pixels")
+    parser.add_argument("--force", "-f", action="store_true", help="Regenerate every preview made here, vendor previews are kept")
+    parser.add_argument("--mayapy", help="Interpreter used for the render workers")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--report", help=argparse.SUPPRESS)
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if args.worker:
+        return run_worker(args)
+    if not args.library:
+        parser.error("--library is required")
+
+    try:
+        generator = PreviewGenerator(args.library, args.renderer, args.workers, args.size, args.force, args.mayapy)
+    except (ValueError, RuntimeError) as e:
+        logger.error(str(e))
+        return 2
+    jobs = generator.run()
+    for job in jobs:
+        if job.method is None:
+            logger.error(f"{job.mat}: {job.message}")
+    logger.info(summarize(jobs))
+    return 1 if any(job.method is None for job in jobs) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+import logging
+
+
+class ProgressSink:
+    """ Where BuildMaterial and the batch tools report progress. The base class discards everything. """
+    def status(self, label):
+        pass
+
+    def error(self, message):
+        pass
+
+
+class LogProgressSink(ProgressSink):
+    def __init__(self, logger=None, prefix=""):
+        self.logger = logger or logging.getLogger("materialsPlugin")
+        self.prefix = prefix
+
+    def status(self, label):
+        self.logger.info(f"{self.prefix}{label}")
+
+    def error(self, message):
+        self.logger.error(f"{self.prefix}{message}")
+
+
+class MayaUIProgressSink(ProgressSink):
+    """ Status goes to a cmds.text label (if any), errors to an in-view message """
+    def __init__(self, label=None):
+        self.label = label
+
+    def status(self, label):
+        import maya.cmds as cmds
+        if self.label and cmds.text(self.label, exists=True):
+            cmds.text(self.label, edit=True, label=label)
+
+    def error(self, message):
+        import maya.cmds as cmds
+        cmds.inViewMessage(amg=message, pos='midCenter', fade=True)
+
+
+def as_progress_sink(status_update, interactive=True):
+    """ Accepts a sink, a cmds.text label name, or None """
+    if isinstance(status_update, ProgressSink):
+        return status_update
+    if interactive:
+        return MayaUIProgressSink(status_update)
+    return LogProgressSink()
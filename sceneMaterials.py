@@ -0,0 +1,165 @@
+import os
+import re
+import json
+import fnmatch
+import maya.cmds as cmds
+
+# Dynamic attributes on the shading group of every network brought in from the library
+PATH_ATTR = "matLibPath"
+MTIME_ATTR = "matLibMtime"
+# "pattern material", "pattern -> material", "pattern = material" or "pattern: material" (":" alone is a namespace)
+ASSIGNMENT_LINE = re.compile(r"^(\S.*?)(?:\s*(?:->|=)\s*|:?\s+)((?!->)[^\s=]\S*)$")
+
+
+def library_key(ma_path):
+    return os.path.normcase(os.path.normpath(os.path.abspath(ma_path))).replace("\\", "/")
+
+
+class SceneMaterialRegistry:
+    """
+    Which library materials are already in the scene, keyed by .ma path and mtime.
+    Imported shading groups are tagged with the path/mtime they came from, so the registry
+    survives saving and reopening the scene; references are found through the reference list.
+    A repeat request returns the existing shading group instead of importing the file again.
+    """
+    def __init__(self):
+        self.cache = {}  # library key -> shading group, checked against the scene before use
+
+    def tagged(self, sg, key, mtime):
+        if not cmds.objExists(sg) or not cmds.attributeQuery(PATH_ATTR, node=sg, exists=True):
+            return False
+        if cmds.getAttr(f"{sg}.{PATH_ATTR}") != key:
+            return False
+        return abs(cmds.getAttr(f"{sg}.{MTIME_ATTR}") - mtime) < 1e-3
+
+    def find_imported(self, key, mtime):
+        sg = self.cache.get(key)
+        if sg is not None and self.tagged(sg, key, mtime):
+            return sg
+        for sg in cmds.ls(type="shadingEngine") or []:
+            if self.tagged(sg, key, mtime):
+                self.cache[key] = sg
+                return sg
+        return None
+
+    def find_referenced(self, key):
+        for ref_file in cmds.file(query=True, reference=True) or []:
+            # Repeat references of one file come back as "path{1}", "path{2}", ...
+            if library_key(ref_file.split("{")[0]) != key:
+                continue
+            if not cmds.referenceQuery(ref_file, isLoaded=True):
+                continue
+            for node in cmds.referenceQuery(ref_file, nodes=True) or []:
+                if cmds.nodeType(node) == "shadingEngine":
+                    return node
+        return None
+
+    def find(self, ma_path):
+        """ Shading group of ma_path already in the scene (imported from this version, or referenced) """
+        key = library_key(ma_path)
+        try:
+            mtime = os.stat(ma_path).st_mtime
+        except OSError:
+            # Gone from the library (or unreachable): only a reference to it can still be in the scene
+            return self.find_referenced(key)
+        return self.find_imported(key, mtime) or self.find_referenced(key)
+
+    def register(self, sg, ma_path):
+        key = library_key(ma_path)
+        if not cmds.attributeQuery(PATH_ATTR, node=sg, exists=True):
+            cmds.addAttr(sg, longName=PATH_ATTR, dataType="string")
+            cmds.addAttr(sg, longName=MTIME_ATTR, attributeType="double")
+        cmds.setAttr(f"{sg}.{PATH_ATTR}", key, type="string")
+        cmds.setAttr(f"{sg}.{MTIME_ATTR}", os.stat(ma_path).st_mtime)
+        self.cache[key] = sg
+
+    def bring_in(self, ma_path, reference=False):
+        """
+        Shading group of the material, importing (or referencing) the .ma only if the scene
+        does not hold it yet. Returns (shading group or None, whether the file was read), (None, False)
+        when the .ma is missing.
+        """
+        sg = self.find(ma_path)
+        if sg is not None:
+            return sg, False
+        if not os.path.isfile(ma_path):
+            return None, False
+
+        if reference:
+            namespace = os.path.splitext(os.path.basename(ma_path))[0]
+            new_nodes = cmds.file(ma_path, reference=True, namespace=namespace, returnNewNodes=True)
+        else:
+            new_nodes = cmds.file(ma_path, i=True, ignoreVersion=True, returnNewNodes=True)
+
+        sgs = [n for n in new_nodes or [] if cmds.nodeType(n) == "shadingEngine"]
+        if not sgs:
+            return None, True
+        if not reference:
+            self.register(sgs[0], ma_path)
+        return sgs[0], True
+
+
+def assign(sg, members):
+    """ Assigns sg to every object/component in members with a single sets -forceElement """
+    if not members:
+        return 0
+    cmds.sets(members, edit=True, forceElement=sg)
+    return len(members)
+
+
+def read_assignment_map(path, skipped=None):
+    """
+    Ordered (object pattern, material name) rules, first match wins. Either a JSON object/list of
+    pairs, or a text file with one "pattern material" per line, optionally separated by "->", "="
+    or ":". Patterns are fnmatch wildcards matched case-insensitively against the short name, or the
+    full DAG path if they contain "|". Text lines without both are left out, and added to skipped
+    as (line number, line) if given.
+    """
+    with open(path, "r") as f:
+        text = f.read()
+    if path.lower().endswith(".json"):
+        data = json.loads(text)
+        return list(data.items()) if isinstance(data, dict) else [tuple(rule) for rule in data]
+
+    rules = []
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        match = ASSIGNMENT_LINE.match(line)
+        if match is None:
+            if skipped is not None:
+                skipped.append((number, line))
+            continue
+        rules.append(match.groups())
+    return rules
+
+
+def assignable_objects():
+    """ Transforms of every renderable surface in the scene, as full paths """
+    shapes = cmds.ls(type=["mesh", "nurbsSurface", "subdiv"], noIntermediate=True, long=True) or []
+    return sorted(set(cmds.listRelatives(shapes, parent=True, fullPath=True) or []))
+
+
+def assignable_selection():
+    """ The selected geometry transforms and components, without lights, cameras, groups or shading nodes """
+    objects = set(assignable_objects())
+    return [node for node in cmds.ls(selection=True, long=True) or [] if "." in node or node in objects]
+
+
+def match_assignments(rules, objects):
+    """ {material name: [objects]} for the first rule each object matches """
+    compiled = [(re.compile(fnmatch.translate(pattern), re.IGNORECASE), "|" in pattern, material) for pattern, material in rules]
+    matches = {}
+    for obj in objects:
+        short_name = obj.rsplit("|", 1)[-1]
+        for regex, full_path, material in compiled:
+            if regex.match(obj if full_path else short_name):
+                matches.setdefault(material, []).append(obj)
+                break
+    return matches
+
+
+def surface_shader(sg):
+    shaders = cmds.listConnections(f"{sg}.surfaceShader", source=True, destination=False) or []
+    return shaders[0] if shaders else None
@@ -0,0 +1,147 @@
+import re
+import maya.cmds as cmds
+import maya.api.OpenMaya as om
+
+# What cmds.shadingNode -asTexture/-asShader/-asUtility and cmds.sets -renderable hook the node up to,
+# so the Hypershade and renderers see nodes created through a modifier: category -> (list node, array attr, plug)
+CATEGORY_LISTS = {
+    "texture": ("defaultTextureList1", "textures", "message"),
+    "shader": ("defaultShaderList1", "shaders", "message"),
+    "utility": ("defaultRenderUtilityList1", "utilities", "message"),
+    "shadingEngine": ("renderPartition", "sets", "partition"),
+}
+
+INVALID_NAME_RE = re.compile(r"[^A-Za-z0-9_]")
+
+
+def node_name(name):
+    """ Maya-legal node name, "Wood_Color.png" -> "Wood_Color_png" """
+    name = INVALID_NAME_RE.sub("_", name)
+    return f"_{name}" if name[:1].isdigit() else name
+
+
+def find_node(name):
+    sel = om.MSelectionList()
+    sel.add(name)
+    return sel.getDependNode(0)
+
+
+class GraphNode:
+    def __init__(self, key, node_type, name, category):
+        self.key = key
+        self.node_type = node_type
+        self.name = name
+        self.category = category
+        self.attrs = []  # (attr, value) in the order they are set
+        self.obj = None
+
+
+class ShadingGraph:
+    """
+    A shading network described as data: nodes, attribute values and connections.
+    apply() queues the whole network on one om.MDGModifier and runs a single doIt(),
+    so it costs one undo entry and can be taken back with undo().
+    """
+    def __init__(self):
+        self.nodes = {}  # key -> GraphNode, in creation order
+        self.connections = []  # (src key, src attr, dst key, dst attr)
+        self.modifier = None
+
+    def add_node(self, key, node_type, name, category="utility"):
+        self.nodes[key] = GraphNode(key, node_type, node_name(name), category)
+        return key
+
+    def set_attr(self, key, attr, value):
+        """ value: str, bool, int, float, or a tuple for compound attributes like colors """
+        self.nodes[key].attrs.append((attr, value))
+
+    def connect(self, src, src_attr, dst, dst_attr):
+        self.connections.append((src, src_attr, dst, dst_attr))
+
+    def has_node(self, key):
+        return key in self.nodes
+
+    def missing_node_types(self):
+        known = set(cmds.allNodeTypes())
+        return sorted({n.node_type for n in self.nodes.values() if n.node_type not in known})
+
+    def unique_name(self, name, taken):
+        candidate, i = name, 1
+        while candidate in taken or cmds.objExists(candidate):
+            candidate = f"{name}{i}"
+            i += 1
+        taken.add(candidate)
+        return candidate
+
+    def plug(self, key, attr):
+        return om.MFnDependencyNode(self.nodes[key].obj).findPlug(attr, False)
+
+    def queue_value(self, modifier, plug, value):
+        if isinstance(value, (tuple, list)):
+            for i, child_value in enumerate(value):
+                self.queue_value(modifier, plug.child(i), child_value)
+        elif isinstance(value, str):
+            modifier.newPlugValueString(plug, value)
+        elif isinstance(value, bool):
+            modifier.newPlugValueBool(plug, value)
+        elif isinstance(value, int):
+            modifier.newPlugValueInt(plug, value)
+        else:
+            modifier.newPlugValueDouble(plug, float(value))
+
+    def apply(self, modifier=None):
+        """ Creates the network. Returns {key: node name}. Raises RuntimeError if a plug is missing. """
+        modifier = modifier or om.MDGModifier()
+        try:
+            self.queue(modifier)
+        except RuntimeError:
+            # Nodes are created as soon as they are queued, drop them again
+            modifier.undoIt()
+            raise
+        modifier.doIt()
+        self.modifier = modifier
+        return self.names()
+
+    def queue(self, modifier):
+        taken = set()
+        next_index = {}
+
+        for node in self.nodes.values():
+            node.obj = modifier.createNode(node.node_type)
+            modifier.renameNode(node.obj, self.unique_name(node.name, taken))
+
+            list_node, list_attr, src_attr = CATEGORY_LISTS[node.category]
+            if list_node not in next_index:
+                array_plug = om.MFnDependencyNode(find_node(list_node)).findPlug(list_attr, False)
+                indices = array_plug.getExistingArrayAttributeIndices()
+                next_index[list_node] = [array_plug, max(indices) + 1 if indices else 0]
+            array_plug, index = next_index[list_node]
+            modifier.connect(self.plug(node.key, src_attr), array_plug.elementByLogicalIndex(index))
+            next_index[list_node][1] += 1
+
+        for node in self.nodes.values():
+            for attr, value in node.attrs:
+                self.queue_value(modifier, self.plug(node.key, attr), value)
+
+        for src, src_attr, dst, dst_attr in self.connections:
+            try:
+                src_plug, dst_plug = self.plug(src, src_attr), self.plug(dst, dst_attr)
+                if dst_plug.isCompound and not src_plug.isCompound:
+                    # One channel into a color: feed every component, e.g. a packed AO into input2R/G/B
+                    for i in range(dst_plug.numChildren()):
+                        modifier.connect(src_plug, dst_plug.child(i))
+                else:
+                    modifier.connect(src_plug, dst_plug)
+            except RuntimeError:
+                raise RuntimeError(f"Cannot connect {src}.{src_attr} -> {dst}.{dst_attr}")
+
+    def names(self):
+        return {key: om.MFnDependencyNode(node.obj).name() for key, node in self.nodes.items()}
+
+    def undo(self):
+        if self.modifier is not None:
+            self.modifier.undoIt()
+
+    def redo(self):
+        if self.modifier is not None:
+            self.modifier.doIt()
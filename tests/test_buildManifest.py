@@ -0,0 +1,91 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from buildManifest import BuildManifest
+from materialFiles import copy_material_files
+
+PLAN = SimpleNamespace(name="arnold", version="v1")
+
+
+def set_mtime(path, mtime):
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def built(tmp_path):
+    """ A material built from a source folder, with its manifest recorded """
+    source = tmp_path / "source"
+    source.mkdir()
+    for file in ("Oak_Color.png", "Oak_Roughness.png"):
+        (source / file).write_bytes(file.encode())
+        set_mtime(source / file, 1000)
+    output = str(tmp_path / "library" / "Oak")
+    texture_set = copy_material_files(str(source), output)
+    export_path = os.path.join(output, "Oak.ma")
+    with open(export_path, "w") as f:
+        f.write("//Maya ASCII")
+
+    manifest = BuildManifest(output)
+    manifest.record_inputs(str(source), False, None, texture_set)
+    manifest.record_build(PLAN, export_path)
+    assert manifest.save()
+    return source, output
+
+
+def scope(source, output, plan=PLAN, resolution=None, prep=None):
+    return BuildManifest(output).scope(str(source), False, resolution, plan, prep)
+
+
+def test_unchanged_is_up_to_date(built):
+    assert scope(*built) is None
+
+
+def test_new_template_version_rebuilds_the_graph(built):
+    assert scope(*built, plan=SimpleNamespace(name="arnold", version="v2")) == "graph"
+    assert scope(*built, plan=SimpleNamespace(name="usdPreviewSurface", version="v1")) == "graph"
+
+
+def test_edited_ma_rebuilds_the_graph(built):
+    _, output = built
+    with open(os.path.join(output, "Oak.ma"), "a") as f:
+        f.write("\n// edited")
+    assert scope(*built) == "graph"
+
+
+def test_changed_source_rebuilds_everything(built):
+    source, output = built
+    set_mtime(source / "Oak_Color.png", 2000)
+    assert scope(*built) == "full"
+
+
+def test_new_source_image_rebuilds_everything(built):
+    source, _ = built
+    (source / "Oak_Normal.png").write_bytes(b"normal")
+    assert scope(*built) == "full"
+
+
+def test_edited_texture_rebuilds_everything(built):
+    _, output = built
+    with open(os.path.join(output, "Oak_color.png"), "ab") as f:
+        f.write(b"painted over")
+    assert scope(*built) == "full"
+
+
+def test_other_settings_rebuild_everything(built):
+    assert scope(*built, resolution=2) == "full"
+    assert scope(*built, prep="tx") == "full"
+
+
+def test_texture_set_is_kept(built):
+    _, output = built
+    manifest = BuildManifest(output)
+    assert manifest.load()
+    texture_set = manifest.texture_set()
+    assert texture_set.file("color") == "Oak_color.png"
+    assert texture_set.path("roughness") == os.path.join(output, "Oak_roughness.png")
+
+
+def test_missing_manifest(tmp_path):
+    assert BuildManifest(str(tmp_path)).scope(str(tmp_path), False, None, PLAN) == "full"
@@ -0,0 +1,49 @@
+import os
+import zipfile
+
+from matBatchBuild import discover_texture_sets
+
+
+def texture_folder(root, *parts):
+    path = os.path.join(str(root), *parts)
+    os.makedirs(path)
+    open(os.path.join(path, "wood_color.png"), "wb").close()
+    return path
+
+
+def test_duplicate_names_get_their_parent(tmp_path):
+    bricks = texture_folder(tmp_path, "Bricks", "Wood")
+    planks = texture_folder(tmp_path, "Planks", "Wood")
+    items = discover_texture_sets([str(tmp_path)], str(tmp_path / "out"))
+    assert [(item.name, item.source) for item in items] == [("Wood", bricks), ("Planks_Wood", planks)]
+    assert items[1].output_dir == os.path.join(str(tmp_path / "out"), "Planks_Wood")
+
+
+def test_duplicate_after_parent_gets_a_number(tmp_path):
+    texture_folder(tmp_path, "a", "Bricks", "Wood")
+    texture_folder(tmp_path, "b", "Bricks", "Wood")
+    texture_folder(tmp_path, "c", "Bricks", "Wood")
+    names = [item.name for item in discover_texture_sets([str(tmp_path)], str(tmp_path / "out"))]
+    assert names == ["Wood", "Bricks_Wood", "Bricks_Wood_2"]
+
+
+def test_zip_and_folder_of_one_name(tmp_path):
+    texture_folder(tmp_path, "Wood")
+    (tmp_path / "packs").mkdir()
+    with zipfile.ZipFile(str(tmp_path / "packs" / "Wood.zip"), "w") as zf:
+        zf.writestr("wood_color.png", b"")
+    names = sorted(item.name for item in discover_texture_sets([str(tmp_path)], str(tmp_path / "out")))
+    assert names == ["Wood", "packs_Wood"]
+
+
+def test_same_input_twice(tmp_path):
+    wood = texture_folder(tmp_path, "Wood")
+    items = discover_texture_sets([str(tmp_path), wood], str(tmp_path / "out"))
+    assert [item.name for item in items] == ["Wood"]
+
+
+def test_output_folder_is_skipped(tmp_path):
+    texture_folder(tmp_path, "Wood")
+    texture_folder(tmp_path, "out", "Wood")
+    items = discover_texture_sets([str(tmp_path)], str(tmp_path / "out"))
+    assert [item.name for item in items] == ["Wood"]
@@ -0,0 +1,52 @@
+import pytest
+
+from matFilterIndex import MatFilterIndex, is_filter_query
+
+LIBRARY = {
+    "OakPlanks": {"category": "wood", "resolution": "4k", "maps": ["color", "displacement"], "vendor": "polyhaven"},
+    "PineBoards": {"category": "wood", "resolution": "2k", "maps": ["color"], "vendor": "ambientcg"},
+    "RustyPlate": {"category": "metal", "resolution": "8k", "maps": ["color", "metalness"], "vendor": "polyhaven"},
+}
+
+
+@pytest.fixture
+def index():
+    index = MatFilterIndex()
+    index.update({name: {"meta": meta} for name, meta in LIBRARY.items()})
+    return index
+
+
+def test_and(index):
+    assert index.query("wood AND 4k AND has:displacement") == {"OakPlanks"}
+
+
+def test_or_and_not(index):
+    assert index.query("category:metal OR category:wood -vendor:polyhaven") == {"RustyPlate", "PineBoards"}
+    assert index.query("wood NOT res:2k") == {"OakPlanks"}
+
+
+def test_comparison(index):
+    assert index.query("res>=4k") == {"OakPlanks", "RustyPlate"}
+    assert index.query("res<4096px") == {"PineBoards"}
+
+
+def test_bare_word_through_name_lookup(index):
+    assert index.query("plate", name_lookup=lambda text: [n for n in LIBRARY if text in n.lower()]) == {"RustyPlate"}
+
+
+def test_unknown_filter(index):
+    with pytest.raises(ValueError):
+        index.query("colour:red")
+
+
+def test_update_removes_and_changes(index):
+    index.update({"OakPlanks": {"meta": dict(LIBRARY["OakPlanks"], category="floor")}})
+    assert len(index) == 1
+    assert index.query("wood") == set()
+    assert index.counts("category") == [("floor", 1)]
+
+
+def test_is_filter_query():
+    assert is_filter_query("res>=4k")
+    assert is_filter_query("wood -metal")
+    assert not is_filter_query("oak planks")
@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+
+from matLibraryFederation import MatLibraryFederation
+
+
+def material(root, *parts):
+    mat_dir = os.path.join(str(root), *parts)
+    os.makedirs(mat_dir)
+    name = parts[-1]
+    open(os.path.join(mat_dir, name + ".ma"), "w").close()
+    open(os.path.join(mat_dir, name + ".png"), "wb").close()
+    return mat_dir
+
+
+def scan(library):
+    """ start() with the callbacks collected, then applied as the main thread would """
+    batches, done = [], []
+    library.start(on_batch=batches.append, on_done=done.append)
+    library.wait()
+    for batch in batches:
+        library.apply(batch)
+    return [library.finish(result) for result in done], done
+
+
+def test_higher_root_wins(tmp_path):
+    local, studio = tmp_path / "local", tmp_path / "studio"
+    material(local, "Oak")
+    material(studio, "Oak")
+    material(studio, "Pine")
+    library = MatLibraryFederation([str(local), str(studio)])
+    library.load()
+    scan(library)
+    assert library.mat_list["Oak"]["root"] == str(local)
+    assert library.mat_list["Pine"]["root"] == str(studio)
+
+
+def test_category_folders_are_shards(tmp_path):
+    material(tmp_path, "Wood", "Oak")
+    material(tmp_path, "Metal", "Rust")
+    library = MatLibraryFederation([str(tmp_path)])
+    library.load()
+    scan(library)
+    assert sorted(library.mat_list) == ["Oak", "Rust"]
+    assert library.shard_paths() == sorted([str(tmp_path), str(tmp_path / "Metal"), str(tmp_path / "Wood")])
+
+
+def test_reopening_from_the_indexes(tmp_path):
+    material(tmp_path, "Wood", "Oak")
+    library = MatLibraryFederation([str(tmp_path)])
+    scan(library)
+    reopened = MatLibraryFederation([str(tmp_path)])
+    assert list(reopened.load()) == ["Oak"]
+
+
+def test_removed_material(tmp_path):
+    oak = material(tmp_path, "Oak")
+    material(tmp_path, "Pine")
+    library = MatLibraryFederation([str(tmp_path)])
+    scan(library)
+    os.remove(os.path.join(oak, "Oak.ma"))
+    os.remove(os.path.join(oak, "Oak.png"))
+    os.rmdir(oak)
+    scan(library)
+    assert list(library.mat_list) == ["Pine"]
+
+
+def test_missing_root_is_reported(tmp_path):
+    library = MatLibraryFederation([str(tmp_path / "gone")])
+    remaining, done = scan(library)
+    assert remaining == [0]
+    assert isinstance(done[0].error, FileNotFoundError)
+
+
+def test_start_does_not_wait_for_a_stuck_scan(tmp_path):
+    material(tmp_path, "Oak")
+    library = MatLibraryFederation([str(tmp_path)])
+    release = threading.Event()
+    stuck = threading.Thread(target=release.wait, daemon=True)
+    stuck.start()
+    # As if the previous scan of the root hung on a slow NAS
+    library.threads[str(tmp_path)] = stuck
+
+    batches, done = [], []
+    started = time.monotonic()
+    library.start(on_batch=batches.append, on_done=done.append)
+    assert time.monotonic() - started < 1.0
+    assert not done
+    release.set()
+    library.wait()
+    for batch in batches:
+        library.apply(batch)
+    assert library.finish(done[0]) == 0
+    assert list(library.mat_list) == ["Oak"]
+
+
+def test_superseded_scan_is_dropped(tmp_path):
+    material(tmp_path, "Oak")
+    library = MatLibraryFederation([str(tmp_path)])
+    old_batches, old_done = [], []
+    library.start(on_batch=old_batches.append, on_done=old_done.append)
+    library.wait()
+    material(tmp_path, "Pine")
+    remaining, _ = scan(library)
+
+    assert remaining == [0]
+    assert all(library.apply(batch) == [] for batch in old_batches)
+    assert library.finish(old_done[0]) is None
+    assert sorted(library.mat_list) == ["Oak", "Pine"]
+    assert not library.scanning()
+
+
+def test_superseded_changes_are_sent_again(tmp_path):
+    """ What the cancelled scan indexed but never got applied comes back with the next scan """
+    material(tmp_path, "Oak")
+    library = MatLibraryFederation([str(tmp_path)])
+    release = threading.Event()
+    old_batches = []
+
+    def held_back(batch):
+        release.wait()
+        old_batches.append(batch)
+
+    library.start(on_batch=held_back)
+    batches, done = [], []
+    library.start(on_batch=batches.append, on_done=done.append)
+    release.set()
+    library.wait()
+    for batch in old_batches + batches:
+        library.apply(batch)
+    assert library.finish(done[0]) == 0
+    assert list(library.mat_list) == ["Oak"]
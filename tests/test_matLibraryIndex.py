@@ -0,0 +1,87 @@
+import os
+import json
+
+from matLibraryIndex import INDEX_FILE_NAME, INDEX_VERSION, MatLibraryIndex
+
+
+def material(root, name, preview=True):
+    folder = root / name
+    folder.mkdir(parents=True, exist_ok=True)
+    (folder / f"{name}.ma").write_text("//Maya ASCII")
+    if preview:
+        (folder / f"{name}.png").write_bytes(b"png")
+    return folder
+
+
+def touch(folder, mtime):
+    os.utime(folder, (mtime, mtime))
+
+
+def test_first_refresh_indexes_everything(tmp_path):
+    material(tmp_path, "Oak")
+    material(tmp_path, "Pine", preview=False)
+    (tmp_path / "Empty").mkdir()
+    index = MatLibraryIndex(str(tmp_path))
+    assert sorted(index.refresh()) == ["Empty", "Oak", "Pine"]
+    assert sorted(index.materials()) == ["Oak", "Pine"]
+    oak = index.material("Oak")
+    assert oak["ma_path"] == os.path.join(str(tmp_path), "Oak", "Oak.ma")
+    # Without a preview of its own the default name is still given, the grid shows a placeholder
+    assert index.material("Pine")["prev_path"] == os.path.join(str(tmp_path), "Pine", "Pine.png")
+
+
+def test_only_changed_folders_are_revalidated(tmp_path):
+    touch(material(tmp_path, "Oak"), 1000)
+    touch(material(tmp_path, "Pine"), 1000)
+    index = MatLibraryIndex(str(tmp_path))
+    index.refresh()
+    touch(material(tmp_path, "Pine"), 2000)
+    assert index.refresh() == ["Pine"]
+    assert index.refresh() == []
+
+
+def test_removed_folders_leave_the_index(tmp_path):
+    material(tmp_path, "Oak")
+    folder = material(tmp_path, "Pine")
+    index = MatLibraryIndex(str(tmp_path))
+    index.refresh()
+    for path in folder.iterdir():
+        path.unlink()
+    folder.rmdir()
+    index.refresh()
+    assert sorted(index.entries) == ["Oak"]
+
+
+def test_saved_index_is_relative(tmp_path):
+    material(tmp_path / "lib", "Oak")
+    index = MatLibraryIndex(str(tmp_path / "lib"))
+    index.refresh()
+    assert index.save()
+    data = json.loads((tmp_path / "lib" / INDEX_FILE_NAME).read_text())
+    assert data["version"] == INDEX_VERSION
+    assert data["materials"]["Oak"]["ma_path"] == "Oak/Oak.ma"
+
+    # Same index from another mount point
+    os.rename(tmp_path / "lib", tmp_path / "moved")
+    moved = MatLibraryIndex(str(tmp_path / "moved"))
+    assert moved.load()
+    assert moved.material("Oak")["ma_path"] == os.path.join(str(tmp_path / "moved"), "Oak", "Oak.ma")
+    assert moved.refresh() == []
+
+
+def test_old_index_version_is_ignored(tmp_path):
+    (tmp_path / INDEX_FILE_NAME).write_text(json.dumps({"version": INDEX_VERSION - 1, "materials": {"Oak": {}}}))
+    index = MatLibraryIndex(str(tmp_path))
+    assert not index.load()
+    assert index.entries == {}
+
+
+def test_local_cache(tmp_path):
+    material(tmp_path / "lib", "Oak")
+    cache_path = str(tmp_path / "cache" / "index.json")
+    index = MatLibraryIndex(str(tmp_path / "lib"), cache_path)
+    index.refresh()
+    index.save()
+    cached = MatLibraryIndex(str(tmp_path / "lib"), cache_path)
+    assert cached.load(from_cache=True)
+    assert list(cached.materials()) == ["Oak"]
@@ -0,0 +1,73 @@
+import os
+import threading
+
+from matLibraryScanner import LibraryScanner
+
+
+def library(root, count):
+    for i in range(count):
+        folder = root / f"Mat{i:03d}"
+        folder.mkdir()
+        (folder / f"Mat{i:03d}.ma").write_text("//Maya ASCII")
+    return str(root)
+
+
+def test_batches_add_up_to_the_result(tmp_path):
+    batches = []
+    result = LibraryScanner(library(tmp_path, 40), batch_size=8).scan(batches.append)
+    assert len(result.changed) == 40
+    assert all(len(batch) <= 8 for batch in batches)
+    merged = {}
+    for batch in batches:
+        merged.update(batch)
+    assert merged == result.changed
+
+
+def test_known_mtimes_are_skipped(tmp_path):
+    lib_path = library(tmp_path, 3)
+    known = {name: os.stat(os.path.join(lib_path, name)).st_mtime for name in ("Mat000", "Mat001")}
+    result = LibraryScanner(lib_path, known).scan()
+    assert list(result.changed) == ["Mat002"]
+    assert result.seen == {"Mat000", "Mat001", "Mat002"}
+
+
+def test_category_folder_is_a_shard(tmp_path):
+    category = tmp_path / "Wood"
+    category.mkdir()
+    library(category, 2)
+    (tmp_path / ".hidden").mkdir()
+    result = LibraryScanner(str(tmp_path)).scan()
+    assert list(result.changed) == ["Wood"]
+    assert result.changed["Wood"]["shard"] and result.changed["Wood"]["ma_path"] is None
+
+
+def test_cancel(tmp_path):
+    scanner = LibraryScanner(library(tmp_path, 20), workers=1, batch_size=1)
+    result = scanner.scan(lambda batch: scanner.cancel())
+    assert result.cancelled
+    assert len(result.changed) < 20
+
+
+def test_start_reports_on_done(tmp_path):
+    done = threading.Event()
+    results = []
+
+    def on_done(result):
+        results.append(result)
+        done.set()
+
+    scanner = LibraryScanner(library(tmp_path, 5))
+    scanner.start(on_done=on_done)
+    assert done.wait(5)
+    assert results[0].error is None and len(results[0].changed) == 5
+    scanner.thread.join()
+    assert not scanner.running()
+
+
+def test_missing_root_is_an_error(tmp_path):
+    done = threading.Event()
+    results = []
+    scanner = LibraryScanner(str(tmp_path / "missing"))
+    scanner.start(on_done=lambda result: (results.append(result), done.set()))
+    assert done.wait(5)
+    assert isinstance(results[0].error, OSError)
@@ -0,0 +1,52 @@
+import pytest
+
+from matSearchIndex import MatSearchIndex
+
+NAMES = ["Bricks_Red", "BrickWall", "OakPlanks", "PineBoards", "RustyPlate", "WornBricks", "Ax"]
+
+
+@pytest.fixture
+def index():
+    return MatSearchIndex(NAMES)
+
+
+def test_prefix_ignores_case(index):
+    assert index.prefix("brick") == ["Bricks_Red", "BrickWall"]
+    assert index.prefix("z") == []
+
+
+def test_substring(index):
+    assert index.substring("rick") == ["Bricks_Red", "BrickWall", "WornBricks"]
+    assert index.substring("ks") == ["Bricks_Red", "OakPlanks", "WornBricks"]
+    assert index.substring("plate") == ["RustyPlate"]
+    assert index.substring("bricky") == []
+
+
+def test_fuzzy_matches_a_token(index):
+    assert "Bricks_Red" in index.fuzzy("brik")
+    assert index.fuzzy("planks")[0] == "OakPlanks"
+
+
+def test_search_ranks_prefix_then_substring(index):
+    results = index.search("bri")
+    assert results[:3] == ["Bricks_Red", "BrickWall", "WornBricks"]
+    assert index.search("") == index.all()
+
+
+def test_bulk_load_matches_one_by_one():
+    names = [f"Material_{i:04d}" for i in range(200)] + NAMES
+    bulk = MatSearchIndex(names)
+    single = MatSearchIndex()
+    for name in names:
+        single.add(name)
+    assert bulk.keys == single.keys
+    assert bulk.grams == single.grams
+
+
+def test_update_touches_only_changes(index):
+    index.update(["OakPlanks", "Walnut"])
+    assert index.all() == ["OakPlanks", "Walnut"]
+    assert "BrickWall" not in index
+    assert index.substring("rick") == []
+    assert not any("BrickWall" in names for names in index.grams.values())
+    assert index.prefix("wal") == ["Walnut"]
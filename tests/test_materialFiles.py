@@ -0,0 +1,52 @@
+import os
+import zipfile
+
+import pytest
+
+from materialFiles import extract_material_zip
+from textureStore import TextureStore
+
+MEMBERS = {
+    "WoodFloor051_4K/WoodFloor051_4K_Color.png": b"color",
+    "WoodFloor051_4K/WoodFloor051_4K_Roughness.png": b"roughness",
+    "WoodFloor051_4K/WoodFloor051_4K_NormalGL.png": b"normal",
+    "WoodFloor051_4K/WoodFloor051_4K_Displacement.png": b"displacement",
+    "WoodFloor051_4K/WoodFloor051.png": b"preview",
+    "WoodFloor051_4K/readme.txt": b"license",
+    "__MACOSX/WoodFloor051_4K/._WoodFloor051_4K_Color.png": b"resource fork",
+}
+
+
+@pytest.fixture
+def pack(tmp_path):
+    path = str(tmp_path / "WoodFloor051_4K.zip")
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("WoodFloor051_4K/", b"")
+        for name, data in MEMBERS.items():
+            zf.writestr(name, data)
+    return path
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_only_selected_members_under_canonical_names(tmp_path, pack, workers):
+    output = str(tmp_path / "library" / "WoodFloor")
+    texture_set = extract_material_zip(pack, output, workers=workers)
+    assert sorted(os.listdir(output)) == [
+        "WoodFloor.png", "WoodFloor_color.png", "WoodFloor_displacement.png",
+        "WoodFloor_normalgl.png", "WoodFloor_roughness.png",
+    ]
+    with open(os.path.join(output, "WoodFloor_color.png"), "rb") as f:
+        assert f.read() == b"color"
+    assert texture_set.file("color") == "WoodFloor_color.png"
+    assert texture_set.path("roughness") == os.path.join(output, "WoodFloor_roughness.png")
+
+
+def test_maps_are_linked_from_the_store(tmp_path, pack):
+    library = tmp_path / "library"
+    store = TextureStore(str(library), link_mode="hardlink")
+    first = extract_material_zip(pack, str(library / "WoodA"), store=store)
+    second = extract_material_zip(pack, str(library / "WoodB"), store=store)
+    assert os.path.samefile(first.path("color"), second.path("color"))
+    # Previews stay out of the store
+    assert not os.path.samefile(library / "WoodA" / "WoodA.png", library / "WoodB" / "WoodB.png")
+    assert not [name for name in os.listdir(library / "WoodA") if name.endswith(".part")]
@@ -0,0 +1,21 @@
+import struct
+
+from materialMetadata import map_resolution
+from textureClassifier import get_classifier
+from textureValidator import PNG_SIGNATURE
+
+
+def write_png_header(path, width, height):
+    path.write_bytes(PNG_SIGNATURE + struct.pack(">I", 13) + b"IHDR" + struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+
+
+def test_resolution_of_the_color_map(tmp_path):
+    write_png_header(tmp_path / "Wood_Color.png", 4096, 4096)
+    write_png_header(tmp_path / "Wood_Roughness.png", 1024, 1024)
+    assert map_resolution(get_classifier().classify_dir(str(tmp_path))) == "4k"
+
+
+def test_cut_short_header_falls_through(tmp_path):
+    (tmp_path / "Wood_Color.png").write_bytes(PNG_SIGNATURE + b"\0\0\0\x0dIHDR\0\0")
+    write_png_header(tmp_path / "Wood_Roughness.png", 2048, 2048)
+    assert map_resolution(get_classifier().classify_dir(str(tmp_path))) == "2k"
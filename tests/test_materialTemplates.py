@@ -0,0 +1,87 @@
+import os
+import sys
+import json
+
+import pytest
+
+# shadingGraph and the builder import maya, the benchmarks' recording stub stands in for it
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+import fakeMaya  # noqa: E402
+fakeMaya.install()
+
+from materialTemplates import PACKED_KEY, UV_TILING_UDIM, get_plan  # noqa: E402
+from matBuildSelector import MatBuildSelector  # noqa: E402
+
+TEMPLATE = {
+    "slots": {"color": {"required": True}, "roughness": {"attrs": {"alphaGain": 0.5}}},
+    "nodes": [{"key": "surface", "type": "aiStandardSurface", "category": "shader"}],
+    "connections": [["color.outColor", "surface.baseColor"],
+                    {"from": "roughness.outAlpha", "to": "surface.specularRoughness", "when": "roughness"}],
+}
+
+
+@pytest.fixture
+def templates(tmp_path, monkeypatch):
+    monkeypatch.setenv("MATERIALSPLUGIN_TEMPLATES", str(tmp_path))
+
+    def write(name, data, mtime=None):
+        path = tmp_path / f"{name}.json"
+        path.write_text(json.dumps(data))
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+    return write
+
+
+def test_unknown_template():
+    with pytest.raises(KeyError):
+        get_plan("noSuchTemplate")
+
+
+def test_broken_template(templates):
+    templates("broken", dict(TEMPLATE, connections=[["color.outColor", "missing.baseColor"]]))
+    with pytest.raises(ValueError):
+        get_plan("broken")
+
+
+def test_recompiled_when_the_file_changes(templates):
+    templates("simple", TEMPLATE, mtime=1000)
+    plan = get_plan("simple")
+    assert get_plan("simple") is plan
+    templates("simple", dict(TEMPLATE, export_suffix="_simple"), mtime=2000)
+    changed = get_plan("simple")
+    assert changed.version != plan.version
+    assert changed.export_name("Wood") == "Wood_simple.ma"
+
+
+def test_optional_map_drops_its_connections(templates):
+    templates("simple", TEMPLATE)
+    _, _, connections = get_plan("simple").variant({"color"})
+    assert ("roughness", "outAlpha", "surface", "specularRoughness") not in connections
+    assert ("color", "outColor", "surface", "baseColor") in connections
+
+
+def test_packed_map_reads_a_channel(templates):
+    templates("simple", TEMPLATE)
+    slots, _, connections = get_plan("simple").variant({"color", "roughness"}, {"roughness": "G"})
+    assert [slot[0] for slot in slots] == ["color", PACKED_KEY]
+    assert (PACKED_KEY, "outColorG", "surface", "specularRoughness") in connections
+    assert ("colorGainG", 0.5) in slots[1][3]
+
+
+def test_udim_file_node(templates):
+    templates("simple", TEMPLATE)
+    map_files = {"color": ("Wood_Color.1001.png", "/lib/Wood/Wood_Color.<UDIM>.png"),
+                 "roughness": ("Wood_Roughness.png", "/lib/Wood/Wood_Roughness.png")}
+    graph = get_plan("simple").instantiate("Wood", map_files, udim=["color"])
+    # The tiling mode goes first, Maya resolves the <UDIM> path when the file name is set
+    assert graph.nodes["color"].attrs[:2] == [("uvTilingMode", UV_TILING_UDIM),
+                                              ("fileTextureName", "/lib/Wood/Wood_Color.<UDIM>.png")]
+    assert ("uvTilingMode", UV_TILING_UDIM) not in graph.nodes["roughness"].attrs
+
+
+def test_builder_reports_unusable_template(tmp_path):
+    builder = MatBuildSelector()
+    builder.input_path = builder.output_path = str(tmp_path)
+    builder.template = "noSuchTemplate"
+    builder.build_material()
+    assert not os.listdir(tmp_path)
@@ -0,0 +1,59 @@
+import os
+
+from previewRender import PreviewCache, PreviewJob, find_stale_previews
+
+
+def material(lib_path, name, preview=True):
+    mat_dir = os.path.join(lib_path, name)
+    os.makedirs(mat_dir)
+    open(os.path.join(mat_dir, name + ".ma"), "w").close()
+    if preview:
+        open(os.path.join(mat_dir, name + ".png"), "wb").close()
+    return mat_dir
+
+
+def library(tmp_path):
+    """ Vendor: shipped preview, Generated: made here and up to date, Missing: no preview """
+    lib_path = str(tmp_path)
+    material(lib_path, "Vendor")
+    generated = material(lib_path, "Generated")
+    material(lib_path, "Missing", preview=False)
+    cache = PreviewCache(lib_path)
+    job = PreviewJob("Generated", generated)
+    job.method = "composite"
+    cache.record(job)
+    return lib_path, cache
+
+
+def stale(lib_path, cache, force=False):
+    return sorted(job.mat for job in find_stale_previews(lib_path, cache, force))
+
+
+def test_missing_previews(tmp_path):
+    lib_path, cache = library(tmp_path)
+    assert stale(lib_path, cache) == ["Missing"]
+
+
+def test_force_keeps_vendor_previews(tmp_path):
+    lib_path, cache = library(tmp_path)
+    assert stale(lib_path, cache, force=True) == ["Generated", "Missing"]
+
+
+def test_edited_material_is_stale(tmp_path):
+    lib_path, cache = library(tmp_path)
+    ma_path = os.path.join(lib_path, "Generated", "Generated.ma")
+    st = os.stat(ma_path)
+    os.utime(ma_path, (st.st_atime, st.st_mtime + 10))
+    assert stale(lib_path, cache) == ["Generated", "Missing"]
+
+
+def test_deleted_vendor_preview_is_missing(tmp_path):
+    lib_path, cache = library(tmp_path)
+    os.remove(os.path.join(lib_path, "Vendor", "Vendor.png"))
+    assert stale(lib_path, cache) == ["Missing", "Vendor"]
+
+
+def test_cache_round_trip(tmp_path):
+    lib_path, cache = library(tmp_path)
+    assert cache.save()
+    assert stale(lib_path, PreviewCache(lib_path).load(), force=True) == ["Generated", "Missing"]
@@ -0,0 +1,46 @@
+import os
+import sys
+
+# sceneMaterials imports maya.cmds, the benchmarks' recording stub stands in for it
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+import fakeMaya  # noqa: E402
+fakeMaya.install()
+
+from sceneMaterials import match_assignments, read_assignment_map  # noqa: E402
+
+
+def test_text_map(tmp_path):
+    path = tmp_path / "assign.txt"
+    path.write_text("\n".join([
+        "# props",
+        "pCube*  Wood",
+        "pSphere* -> Metal   # trailing comment",
+        "pCone*->Stone",
+        "|env|rocks|* = RockMossy",
+        "char:body*: Skin",
+        "pTorus* ->",
+        "Orphan",
+    ]))
+    skipped = []
+    rules = read_assignment_map(str(path), skipped)
+    assert rules == [("pCube*", "Wood"), ("pSphere*", "Metal"), ("pCone*", "Stone"),
+                     ("|env|rocks|*", "RockMossy"), ("char:body*", "Skin")]
+    assert skipped == [(7, "pTorus* ->"), (8, "Orphan")]
+
+
+def test_json_map(tmp_path):
+    path = tmp_path / "assign.json"
+    path.write_text('[["pCube*", "Wood"], ["*", "Default"]]')
+    assert read_assignment_map(str(path)) == [("pCube*", "Wood"), ("*", "Default")]
+    path.write_text('{"pCube*": "Wood", "*": "Default"}')
+    assert read_assignment_map(str(path)) == [("pCube*", "Wood"), ("*", "Default")]
+
+
+def test_first_match_wins():
+    objects = ["|grp|pCube1", "|grp|PCUBE2", "|env|rocks|boulder", "|boulder"]
+    rules = [("|env|rocks|*", "RockMossy"), ("pcube*", "Wood"), ("*", "Default")]
+    assert match_assignments(rules, objects) == {
+        "Wood": ["|grp|pCube1", "|grp|PCUBE2"],
+        "RockMossy": ["|env|rocks|boulder"],
+        "Default": ["|boulder"],
+    }
@@ -0,0 +1,51 @@
+import os
+
+from textureClassifier import TextureSet, get_classifier, udim_tiles, udim_token
+
+
+def classify(files, name="Wood"):
+    return get_classifier().classify_files(files, name)
+
+
+def test_resolution_is_not_a_udim_tile():
+    texture_set = classify(["Wood_Color_1024.png", "Wood_Roughness_1024.png"])
+    assert texture_set.maps["color"].udim is None
+    assert texture_set.maps["roughness"].udim is None
+    assert not texture_set.udim_tiles
+
+
+def test_sibling_tiles():
+    texture_set = classify(["Wood_Color_1001.png", "Wood_Color_1002.png", "Wood_Color_1011.png"])
+    assert texture_set.is_udim("color")
+    assert [t.udim for t in texture_set.udim_tiles["color"]] == [1001, 1002, 1011]
+    assert texture_set.maps["color"].file == "Wood_Color_1001.png"
+
+
+def test_mari_tile_on_its_own():
+    texture_set = classify(["Wood_Color.1001.png"])
+    assert texture_set.maps["color"].udim == 1001
+
+
+def test_only_the_tile_number_may_differ():
+    assert udim_tiles(["wood_1001_color", "wood_1002_roughness"]) == {}
+    assert udim_tiles(["wood_1001_color", "wood_1002_color"]) == {"wood_1001_color": 1001, "wood_1002_color": 1002}
+
+
+def test_from_dict_keeps_tiles():
+    texture_set = classify(["Wood_Color_1001.png", "Wood_Color_1002.png", "Wood_Roughness_1024.png"])
+    loaded = TextureSet.from_dict(texture_set.to_dict())
+    assert [t.udim for t in loaded.udim_tiles["color"]] == [1001, 1002]
+    assert loaded.maps["color"].udim == 1001
+    assert loaded.maps["roughness"].udim is None
+
+
+def test_udim_token():
+    assert udim_token("Wood_Color.1001.png", 1001) == "Wood_Color.<UDIM>.png"
+    assert udim_token(os.path.join("2k", "Wood_1024_Color_1001.png"), 1001) == os.path.join("2k", "Wood_1024_Color_<UDIM>.png")
+
+
+def test_udim_map_renders_every_tile():
+    texture_set = classify(["Wood_Color_1001.png", "Wood_Color_1002.png", "Wood_Roughness.png"])
+    texture_set.variants["color"] = os.path.join("2k", "Wood_Color_1001.png")
+    assert texture_set.render_file("color") == os.path.join("2k", "Wood_Color_<UDIM>.png")
+    assert texture_set.render_file("roughness") == "Wood_Roughness.png"
@@ -0,0 +1,69 @@
+import pytest
+
+from textureClassifier import get_classifier
+from texturePrep import PACKED_SUFFIX, TexturePrep, has_pillow, pack_channels
+
+
+def gray(path, size, value):
+    from PIL import Image
+    Image.new("L", size, value).save(str(path), "PNG")
+
+
+def texture_set(directory):
+    return get_classifier().classify_dir(str(directory), "Rock")
+
+
+def test_unknown_mode_and_tier():
+    with pytest.raises(ValueError):
+        TexturePrep("sharpen")
+    with pytest.raises(ValueError):
+        TexturePrep("none", tier="16k")
+
+
+@pytest.mark.skipif(has_pillow(), reason="Pillow is installed")
+def test_packing_without_pillow():
+    with pytest.raises(RuntimeError):
+        TexturePrep("none", pack=True)
+
+
+def test_pack_merges_channels(tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+    gray(tmp_path / "Rock_AmbientOcclusion.png", (64, 64), 200)
+    gray(tmp_path / "Rock_Roughness.png", (32, 32), 90)
+    gray(tmp_path / "Rock_Color.png", (64, 64), 10)
+    textures = texture_set(tmp_path)
+    assert pack_channels(textures)
+    assert textures.packed == {"ambientocclusion": "R", "roughness": "G"}
+    assert textures.file("packed") == "Rock" + PACKED_SUFFIX
+    with Image.open(textures.path("packed")) as img:
+        # Resized to the largest map, metalness filled with its default
+        assert img.mode == "RGB" and img.size == (64, 64)
+        assert img.getpixel((10, 10)) == (200, 90, 0)
+
+
+def test_pack_needs_two_maps(tmp_path):
+    pytest.importorskip("PIL")
+    gray(tmp_path / "Rock_Roughness.png", (32, 32), 90)
+    textures = texture_set(tmp_path)
+    assert not pack_channels(textures)
+    assert "packed" not in textures.maps
+
+
+def test_udim_maps_are_not_packed(tmp_path):
+    pytest.importorskip("PIL")
+    gray(tmp_path / "Rock_Roughness.1001.png", (32, 32), 90)
+    gray(tmp_path / "Rock_Roughness.1002.png", (32, 32), 90)
+    gray(tmp_path / "Rock_Metalness.png", (32, 32), 255)
+    textures = texture_set(tmp_path)
+    assert not pack_channels(textures)
+
+
+def test_packed_maps_are_not_prepared(tmp_path):
+    pytest.importorskip("PIL")
+    gray(tmp_path / "Rock_AmbientOcclusion.png", (64, 64), 200)
+    gray(tmp_path / "Rock_Roughness.png", (64, 64), 90)
+    gray(tmp_path / "Rock_Color.png", (64, 64), 10)
+    textures = texture_set(tmp_path)
+    TexturePrep("variants", tier="1k", pack=True).run(textures)
+    assert textures.packed
+    assert "ambientocclusion" not in textures.variants and "roughness" not in textures.variants
@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+from textureStore import TextureStore
+
+EXTENSIONS = {".png"}
+
+
+def texture(root, material, data):
+    folder = root / material
+    folder.mkdir(exist_ok=True)
+    path = folder / f"{material}_Color.png"
+    path.write_bytes(data)
+    return str(path)
+
+
+@pytest.fixture
+def library(tmp_path):
+    texture(tmp_path, "Oak", b"oak" * 1000)
+    texture(tmp_path, "OakCopy", b"oak" * 1000)
+    texture(tmp_path, "Pine", b"pine" * 1000)
+    return tmp_path
+
+
+def test_dedup_links_duplicates(library):
+    stats = TextureStore(str(library), link_mode="hardlink").dedup(EXTENSIONS)
+    assert stats == {"files": 3, "deduplicated": 1, "bytes_reclaimed": 3000}
+    assert os.path.samefile(library / "Oak" / "Oak_Color.png", library / "OakCopy" / "OakCopy_Color.png")
+
+
+def test_second_pass_reclaims_nothing(library):
+    TextureStore(str(library), link_mode="hardlink").dedup(EXTENSIONS)
+    stats = TextureStore(str(library), link_mode="hardlink").dedup(EXTENSIONS)
+    assert stats == {"files": 3, "deduplicated": 0, "bytes_reclaimed": 0}
+
+
+def test_copies_reclaim_nothing(library):
+    store = TextureStore(str(library), link_mode="copy")
+    assert store.dedup(EXTENSIONS)["bytes_reclaimed"] == 0
+    # Placed from the store, the next pass leaves them alone
+    path = str(library / "OakCopy" / "OakCopy_Color.png")
+    assert store.is_placed(path, store.digest(path))
+
+
+def test_changed_file_is_adopted_again(library):
+    TextureStore(str(library), link_mode="copy").dedup(EXTENSIONS)
+    path = library / "Pine" / "Pine_Color.png"
+    path.write_bytes(b"oak" * 1000)
+    os.utime(path, ns=(0, 0))
+    stats = TextureStore(str(library), link_mode="hardlink").dedup(EXTENSIONS)
+    assert stats["deduplicated"] == 1
+
+
+def test_ingest(tmp_path):
+    src = tmp_path / "src.png"
+    src.write_bytes(b"walnut" * 100)
+    library = tmp_path / "library"
+    library.mkdir()
+    store = TextureStore(str(library), link_mode="hardlink")
+    dst = str(library / "Walnut_Color.png")
+    digest = store.ingest(str(src), dst)
+    assert os.path.samefile(dst, store.blob_path(digest, ".png"))
+    assert store.is_placed(dst, digest)
+    assert store.verify(EXTENSIONS) == {"blobs": 1, "corrupt": [], "orphans": []}
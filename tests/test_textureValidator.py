@@ -0,0 +1,113 @@
+import struct
+
+import pytest
+
+from textureClassifier import get_classifier
+from textureValidator import EXR_MAGIC, HEADER_BYTES, UnsupportedHeader, probe_image, validate_texture_set
+
+
+def write_tiff(path, byte_order, width, height, bits, ifd_offset=8):
+    """ Minimal uncompressed TIFF header: size, BitsPerSample and SamplesPerPixel, no pixels """
+    endian = "<" if byte_order == b"II" else ">"
+    entries = 4
+    values_at = ifd_offset + 2 + entries * 12 + 4
+    extra = b""
+    if len(bits) <= 2:
+        bits_value = struct.pack(endian + "H" * len(bits), *bits).ljust(4, b"\0")
+    else:
+        bits_value = struct.pack(endian + "I", values_at)
+        extra = struct.pack(endian + "H" * len(bits), *bits)
+    ifd = struct.pack(endian + "H", entries)
+    ifd += struct.pack(endian + "HHII", 256, 4, 1, width)
+    ifd += struct.pack(endian + "HHIH", 257, 3, 1, height) + b"\0\0"
+    ifd += struct.pack(endian + "HHI", 258, 3, len(bits)) + bits_value
+    ifd += struct.pack(endian + "HHIH", 277, 3, 1, len(bits)) + b"\0\0"
+    ifd += b"\0" * 4
+    header = byte_order + struct.pack(endian + "HI", 42, ifd_offset)
+    with open(path, "wb") as f:
+        f.write(header.ljust(ifd_offset, b"\0") + ifd + extra)
+
+
+@pytest.mark.parametrize("byte_order", [b"II", b"MM"])
+def test_rgb_tiff(tmp_path, byte_order):
+    path = str(tmp_path / "wood_color.tif")
+    write_tiff(path, byte_order, 2048, 1024, (8, 8, 8))
+    info = probe_image(path)
+    assert (info.format, info.width, info.height, info.bit_depth, info.channels) == ("tiff", 2048, 1024, 8, 3)
+
+
+@pytest.mark.parametrize("byte_order", [b"II", b"MM"])
+@pytest.mark.parametrize("bits", [(16,), (16, 16)])
+def test_inline_bits_per_sample(tmp_path, byte_order, bits):
+    path = str(tmp_path / "wood_displacement.tif")
+    write_tiff(path, byte_order, 512, 512, bits)
+    info = probe_image(path)
+    assert (info.bit_depth, info.channels) == (16, len(bits))
+
+
+def test_directory_past_the_probed_header(tmp_path):
+    path = str(tmp_path / "wood_color.tif")
+    write_tiff(path, b"MM", 4096, 4096, (8, 8, 8, 8), ifd_offset=200000)
+    info = probe_image(path)
+    assert (info.width, info.bit_depth, info.channels) == (4096, 8, 4)
+
+
+def test_bigtiff_is_unsupported(tmp_path):
+    path = tmp_path / "wood_color.tif"
+    path.write_bytes(b"II+\0" + b"\0" * 60)
+    with pytest.raises(UnsupportedHeader):
+        probe_image(str(path))
+
+
+def test_unsupported_header_is_a_warning(tmp_path):
+    (tmp_path / "wood_color.tif").write_bytes(b"II+\0" + b"\0" * 60)
+    texture_set = get_classifier().classify_dir(str(tmp_path))
+    issues = validate_texture_set(texture_set)
+    assert [(i["severity"], i["code"]) for i in issues] == [("warning", "unprobed")]
+
+
+def test_cut_short_tiff_is_corrupt(tmp_path):
+    path = str(tmp_path / "wood_color.tif")
+    write_tiff(path, b"II", 64, 64, (8, 8, 8), ifd_offset=100)
+    with open(path, "r+b") as f:
+        f.truncate(110)
+    texture_set = get_classifier().classify_dir(str(tmp_path))
+    assert [i["code"] for i in validate_texture_set(texture_set)] == ["corrupt"]
+
+
+def exr_attribute(name, type_name, value):
+    return name + b"\0" + type_name + b"\0" + struct.pack("<i", len(value)) + value
+
+
+def write_exr(path, width, height, metadata=b"", cut=None):
+    """ Scanline EXR header with two half channels, metadata padded in as a string attribute """
+    channels = b"".join(c + b"\0" + struct.pack("<iB3xii", 1, 0, 1, 1) for c in (b"R", b"G")) + b"\0"
+    header = EXR_MAGIC + struct.pack("<I", 2)
+    header += exr_attribute(b"channels", b"chlist", channels)
+    header += exr_attribute(b"comments", b"string", metadata)
+    header += exr_attribute(b"dataWindow", b"box2i", struct.pack("<iiii", 0, 0, width - 1, height - 1))
+    header += b"\0"
+    with open(path, "wb") as f:
+        f.write(header[:cut])
+
+
+def test_exr(tmp_path):
+    path = str(tmp_path / "wood_displacement.exr")
+    write_exr(path, 1024, 512)
+    info = probe_image(path)
+    assert (info.format, info.width, info.height, info.bit_depth, info.channels) == ("exr", 1024, 512, 16, 2)
+
+
+def test_exr_header_past_the_probed_header(tmp_path):
+    path = str(tmp_path / "wood_displacement.exr")
+    write_exr(path, 2048, 2048, metadata=b"x" * (HEADER_BYTES * 3))
+    info = probe_image(path)
+    assert (info.width, info.height) == (2048, 2048)
+
+
+def test_cut_short_exr_header_is_corrupt(tmp_path):
+    path = str(tmp_path / "wood_displacement.exr")
+    write_exr(path, 2048, 2048, metadata=b"x" * HEADER_BYTES, cut=HEADER_BYTES + 100)
+    with pytest.raises(ValueError) as e:
+        probe_image(path)
+    assert not isinstance(e.value, UnsupportedHeader)
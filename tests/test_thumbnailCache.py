@@ -0,0 +1,64 @@
+import os
+import time
+import shutil
+import threading
+
+from thumbnailCache import ThumbnailCache
+
+
+def copy_resizer(src, dst, size):
+    time.sleep(0.01)
+    shutil.copyfile(src, dst)
+
+
+def broken_resizer(src, dst, size):
+    with open(dst, "wb") as f:
+        f.write(b"half")
+    raise OSError("unreadable preview")
+
+
+def preview(tmp_path, data=b"preview"):
+    path = tmp_path / "Wood_prev.png"
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_cached_until_the_source_changes(tmp_path):
+    src = preview(tmp_path)
+    cache = ThumbnailCache(str(tmp_path / "cache"), resizer=copy_resizer)
+    thumb = cache.get(src)
+    assert thumb != src and os.path.isfile(thumb)
+    assert cache.get(src) == thumb
+
+    preview(tmp_path, b"repainted preview")
+    changed = cache.get(src)
+    assert changed != thumb
+    assert os.listdir(os.path.dirname(changed)) == [os.path.basename(changed)]
+
+
+def test_failed_resize_falls_back_to_the_source(tmp_path):
+    src = preview(tmp_path)
+    cache = ThumbnailCache(str(tmp_path / "cache"), resizer=broken_resizer)
+    assert cache.get(src) == src
+    assert cache.get(src, generate=False) is None
+    assert not [name for _, _, names in os.walk(tmp_path / "cache") for name in names]
+
+
+def test_concurrent_generation(tmp_path):
+    src = preview(tmp_path)
+    cache = ThumbnailCache(str(tmp_path / "cache"), resizer=copy_resizer)
+    results = []
+
+    def get():
+        # Separate lookups racing to generate the same thumbnail, as the UI and a prefetch would
+        cache.forget(src)
+        results.append(cache.get(src))
+
+    threads = [threading.Thread(target=get) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(results)) == 1 and results[0] != src
+    assert os.path.isfile(results[0])
+    assert os.listdir(os.path.dirname(results[0])) == [os.path.basename(results[0])]
@@ -0,0 +1,300 @@
+import os
+import re
+import json
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".tif", ".tiff", ".exr", ".tga", ".bmp", ".tx"}
+
+# Token boundary: anything but a letter, so "Bricks059_1K_Color" and "wood-color2" both split cleanly
+SEP = r"[_\-. ]?"
+
+# (map type, regex alternatives). Order matters where two rules match at the same spot:
+# explicit GL/DX normals are listed before the generic normal rule.
+DEFAULT_RULES = [
+    ("preview", ["preview", "thumbnail", "thumb", "sphere", "swatch"]),
+    ("normalgl", [f"normal{SEP}gl", f"nor{SEP}gl", f"nrm{SEP}gl", "normalopengl"]),
+    ("normald", [f"normal{SEP}dx", f"nor{SEP}dx", f"nrm{SEP}dx", "normaldirectx", "normald"]),
+    ("normalgl", ["normal", "nrm", "nor", "nml", "norm"]),
+    ("displacement", ["displacement", "displace", "disp", "heightmap", "height"]),
+    ("roughness", ["roughness", "rough", "rgh"]),
+    ("gloss", ["glossiness", "gloss"]),
+    ("ambientocclusion", [f"ambient{SEP}occlusion", "occlusion", "ao"]),
+    ("arm", ["arm", "orm"]),
+    ("metalness", ["metalness", "metallic"]),
+    ("opacity", ["opacity", "alpha"]),
+    ("emission", ["emissive", "emission"]),
+    ("specular", ["specular", "spec"]),
+    ("color", [f"base{SEP}color", "albedo", "diffuse", "diff", "color", "colour", "col", "alb"]),
+]
+
+# Extra rules per vendor, tried before the defaults
+PRESETS = {
+    "default": [],
+    "ambientcg": [
+        ("normalgl", ["normalgl"]),
+        ("normald", ["normaldx"]),
+    ],
+    "polyhaven": [
+        ("normalgl", [f"nor{SEP}gl"]),
+        ("normald", [f"nor{SEP}dx"]),
+        ("arm", ["arm"]),
+    ],
+    "quixel": [
+        ("normalgl", ["normal"]),
+        ("displacement", ["displacement", "bump"]),
+        ("metalness", ["metalness"]),
+        ("cavity", ["cavity"]),
+        ("translucency", ["translucency"]),
+    ],
+}
+
+RESOLUTION_RE = re.compile(r"(?<![a-z0-9])(\d{1,2})k(?![a-z])")
+UDIM_RE = re.compile(r"(?:^|[_.\-])(1\d{3})(?=$|[_.\-])")
+
+# With several candidates for one map, prefer lossless 8-bit formats the viewport loads quickly
+FORMAT_PREFERENCE = [".png", ".tif", ".tiff", ".jpg", ".jpeg", ".tga", ".bmp", ".exr", ".tx"]
+
+
+def udim_tiles(stems):
+    """
+    {stem: UDIM tile} of the stems that name one. A 1xxx number is a tile when it is dot-separated
+    (Mari's name.1001) or when another stem differs from it only in that number, so a lone
+    "Wood_Color_1024" stays a 1024 pixel map.
+    """
+    tiles = {}
+    groups = {}  # stem with its number masked -> [(stem, tile)]
+    for stem in stems:
+        match = None
+        for match in UDIM_RE.finditer(stem):
+            pass
+        if match is None:
+            continue
+        tile = int(match.group(1))
+        if stem[match.start(1) - 1:match.start(1)] == ".":
+            tiles[stem] = tile
+        else:
+            groups.setdefault(stem[:match.start(1)] + "#" + stem[match.end(1):], []).append((stem, tile))
+    for members in groups.values():
+        if len({tile for _, tile in members}) > 1:
+            tiles.update(members)
+    return tiles
+
+
+def udim_token(file, tile):
+    """ file with its tile number as Maya's <UDIM> token, "2k/Wood_color.1001.png" -> "2k/Wood_color.<UDIM>.png" """
+    head, tail = os.path.split(file)
+    i = tail.rfind(str(tile))
+    if i < 0:
+        return file
+    return os.path.join(head, tail[:i] + "<UDIM>" + tail[i + 4:])
+
+
+class TexturePolicy:
+    """
+    Which candidate wins when a set ships one map several times.
+    Resolution (in K) is considered before format, so with resolution=2 a 2K PNG beats an 8K EXR.
+    Below-target resolutions are preferred over upscaling to a bigger file.
+    """
+    def __init__(self, resolution=None, formats=None):
+        self.resolution = resolution
+        self.formats = list(formats if formats is not None else FORMAT_PREFERENCE)
+
+    def resolution_rank(self, texture):
+        if self.resolution is None or texture.resolution is None:
+            return 0
+        if texture.resolution <= self.resolution:
+            return self.resolution - texture.resolution
+        return 100 + texture.resolution - self.resolution
+
+    def key(self, texture):
+        ext = texture.ext.lower()
+        format_rank = self.formats.index(ext) if ext in self.formats else len(self.formats)
+        return (self.resolution_rank(texture), format_rank, texture.file.lower())
+
+
+DEFAULT_POLICY = TexturePolicy()
+
+
+class TextureFile:
+    def __init__(self, file, map_type, resolution=None, udim=None):
+        self.file = file
+        self.map_type = map_type
+        self.resolution = resolution  # e.g. 2 for "2K", None if the name has no hint
+        self.udim = udim  # tile number if the name carries one
+        self.ext = os.path.splitext(file)[1]
+
+    def __repr__(self):
+        return f"TextureFile({self.file!r}, {self.map_type!r})"
+
+
+class TextureSet:
+    """ Result of classifying one material's files """
+    def __init__(self, name, directory=None):
+        self.name = name
+        self.directory = directory
+        self.maps = {}  # map type -> TextureFile (first tile for UDIM maps)
+        self.udim_tiles = {}  # map type -> [TextureFile] when the map spans several UDIM tiles
+        self.previews = []
+        self.unmatched = []
+        self.variants = {}  # map type -> prepared file (.tx or downscaled copy) the network reads instead
+        self.packed = {}  # map type -> channel of maps["packed"] it was merged into
+
+    def file(self, map_type):
+        texture = self.maps.get(map_type)
+        return texture.file if texture is not None else None
+
+    def path(self, map_type):
+        texture = self.maps.get(map_type)
+        if texture is None:
+            return None
+        if self.directory is None:
+            return texture.file
+        return os.path.join(self.directory, texture.file)
+
+    def is_udim(self, map_type):
+        return len(self.udim_tiles.get(map_type, ())) > 1
+
+    def render_file(self, map_type):
+        """ The file a file node reads: the prepared variant if there is one, a <UDIM> pattern for UDIM maps """
+        texture = self.maps[map_type]
+        file = self.variants.get(map_type, texture.file)
+        if self.is_udim(map_type):
+            file = udim_token(file, texture.udim)
+        return file
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "maps": {map_type: texture.file for map_type, texture in self.maps.items()},
+            "udim": {map_type: [t.file for t in tiles] for map_type, tiles in self.udim_tiles.items() if len(tiles) > 1},
+            "previews": [t.file for t in self.previews],
+            "unmatched": list(self.unmatched),
+            "variants": dict(self.variants),
+            "packed": dict(self.packed),
+        }
+
+    @staticmethod
+    def from_dict(data, directory=None):
+        texture_set = TextureSet(data["name"], directory)
+        udims = udim_tiles(os.path.splitext(file)[0] for files in data.get("udim", {}).values() for file in files)
+
+        def texture(file, map_type):
+            return TextureFile(file, map_type, udim=udims.get(os.path.splitext(file)[0]))
+
+        for map_type, file in data.get("maps", {}).items():
+            texture_set.maps[map_type] = texture(file, map_type)
+        for map_type, files in data.get("udim", {}).items():
+            texture_set.udim_tiles[map_type] = [texture(file, map_type) for file in files]
+        texture_set.previews = [texture(file, "preview") for file in data.get("previews", [])]
+        texture_set.unmatched = list(data.get("unmatched", []))
+        texture_set.variants = dict(data.get("variants", {}))
+        texture_set.packed = dict(data.get("packed", {}))
+        return texture_set
+
+
+class TextureClassifier:
+    def __init__(self, rules=None):
+        self.rules = list(rules if rules is not None else DEFAULT_RULES)
+        self.map_types = []
+        groups = []
+        loose = []
+        for i, (map_type, alternatives) in enumerate(self.rules):
+            self.map_types.append(map_type)
+            group = "|".join(sorted(alternatives, key=len, reverse=True))
+            groups.append(f"(?P<r{i}>{group})")
+            # Long words are also accepted inside run-together names like "WoodBaseColor"
+            loose.extend((len(alt), alt, i) for alt in alternatives if len(alt) >= 5 and "[" not in alt)
+
+        self.token_re = re.compile(r"(?<![a-z])(?:" + "|".join(groups) + r")(?![a-z])")
+        loose.sort(reverse=True)
+        self.loose_re = re.compile("|".join(f"(?P<l{i}_{n}>{alt})" for n, (_, alt, i) in enumerate(loose))) if loose else None
+
+    def classify(self, file):
+        """ Map type of a single file name, or None """
+        stem = os.path.splitext(file)[0].lower()
+
+        # The map suffix usually comes last ("Metal_Plate_Roughness_2K"), so the rightmost token wins
+        best = None
+        for match in self.token_re.finditer(stem):
+            best = match
+        if best is not None:
+            return self.map_types[int(best.lastgroup[1:])]
+
+        if self.loose_re is not None:
+            best = None
+            for match in self.loose_re.finditer(stem):
+                best = match
+            if best is not None:
+                return self.map_types[int(best.lastgroup[1:].split("_")[0])]
+        return None
+
+    def classify_files(self, files, name, directory=None, policy=None):
+        policy = policy or DEFAULT_POLICY
+        texture_set = TextureSet(name, directory)
+        candidates = {}
+        udims = udim_tiles(os.path.splitext(file)[0].lower() for file in files)
+        for file in files:
+            base, ext = os.path.splitext(file)
+            if base == ".mayaSwatches" or ext.lower() not in IMAGE_EXTENSIONS:
+                if base != ".mayaSwatches":
+                    texture_set.unmatched.append(file)
+                continue
+
+            stem = base.lower()
+            # The material's own preview (<name>.png) may contain a map word, e.g. "Wood_Color"
+            map_type = "preview" if stem == name.lower() else self.classify(file)
+            if map_type is None:
+                texture_set.unmatched.append(file)
+                continue
+
+            resolution = RESOLUTION_RE.search(stem)
+            texture = TextureFile(
+                file, map_type,
+                resolution=int(resolution.group(1)) if resolution else None,
+                udim=udims.get(stem),
+            )
+            if map_type == "preview":
+                texture_set.previews.append(texture)
+            else:
+                candidates.setdefault(map_type, []).append(texture)
+
+        for map_type, textures in candidates.items():
+            textures.sort(key=policy.key)
+            best = textures[0]
+            tiles = [t for t in textures if t.udim is not None and t.ext == best.ext and t.resolution == best.resolution]
+            if best.udim is not None and len({t.udim for t in tiles}) > 1:
+                tiles.sort(key=lambda t: t.udim)
+                texture_set.udim_tiles[map_type] = tiles
+                best = tiles[0]
+            texture_set.maps[map_type] = best
+        return texture_set
+
+    def classify_dir(self, directory, name=None, policy=None):
+        name = name or os.path.basename(os.path.normpath(directory))
+        return self.classify_files(sorted(os.listdir(directory)), name, directory, policy)
+
+
+_classifiers = {}
+
+
+def load_presets(path):
+    """ Adds/overrides presets from a JSON file: {"preset": [["map_type", ["regex", ...]], ...]} """
+    with open(path, "r") as f:
+        data = json.load(f)
+    for preset, rules in data.items():
+        PRESETS[preset] = [(map_type, list(alternatives)) for map_type, alternatives in rules]
+        _classifiers.pop(preset, None)
+
+
+def get_classifier(preset="default"):
+    classifier = _classifiers.get(preset)
+    if classifier is None:
+        if preset not in PRESETS:
+            raise KeyError(f"Unknown texture preset '{preset}'")
+        classifier = TextureClassifier(PRESETS[preset] + DEFAULT_RULES)
+        _classifiers[preset] = classifier
+    return classifier
+
+
+user_presets = os.environ.get("MATERIALSPLUGIN_TEXTURE_PRESETS")
+if user_presets and os.path.exists(user_presets):
+    load_presets(user_presets)
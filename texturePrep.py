@@ -0,0 +1,209 @@
+import os
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from textureClassifier import TextureFile
+
+# Longest edge in pixels per quality tier, None keeps the source resolution
+QUALITY_TIERS = {"full": None, "4k": 4096, "2k": 2048, "1k": 1024}
+PREP_MODES = ["none", "auto", "tx", "variants"]
+
+# Grayscale maps merged by channel packing: (map type, channel, fill value when the set lacks the map).
+# Displacement stays a map of its own, 8 bits would show as stepping.
+PACK_LAYOUT = [("ambientocclusion", "R", 255), ("roughness", "G", 128), ("metalness", "B", 0)]
+PACKED_SUFFIX = "_packed.png"
+
+# Formats Pillow cannot write back faithfully are left at full resolution
+PILLOW_FORMATS = {".png": "PNG", ".jpg": "JPEG", ".jpeg": "JPEG", ".tif": "TIFF", ".tiff": "TIFF", ".tga": "TGA", ".bmp": "BMP"}
+
+
+def find_maketx():
+    """ Arnold's maketx: $MATERIALSPLUGIN_MAKETX, then PATH, then the mtoa install """
+    maketx = os.environ.get("MATERIALSPLUGIN_MAKETX")
+    if maketx and os.path.isfile(maketx):
+        return maketx
+    maketx = shutil.which("maketx")
+    if maketx:
+        return maketx
+    mtoa = os.environ.get("MTOA_LOCATION") or os.environ.get("MTOA_PATH")
+    if mtoa:
+        for name in ("maketx.exe", "maketx"):
+            candidate = os.path.join(mtoa, "bin", name)
+            if os.path.isfile(candidate):
+                return candidate
+    return None
+
+
+def has_pillow():
+    try:
+        import PIL.Image  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def is_newer(dst, src):
+    try:
+        return os.stat(dst).st_mtime >= os.stat(src).st_mtime
+    except OSError:
+        return False
+
+
+def make_tx(maketx, src):
+    """ Tiled, mipmapped .tx next to src. Returns its path. """
+    dst = os.path.splitext(src)[0] + ".tx"
+    if is_newer(dst, src):
+        return dst
+    subprocess.run(
+        [maketx, "--oiio", "--monochrome-detect", "--opaque-detect", "--constant-color-detect", "-o", dst, src],
+        check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    return dst
+
+
+def make_variant(src, tier, max_size):
+    """ Copy of src no larger than max_size in <material>/<tier>/, or src if it is already small enough """
+    from PIL import Image
+
+    ext = os.path.splitext(src)[1].lower()
+    if ext not in PILLOW_FORMATS:
+        return src
+    dst = os.path.join(os.path.dirname(src), tier, os.path.basename(src))
+    if is_newer(dst, src):
+        return dst
+
+    with Image.open(src) as img:
+        if max(img.size) <= max_size:
+            return src
+        img.thumbnail((max_size, max_size), Image.LANCZOS)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        tmp_path = dst + ".part"
+        img.save(tmp_path, PILLOW_FORMATS[ext])
+    os.replace(tmp_path, dst)
+    return dst
+
+
+def gray_8bit(img):
+    """ One 8-bit channel, scaling 16/32-bit integer images down instead of clipping them """
+    if img.mode in ("I;16", "I;16B", "I;16L"):
+        img = img.convert("I")
+    if img.mode == "I":
+        return img.point(lambda i: i * (1.0 / 256)).convert("L")
+    return img.convert("L")
+
+
+def pack_channels(texture_set, layout=PACK_LAYOUT):
+    """
+    Merges the grayscale maps of layout into one RGB texture, <name>_packed.png, resized to the
+    largest of them. Needs at least two of the maps; UDIM maps are left alone.
+    Records the result in texture_set.maps["packed"] and texture_set.packed. Returns True if packed.
+    """
+    from PIL import Image
+
+    present = [(m, ch, fill) for m, ch, fill in layout if m in texture_set.maps and not texture_set.is_udim(m)]
+    if len(present) < 2:
+        return False
+
+    file = texture_set.name + PACKED_SUFFIX
+    dst = os.path.join(texture_set.directory, file)
+    sources = {m: texture_set.path(m) for m, _, _ in present}
+    if not all(is_newer(dst, src) for src in sources.values()):
+        images = {}
+        for map_type, src in sources.items():
+            with Image.open(src) as img:
+                images[map_type] = gray_8bit(img)
+        size = max((img.size for img in images.values()), key=lambda s: s[0] * s[1])
+        channels = []
+        for map_type, _, fill in layout:
+            img = images.get(map_type)
+            if img is None:
+                img = Image.new("L", size, fill)
+            elif img.size != size:
+                img = img.resize(size, Image.BILINEAR)
+            channels.append(img)
+
+        tmp_path = dst + ".part"
+        Image.merge("RGB", channels).save(tmp_path, "PNG")
+        os.replace(tmp_path, dst)
+
+    texture_set.maps["packed"] = TextureFile(file, "packed")
+    texture_set.packed = {m: ch for m, ch, _ in present}
+    return True
+
+
+class TexturePrep:
+    """
+    Optional build stage between copying the textures and building the network.
+    With pack=True the grayscale maps are first merged into one texture (see pack_channels).
+    "tx" writes mipmapped .tx files with maketx, "variants" writes downscaled copies for the quality
+    tier with Pillow (and, with a tier, .tx files are made from those), "auto" picks tx when maketx
+    is found. The results are recorded in
+    texture_set.variants so the file nodes read them instead of the source images.
+    maketx runs as one subprocess per texture; the thread pool only waits on them.
+    """
+    def __init__(self, mode="auto", tier="full", workers=None, pack=False):
+        if mode not in PREP_MODES:
+            raise ValueError(f"Unknown texture prep mode '{mode}'")
+        if tier not in QUALITY_TIERS:
+            raise ValueError(f"Unknown quality tier '{tier}'")
+        if pack and not has_pillow():
+            raise RuntimeError("Packing channels needs Pillow")
+        self.tier = tier
+        self.pack = pack
+        self.workers = workers or os.cpu_count() or 1
+        self.maketx = find_maketx() if mode in ("auto", "tx") else None
+
+        self.mode = mode
+        if mode == "auto":
+            self.mode = "tx" if self.maketx else "variants"
+        if self.mode == "tx" and self.maketx is None:
+            raise RuntimeError("maketx not found, set MATERIALSPLUGIN_MAKETX or use the variants mode")
+        self.downscale = QUALITY_TIERS[tier] is not None and has_pillow()
+        if self.mode == "variants" and not self.downscale:
+            # Nothing to downscale to, or nothing to downscale with
+            self.mode = "none"
+
+    def signature(self):
+        """ Recorded in build manifests, changing it re-runs the stage """
+        if self.mode == "none" and not self.pack:
+            return None
+        return f"{self.mode}:{self.tier}" + (":packed" if self.pack else "")
+
+    def process(self, path):
+        if self.downscale:
+            try:
+                path = make_variant(path, self.tier, QUALITY_TIERS[self.tier])
+            except (OSError, ValueError):
+                # Pillow cannot handle this image (bit depth, mode...), keep full resolution
+                pass
+        if self.mode == "tx":
+            # The .tx of a tier variant carries only that tier's mip chain
+            return make_tx(self.maketx, path)
+        return path
+
+    def run(self, texture_set):
+        """ Processes every map (and UDIM tile) of texture_set. Returns the number of files written. """
+        texture_set.variants = {}
+        texture_set.packed = {}
+        if self.pack:
+            pack_channels(texture_set)
+        if self.mode == "none":
+            return 0
+
+        files = []
+        for map_type, texture in texture_set.maps.items():
+            if map_type in texture_set.packed:
+                # Read through the packed texture, no point preparing the single maps
+                continue
+            files.extend(tile.file for tile in texture_set.udim_tiles.get(map_type) or [texture])
+
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(files) or 1)) as executor:
+            results = executor.map(self.process, [os.path.join(texture_set.directory, f) for f in files])
+            # Relative to the material folder, like the map file names
+            results = {f: os.path.relpath(r, texture_set.directory).replace("\\", "/") for f, r in zip(files, results)}
+
+        for map_type, texture in texture_set.maps.items():
+            if results.get(texture.file, texture.file) != texture.file:
+                texture_set.variants[map_type] = results[texture.file]
+        return sum(1 for f, r in results.items() if r != f)
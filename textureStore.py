@@ -0,0 +1,228 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+import threading
+
+STORE_DIR_NAME = ".texstore"
+HASH_CACHE_NAME = "hashes.json"
+HASH_CHUNK_SIZE = 1024 * 1024
+FICLONE = 0x40049409  # linux/fs.h
+
+
+def hash_file(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def reflink(src, dst):
+    """ Copy-on-write clone, only where the filesystem supports it (btrfs, XFS, ...) """
+    if not sys.platform.startswith("linux"):
+        raise OSError("reflink not supported on this platform")
+    import fcntl
+    try:
+        with open(src, "rb") as s, open(dst, "wb") as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+    except OSError:
+        if os.path.exists(dst):
+            os.remove(dst)
+        raise
+
+
+class TextureStore:
+    """
+    Content-addressed texture store shared by every material in a library.
+    Blobs live in <library>/.texstore/<2 hex>/<sha256><ext>. Material folders get a reflink
+    (copy-on-write clone) of the blob where the filesystem supports it, otherwise a hardlink,
+    otherwise a plain copy. Hardlinked textures share edits, so textures should be replaced, not
+    painted over in place.
+    """
+    def __init__(self, library_root, link_mode="auto"):
+        self.library_root = library_root
+        self.store_dir = os.path.join(library_root, STORE_DIR_NAME)
+        self.link_mode = link_mode  # auto, reflink, hardlink, copy
+
+        self.lock = threading.Lock()
+        self.hash_cache_path = os.path.join(self.store_dir, HASH_CACHE_NAME)
+        self.hash_cache = None  # abs path -> [size, mtime_ns, digest, placed from its blob]
+        self.hash_cache_dirty = False
+
+    def blob_path(self, digest, ext):
+        return os.path.join(self.store_dir, digest[:2], digest + ext.lower())
+
+    def read_hash_cache(self):
+        try:
+            with open(self.hash_cache_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def load_hash_cache(self):
+        with self.lock:
+            if self.hash_cache is None:
+                self.hash_cache = self.read_hash_cache()
+
+    def save_hash_cache(self):
+        with self.lock:
+            if not self.hash_cache_dirty:
+                return
+            os.makedirs(self.store_dir, exist_ok=True)
+            # Other workstations and batch processes save to the same cache: keep what they added since we loaded
+            merged = self.read_hash_cache()
+            merged.update(self.hash_cache)
+            self.hash_cache = merged
+            tmp_path = f"{self.hash_cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, "w") as f:
+                    json.dump(self.hash_cache, f, separators=(",", ":"))
+                os.replace(tmp_path, self.hash_cache_path)
+                self.hash_cache_dirty = False
+            except OSError:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    def digest(self, path):
+        """ sha256 of path, reused from the cache while size and mtime are unchanged """
+        self.load_hash_cache()
+        key = os.path.abspath(path)
+        st = os.stat(path)
+        cached = self.hash_cache.get(key)
+        if cached is not None and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+
+        digest = hash_file(path)
+        self.remember_digest(path, digest)
+        return digest
+
+    def remember_digest(self, path, digest, placed=False):
+        self.load_hash_cache()
+        st = os.stat(path)
+        with self.lock:
+            self.hash_cache[os.path.abspath(path)] = [st.st_size, st.st_mtime_ns, digest, placed]
+            self.hash_cache_dirty = True
+
+    def is_placed(self, path, digest):
+        """ Whether path was put in place from the digest blob and has not changed since, from the cache alone """
+        cached = self.hash_cache.get(os.path.abspath(path)) if self.hash_cache is not None else None
+        if cached is None or len(cached) < 4 or not cached[3] or cached[2] != digest:
+            return False
+        st = os.stat(path)
+        return cached[0] == st.st_size and cached[1] == st.st_mtime_ns
+
+    def link(self, src, dst):
+        """ Places src at dst without duplicating bytes where possible. Returns the method used. """
+        # Unique per thread and process: several batch workers may seed the same blob at once
+        tmp_path = f"{dst}.{os.getpid()}.{threading.get_ident()}.link"
+
+        method = None
+        if self.link_mode in ("auto", "reflink"):
+            try:
+                reflink(src, tmp_path)
+                method = "reflink"
+            except OSError:
+                pass
+        if method is None and self.link_mode in ("auto", "hardlink"):
+            try:
+                os.link(src, tmp_path)
+                method = "hardlink"
+            except OSError:
+                pass
+        if method is None:
+            shutil.copyfile(src, tmp_path)
+            method = "copy"
+
+        os.replace(tmp_path, dst)
+        return method
+
+    def add_blob(self, path, digest):
+        """ Makes sure the store holds digest, seeding it from path. Returns the blob path. """
+        blob = self.blob_path(digest, os.path.splitext(path)[1])
+        if not os.path.exists(blob):
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            self.link(path, blob)
+        return blob
+
+    def ingest(self, src, dst):
+        """ Puts src at dst through the store, copying its bytes at most once per library """
+        digest = self.digest(src)
+        blob = self.add_blob(src, digest)
+        self.link(blob, dst)
+        self.remember_digest(dst, digest, placed=True)
+        return digest
+
+    def adopt(self, path, digest=None):
+        """
+        Swaps a file already inside the library for a link to its blob. Returns the method link() used,
+        None when path seeded the blob or already was it.
+        """
+        digest = digest or self.digest(path)
+        blob = self.blob_path(digest, os.path.splitext(path)[1])
+        method = None
+        if not os.path.exists(blob):
+            self.add_blob(path, digest)
+        elif not os.path.samefile(blob, path):
+            method = self.link(blob, path)
+        self.remember_digest(path, digest, placed=True)
+        return method
+
+    def library_files(self, extensions):
+        for root, dirs, files in os.walk(self.library_root):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            for file in files:
+                if os.path.splitext(file)[1].lower() in extensions:
+                    yield os.path.join(root, file)
+
+    def dedup(self, extensions):
+        """ Library-wide pass: every texture becomes a link to its blob """
+        stats = {"files": 0, "deduplicated": 0, "bytes_reclaimed": 0}
+        for path in self.library_files(extensions):
+            stats["files"] += 1
+            digest = self.digest(path)
+            if self.is_placed(path, digest):
+                # Linked or copied from its blob by an earlier pass or build, reflinks are not samefile()
+                continue
+            size = os.stat(path).st_size
+            # A copy of the blob frees nothing
+            if self.adopt(path, digest) in ("reflink", "hardlink"):
+                stats["deduplicated"] += 1
+                stats["bytes_reclaimed"] += size
+        self.save_hash_cache()
+        return stats
+
+    def verify(self, extensions, remove_orphans=False):
+        """
+        Re-hashes every blob. Blobs whose content no longer matches their name are reported as
+        corrupt, blobs no texture in the library uses any more as orphans (optionally removed).
+        """
+        report = {"blobs": 0, "corrupt": [], "orphans": []}
+        if not os.path.isdir(self.store_dir):
+            return report
+
+        used = set()
+        for path in self.library_files(extensions):
+            try:
+                used.add(self.digest(path))
+            except OSError:
+                continue
+
+        for root, _, files in os.walk(self.store_dir):
+            for file in files:
+                if file == HASH_CACHE_NAME or file.endswith((".tmp", ".link")):
+                    continue
+                path = os.path.join(root, file)
+                digest = os.path.splitext(file)[0]
+                report["blobs"] += 1
+                if hash_file(path) != digest:
+                    report["corrupt"].append(path)
+                elif digest not in used:
+                    report["orphans"].append(path)
+
+        if remove_orphans:
+            for path in report["orphans"]:
+                os.remove(path)
+        self.save_hash_cache()
+        return report
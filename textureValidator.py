@@ -0,0 +1,334 @@
+import os
+import json
+import time
+import struct
+from concurrent.futures import ThreadPoolExecutor
+
+from textureClassifier import TextureFile, get_classifier
+
+REPORT_FILE_NAME = "texture_validation_report.json"
+HEADER_BYTES = 64 * 1024  # JPEG APPn segments before the SOF and most EXR headers fit comfortably
+EXR_MAX_HEADER = 16 * 1024 * 1024  # EXR headers can carry any metadata, previews included
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+EXR_MAGIC = b"\x76\x2f\x31\x01"
+EXR_PIXEL_BITS = {0: 32, 1: 16, 2: 32}  # uint, half, float
+JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+TIFF_MAGIC = (b"II*\0", b"MM\0*")
+BIGTIFF_MAGIC = (b"II+\0", b"MM\0+")
+TIFF_TYPES = {3: "H", 4: "I"}  # SHORT, LONG
+TIFF_TAGS = {256: "width", 257: "height", 258: "bits", 277: "channels"}
+TIFF_MAX_VALUES = 64
+
+# Maps whose precision shows up as stepping when rendered
+HIGH_PRECISION_MAPS = {"displacement"}
+
+
+class UnsupportedHeader(ValueError):
+    """ A header the probes do not understand, which says nothing about whether the image is fine """
+
+
+class HeaderCutShort(UnsupportedHeader):
+    """ The header goes on past the bytes read """
+
+
+class ImageInfo:
+    def __init__(self, fmt, width, height, bit_depth, channels, truncated=False):
+        self.format = fmt
+        self.width = width
+        self.height = height
+        self.bit_depth = bit_depth  # per channel
+        self.channels = channels
+        self.truncated = truncated
+
+    def to_dict(self):
+        return {"format": self.format, "width": self.width, "height": self.height,
+                "bit_depth": self.bit_depth, "channels": self.channels}
+
+
+def probe_png(head, tail):
+    if head[12:16] != b"IHDR":
+        raise ValueError("PNG without IHDR")
+    width, height, bit_depth, color_type = struct.unpack(">IIBB", head[16:26])
+    return ImageInfo("png", width, height, bit_depth, PNG_CHANNELS.get(color_type, 0), truncated=b"IEND" not in tail)
+
+
+def probe_jpeg(head, tail):
+    pos = 2
+    while pos + 9 < len(head):
+        if head[pos] != 0xFF:
+            raise ValueError("JPEG marker expected")
+        marker = head[pos + 1]
+        if marker == 0xFF:
+            pos += 1
+            continue
+        length = struct.unpack(">H", head[pos + 2:pos + 4])[0]
+        if marker in JPEG_SOF:
+            precision, height, width, components = struct.unpack(">BHHB", head[pos + 4:pos + 10])
+            return ImageInfo("jpeg", width, height, precision, components, truncated=b"\xff\xd9" not in tail)
+        pos += 2 + length
+    raise UnsupportedHeader("JPEG frame header not within the probed header")
+
+
+def probe_exr(head, tail):
+    pos = 8
+    width = height = None
+    bit_depth, channels = 0, 0
+    while True:
+        if pos >= len(head):
+            raise HeaderCutShort("EXR header not within the probed header")
+        if head[pos] == 0:
+            break
+        name_end = head.find(b"\0", pos)
+        type_end = head.find(b"\0", name_end + 1)
+        if name_end < 0 or type_end < 0 or type_end + 5 > len(head):
+            raise HeaderCutShort("EXR header not within the probed header")
+        name = head[pos:name_end]
+        size = struct.unpack("<i", head[type_end + 1:type_end + 5])[0]
+        if size < 0:
+            raise ValueError(f"EXR attribute {name!r} of size {size}")
+        value = head[type_end + 5:type_end + 5 + size]
+        if len(value) < size:
+            raise HeaderCutShort("EXR header not within the probed header")
+        if name == b"dataWindow":
+            x_min, y_min, x_max, y_max = struct.unpack("<iiii", value)
+            width, height = x_max - x_min + 1, y_max - y_min + 1
+        elif name == b"channels":
+            cpos = 0
+            while cpos < len(value) and value[cpos] != 0:
+                cname_end = value.index(b"\0", cpos)
+                pixel_type = struct.unpack("<i", value[cname_end + 1:cname_end + 5])[0]
+                bit_depth = max(bit_depth, EXR_PIXEL_BITS.get(pixel_type, 0))
+                channels += 1
+                cpos = cname_end + 17
+        pos = type_end + 5 + size
+    if width is None:
+        raise ValueError("EXR without dataWindow")
+    return ImageInfo("exr", width, height, bit_depth, channels)
+
+
+def read_exr(f, head, tail):
+    """ Reads on until the null that ends the header is in, rather than giving up after HEADER_BYTES """
+    while True:
+        try:
+            return probe_exr(head, tail)
+        except HeaderCutShort:
+            if len(head) >= EXR_MAX_HEADER:
+                raise
+            f.seek(len(head))
+            more = f.read(len(head))
+            if not more:
+                raise ValueError("EXR header cut short")
+            head += more
+
+
+def read_at(f, offset, size):
+    f.seek(offset)
+    data = f.read(size)
+    if len(data) < size:
+        raise ValueError("TIFF cut short")
+    return data
+
+
+def probe_tiff(f):
+    """ The first directory can be anywhere in the file, so it is read from there rather than from the header """
+    head = read_at(f, 0, 8)
+    endian = "<" if head[:2] == b"II" else ">"
+    ifd = struct.unpack(endian + "I", head[4:8])[0]
+    count = struct.unpack(endian + "H", read_at(f, ifd, 2))[0]
+    entries = read_at(f, ifd + 2, count * 12)
+
+    tags = {}
+    for i in range(count):
+        entry = entries[i * 12:i * 12 + 12]
+        tag, field_type, n = struct.unpack(endian + "HHI", entry[:8])
+        if tag not in TIFF_TAGS:
+            continue
+        if field_type not in TIFF_TYPES or not 0 < n <= TIFF_MAX_VALUES:
+            raise UnsupportedHeader(f"TIFF {TIFF_TAGS[tag]} of type {field_type}, count {n}")
+        fmt = endian + TIFF_TYPES[field_type] * n
+        size = struct.calcsize(fmt)
+        # Values that fit in 4 bytes are stored in the entry, left-justified, anything larger at an offset
+        data = entry[8:8 + size] if size <= 4 else read_at(f, struct.unpack(endian + "I", entry[8:12])[0], size)
+        tags[tag] = struct.unpack(fmt, data)
+
+    if 256 not in tags or 257 not in tags:
+        raise ValueError("TIFF without image size")
+    bits = tags.get(258, (1,))
+    channels = tags.get(277, (len(bits),))[0]
+    return ImageInfo("tiff", tags[256][0], tags[257][0], max(bits), channels)
+
+
+def probe_tga(head, tail):
+    width, height, pixel_depth = struct.unpack("<HHB", head[12:17])
+    channels = 4 if pixel_depth == 32 else (1 if pixel_depth == 8 else 3)
+    return ImageInfo("tga", width, height, 8, channels)
+
+
+def probe_bmp(head, tail):
+    width, height = struct.unpack("<ii", head[18:26])
+    bpp = struct.unpack("<H", head[28:30])[0]
+    return ImageInfo("bmp", width, abs(height), 8, max(1, bpp // 8))
+
+
+def probe_image(path):
+    """
+    Format, size, bit depth and channel count from the file header alone, no pixels are decoded.
+    Raises OSError, or ValueError for any header it cannot parse (UnsupportedHeader when it may still be fine).
+    """
+    try:
+        return probe_header(path)
+    except struct.error as e:
+        raise ValueError(f"malformed header: {e}") from e
+
+
+def probe_header(path):
+    with open(path, "rb") as f:
+        head = f.read(HEADER_BYTES)
+        size = f.seek(0, os.SEEK_END)
+        f.seek(max(0, size - 1024))
+        tail = f.read()
+        if head[:4] in TIFF_MAGIC:
+            return probe_tiff(f)
+        if head.startswith(EXR_MAGIC):
+            return read_exr(f, head, tail)
+
+    if head.startswith(PNG_SIGNATURE):
+        return probe_png(head, tail)
+    if head.startswith(b"\xff\xd8"):
+        return probe_jpeg(head, tail)
+    if head[:4] in BIGTIFF_MAGIC:
+        raise UnsupportedHeader("BigTIFF")
+    if head.startswith(b"BM"):
+        return probe_bmp(head, tail)
+    if os.path.splitext(path)[1].lower() == ".tga" and len(head) >= 18:
+        return probe_tga(head, tail)
+    raise ValueError("unrecognised image format")
+
+
+def issue(severity, code, message, map_type=None, file=None, repairable=False):
+    return {"severity": severity, "code": code, "map": map_type, "file": file,
+            "message": message, "repairable": repairable}
+
+
+def is_power_of_two(n):
+    return n > 0 and n & (n - 1) == 0
+
+
+def validate_texture_set(texture_set, plan=None):
+    """ Issues of one classified texture set, errors first. Each issue is a plain dict (see issue()). """
+    issues = []
+    if plan is not None:
+        for label in plan.missing_maps(texture_set):
+            issues.append(issue("error", "missing_map", f"{label} map missing"))
+    if "normald" in texture_set.maps and "normalgl" not in texture_set.maps:
+        issues.append(issue("warning", "directx_normal", "Only a DirectX normal map, the green channel has to be flipped",
+                            "normald", texture_set.file("normald"), repairable=True))
+
+    sizes = {}
+    for map_type, texture in texture_set.maps.items():
+        for tile in texture_set.udim_tiles.get(map_type) or [texture]:
+            try:
+                info = probe_image(texture_set.path(map_type) if tile is texture else
+                                   os.path.join(texture_set.directory or "", tile.file))
+            except UnsupportedHeader as e:
+                issues.append(issue("warning", "unprobed", f"Not checked, header not understood: {e}", map_type, tile.file))
+                continue
+            except (OSError, ValueError) as e:
+                issues.append(issue("error", "corrupt", f"Unreadable image: {e}", map_type, tile.file))
+                continue
+            if info.truncated:
+                issues.append(issue("error", "truncated", "File is cut short", map_type, tile.file))
+            if not (is_power_of_two(info.width) and is_power_of_two(info.height)):
+                issues.append(issue("warning", "non_power_of_two", f"{info.width}x{info.height} is not a power of two",
+                                    map_type, tile.file))
+            if map_type in HIGH_PRECISION_MAPS and info.bit_depth < 16:
+                issues.append(issue("warning", "low_bit_depth", f"{info.bit_depth}-bit {map_type} map will show stepping",
+                                    map_type, tile.file))
+            sizes.setdefault((info.width, info.height), []).append(tile.file)
+
+    if len(sizes) > 1:
+        common = max(sizes, key=lambda s: len(sizes[s]))
+        for size, files in sizes.items():
+            if size != common:
+                for file in files:
+                    issues.append(issue("warning", "resolution_mismatch",
+                                        f"{size[0]}x{size[1]}, the rest of the set is {common[0]}x{common[1]}", file=file))
+
+    issues.sort(key=lambda i: i["severity"] != "error")
+    return issues
+
+
+def flip_green(src, dst):
+    from PIL import Image, ImageOps
+    with Image.open(src) as img:
+        r, g, b = img.convert("RGB").split()
+        Image.merge("RGB", (r, ImageOps.invert(g), b)).save(dst)
+
+
+def repair_texture_set(texture_set, issues):
+    """ Fixes the repairable issues in place. Returns the codes repaired. """
+    repaired = []
+    for found in issues:
+        if not found["repairable"]:
+            continue
+        if found["code"] == "directx_normal":
+            file = f"{texture_set.name}_normalgl.png"
+            try:
+                flip_green(texture_set.path("normald"), os.path.join(texture_set.directory, file))
+            except (ImportError, OSError, ValueError):
+                continue
+            texture_set.maps["normalgl"] = TextureFile(file, "normalgl")
+            repaired.append(found["code"])
+    return repaired
+
+
+def material_dirs(lib_path):
+    for entry in sorted(os.scandir(lib_path), key=lambda e: e.name):
+        if entry.is_dir() and not entry.name.startswith("."):
+            yield entry.path
+
+
+def validate_dir(directory, plan=None, repair=False):
+    texture_set = get_classifier().classify_dir(directory)
+    issues = validate_texture_set(texture_set, plan)
+    repaired = repair_texture_set(texture_set, issues) if repair else []
+    if repaired:
+        issues = validate_texture_set(texture_set, plan)
+    return {"name": texture_set.name, "directory": directory, "repaired": repaired, "issues": issues}
+
+
+def validate_library(lib_path, plan=None, repair=False, workers=8, report_path=None):
+    """ Validates every material folder of lib_path in parallel and writes the JSON report """
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda d: validate_dir(d, plan, repair), material_dirs(lib_path)))
+
+    summary = {"sets": len(results), "errors": 0, "warnings": 0, "repaired": 0}
+    for result in results:
+        summary["errors"] += sum(1 for i in result["issues"] if i["severity"] == "error")
+        summary["warnings"] += sum(1 for i in result["issues"] if i["severity"] == "warning")
+        summary["repaired"] += len(result["repaired"])
+    report = {
+        "library": lib_path,
+        "template": plan.name if plan is not None else None,
+        "seconds": round(time.time() - start, 3),
+        "summary": summary,
+        "sets": [r for r in results if r["issues"] or r["repaired"]],
+    }
+    report_path = report_path or os.path.join(lib_path, REPORT_FILE_NAME)
+    try:
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=1)
+    except OSError:
+        pass
+    return report
+
+
+def describe(found):
+    return f"{found['file']}: {found['message']}" if found["file"] else found["message"]
+
+
+def format_issues(issues):
+    return "\n".join(f"[{found['severity']}] {describe(found)}" for found in issues)
@@ -0,0 +1,185 @@
+import os
+import hashlib
+import shutil
+import threading
+from collections import OrderedDict
+
+THUMBNAIL_SIZE = 96
+DEFAULT_MAX_ENTRIES = 4096
+
+
+def resize_with_pillow(src, dst, size):
+    from PIL import Image
+    with Image.open(src) as img:
+        img.thumbnail((size, size))
+        img.save(dst, "PNG", optimize=True)
+
+
+def resize_with_mimage(src, dst, size):
+    import maya.api.OpenMaya as om
+    img = om.MImage()
+    img.readFromFile(src)
+    width, height = img.getSize()
+    scale = float(size) / max(width, height, 1)
+    if scale < 1.0:
+        img.resize(max(1, int(width * scale)), max(1, int(height * scale)), preserveAspectRatio=True)
+    img.writeToFile(dst, "png")
+
+
+def find_resizer():
+    try:
+        import PIL.Image  # noqa: F401
+        return resize_with_pillow
+    except ImportError:
+        pass
+    try:
+        import maya.api.OpenMaya  # noqa: F401
+        return resize_with_mimage
+    except ImportError:
+        return None
+
+
+class ThumbnailCache:
+    """
+    Cell-sized copies of material previews.
+    Thumbnails live in a local cache directory named after the source path, with the source mtime,
+    size and thumbnail size folded into the file name so stale thumbnails are never served.
+    Lookups are memoised in an LRU of at most max_entries paths; the images themselves are held by Maya.
+    """
+    def __init__(self, cache_dir, size=THUMBNAIL_SIZE, max_entries=DEFAULT_MAX_ENTRIES, resizer=None):
+        self.cache_dir = cache_dir
+        self.size = size
+        self.max_entries = max_entries
+        self.resizer = resizer if resizer is not None else find_resizer()
+
+        self.lru = OrderedDict()  # source path -> (version, thumb path)
+        self.lock = threading.Lock()
+
+    def resizes_in_background(self):
+        """ Whether get() may generate thumbnails off the main thread: not through Maya's MImage """
+        return self.resizer is not None and self.resizer is not resize_with_mimage
+
+    @staticmethod
+    def source_key(src):
+        return hashlib.sha1(os.path.normcase(os.path.abspath(src)).encode("utf-8")).hexdigest()
+
+    def version_key(self, st):
+        return hashlib.sha1(f"{st.st_mtime_ns}|{st.st_size}|{self.size}".encode("utf-8")).hexdigest()[:12]
+
+    def source_dir(self, source_key):
+        return os.path.join(self.cache_dir, source_key[:2])
+
+    def get(self, src, generate=True):
+        """
+        Returns a thumbnail path for src, generating it if needed. Falls back to src itself.
+        With generate=False, None when the thumbnail would have to be generated.
+        """
+        try:
+            st = os.stat(src)
+        except OSError:
+            return src
+        version = self.version_key(st)
+
+        with self.lock:
+            cached = self.lru.get(src)
+            if cached is not None and cached[0] == version:
+                self.lru.move_to_end(src)
+                return cached[1]
+
+        source_key = self.source_key(src)
+        thumb_path = os.path.join(self.source_dir(source_key), f"{source_key}_{version}.png")
+        if not os.path.isfile(thumb_path):
+            if not generate:
+                return None
+            if not self.generate(src, source_key, thumb_path):
+                return src
+
+        self.remember(src, version, thumb_path)
+        return thumb_path
+
+    def generate(self, src, source_key, thumb_path):
+        if self.resizer is None:
+            return None
+
+        self.remove_versions(source_key, keep=os.path.basename(thumb_path))
+        os.makedirs(os.path.dirname(thumb_path), exist_ok=True)
+        # Unique per thread and process: the UI and a background prefetch may generate the same thumbnail
+        tmp_path = f"{thumb_path}.{os.getpid()}.{threading.get_ident()}.tmp.png"
+        try:
+            self.resizer(src, tmp_path, self.size)
+            os.replace(tmp_path, thumb_path)
+            return True
+        except Exception:
+            # Unreadable or unsupported preview: show the original instead
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+
+    def remember(self, src, version, thumb_path):
+        with self.lock:
+            self.lru.pop(src, None)
+            self.lru[src] = (version, thumb_path)
+            while len(self.lru) > max(1, self.max_entries):
+                self.lru.popitem(last=False)
+
+    def forget(self, src):
+        with self.lock:
+            self.lru.pop(src, None)
+
+    def remove_versions(self, source_key, keep=None):
+        """ Deletes the thumbnails of source_key other than keep, not the ones still being written """
+        directory = self.source_dir(source_key)
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return 0
+        removed = 0
+        for name in names:
+            if name.startswith(source_key) and name != keep and not name.endswith(".tmp.png"):
+                try:
+                    os.remove(os.path.join(directory, name))
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def invalidate(self, src):
+        self.forget(src)
+        return self.remove_versions(self.source_key(src))
+
+    def clear(self):
+        with self.lock:
+            self.lru.clear()
+        if os.path.isdir(self.cache_dir):
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def prune(self, max_bytes):
+        """ Deletes the least recently used thumbnails on disk until the cache fits in max_bytes """
+        files = []
+        total = 0
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                files.append((max(st.st_atime, st.st_mtime), st.st_size, path))
+                total += st.st_size
+
+        removed = 0
+        files.sort()
+        for _, size, path in files:
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+
+        if removed:
+            with self.lock:
+                self.lru.clear()
+        return removed